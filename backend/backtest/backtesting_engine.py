@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple, Any, Optional
 from datetime import datetime
@@ -8,42 +9,193 @@ from config import settings
 # Add the database path to import
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'database'))
 from database.db_engine import db_engine
+from backtest.instrumentation import timed_stage, count_event
+from backtest.risk_metrics import calculate_risk_metrics
 
-def backtest_strategy(data: pd.DataFrame, 
-                     strategy_name: str,
-                     stock_symbol: str,
-                     initial_capital: float = settings.INITIAL_CAPITAL, 
-                     shares_to_buy: int = settings.SHARES_TO_BUY,
-                     backtest_id: Optional[str] = None) -> Tuple[List[float], Dict[str, Any]]:
+def simulate_long_flat(close: np.ndarray,
+                       position: np.ndarray,
+                       initial_capital: float,
+                       shares_to_buy: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Backtest trading strategy based on position signals
+    Vectorized long/flat simulation on plain arrays
+    
+    Follows the same rules as the reference loop: a buy signal (1) opens a position of
+    shares_to_buy shares when flat and the cash covers it, a sell signal (-1) closes the
+    whole position when long, every other signal is ignored.
     
     Args:
-        data: DataFrame with OHLCV data and Position column (1 for buy, -1 for sell)
-        strategy_name: Name of the strategy being backtested
-        stock_symbol: Stock symbol being traded
+        close: Close price per bar
+        position: Position signal per bar (1 for buy, -1 for sell)
         initial_capital: Starting capital amount
         shares_to_buy: Number of shares to buy on buy signal
     
     Returns:
-        Tuple of (portfolio_values_list, performance_metrics_dict)
+        Tuple of (portfolio_values, entry_indices, exit_indices) where exit_indices
+        holds -1 for a trade that is still open on the last bar
     """
+    portfolio_values, entries, exit_indices, _ = resume_long_flat(
+        close, position, initial_capital, shares_to_buy, holding=False
+    )
+    return portfolio_values, entries, exit_indices
+
+def resume_long_flat(close: np.ndarray,
+                     position: np.ndarray,
+                     cash: float,
+                     shares_to_buy: int,
+                     holding: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    simulate_long_flat picking up from a carried-in state, for bars that continue
+    an earlier simulation (the chunks of a chunked backtest)
+    
+    Args:
+        cash: Cash left at the end of the previous bars
+        holding: Whether shares_to_buy shares are held from the previous bars
+    
+    Returns:
+        Tuple of (portfolio_values, entry_indices, exit_indices, cash after the last
+        bar). A position carried in shows up as an entry at -1, exit_indices holds
+        -1 for a trade that is still open on the last bar.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    position = np.asarray(position)
+    n = len(close)
+    
+    # Pass 1: keep only buy/sell signals and collapse repeats, which gives the
+    # long/flat state transitions when cash is never a constraint
+    events = np.flatnonzero((position == 1) | (position == -1))
+    sides = position[events]
+    previous = np.concatenate(([1 if holding else -1], sides[:-1]))
+    transitions = events[sides != previous]
+    if holding:
+        transitions = np.concatenate(([-1], transitions))
+    entries = transitions[0::2]
+    exits = transitions[1::2]
+    
+    # Pass 2: cash available before each buy, checked against the cost of the buy
+    # (the carried-in position is already paid for)
+    opened = entries[entries >= 0]
+    costs = np.concatenate(([0.0] if holding else [], shares_to_buy * close[opened]))
+    proceeds = shares_to_buy * close[exits]
+    cash_flows = np.empty(len(transitions), dtype=np.float64)
+    cash_flows[0::2] = -costs
+    cash_flows[1::2] = proceeds
+    cash_after = np.cumsum(np.concatenate(([cash], cash_flows)))
+    if np.any(cash_after[0:2 * len(entries):2] < costs):
+        # Some buys are unaffordable, which changes every later transition,
+        # so resolve the state machine event by event instead
+        entries, exits = _resolve_with_cash(close, events, sides, cash, shares_to_buy, holding)
+        opened = entries[entries >= 0]
+    
+    # Pass 3: cash and share deltas per bar, accumulated into the portfolio curve
+    cash_delta = np.zeros(n, dtype=np.float64)
+    cash_delta[opened] = -(shares_to_buy * close[opened])
+    cash_delta[exits] = shares_to_buy * close[exits]
+    cash_curve = np.cumsum(np.concatenate(([cash], cash_delta)))
+    
+    share_delta = np.zeros(n, dtype=np.int64)
+    share_delta[opened] = shares_to_buy
+    share_delta[exits] = -shares_to_buy
+    shares_held = (shares_to_buy if holding else 0) + np.cumsum(share_delta)
+    
+    portfolio_values = cash_curve[1:] + shares_held * close
+    
+    exit_indices = np.full(len(entries), -1, dtype=np.int64)
+    exit_indices[:len(exits)] = exits
+    return portfolio_values, entries, exit_indices, float(cash_curve[-1])
+
+def _resolve_with_cash(close: np.ndarray, events: np.ndarray, sides: np.ndarray,
+                       cash: float, shares_to_buy: int, holding: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Walk the buy/sell events only (not every bar), skipping buys the cash cannot cover"""
+    entries = [-1] if holding else []
+    exits = []
+    for i, side in zip(events.tolist(), sides.tolist()):
+        if side == 1 and not holding:
+            cost = shares_to_buy * close[i]
+            if cash >= cost:
+                cash -= cost
+                holding = True
+                entries.append(i)
+        elif side == -1 and holding:
+            cash += shares_to_buy * close[i]
+            holding = False
+            exits.append(i)
+    return np.array(entries, dtype=np.int64), np.array(exits, dtype=np.int64)
+
+def _trade_record(strategy_name: str, stock_symbol: str, quantity: int, backtest_id: Optional[str],
+                  entry_price: float, entry_timestamp: str, entry_bar: Optional[int] = None) -> Dict[str, Any]:
+    """
+    In-memory trade row, filled in completely before it is written to the database
+    entry_bar/exit_bar are bar positions used for the risk metrics; they are not stored
+    """
+    return {
+        "strategy_name": strategy_name,
+        "stock_symbol": stock_symbol,
+        "trade_type": "buy",
+        "quantity": quantity,
+        "entry_price": entry_price,
+        "entry_timestamp": entry_timestamp,
+        "exit_price": None,
+        "exit_timestamp": None,
+        "pnl": 0.0,
+        "days_held": 0,
+        "backtest_id": backtest_id,
+        "entry_bar": entry_bar,
+        "exit_bar": None
+    }
+
+def _backtest_vectorized(data: pd.DataFrame,
+                         strategy_name: str,
+                         stock_symbol: str,
+                         initial_capital: float,
+                         shares_to_buy: int,
+                         backtest_id: Optional[str]) -> Tuple[List[float], List[Dict[str, Any]]]:
+    """NumPy engine: simulate on arrays, then build the resulting trades"""
+    close = data['Close'].to_numpy(dtype=np.float64)
+    position = data['Position'].to_numpy() if 'Position' in data.columns else np.zeros(len(data))
+    
+    portfolio_values, entries, exits = simulate_long_flat(close, position, initial_capital, shares_to_buy)
+    
+    # Exit details for the closed trades (only the last trade can still be open)
+    closed = exits >= 0
+    pnl = (close[exits[closed]] - close[entries[closed]]) * shares_to_buy
+    dates = pd.to_datetime(data.index)
+    days_held = (dates[exits[closed]] - dates[entries[closed]]).days
+    
+    trades = []
+    for k, entry in enumerate(entries.tolist()):
+        trade = _trade_record(strategy_name, stock_symbol, shares_to_buy, backtest_id,
+                              entry_price=close[entry], entry_timestamp=str(data.index[entry])[:19],
+                              entry_bar=entry)
+        if closed[k]:
+            exit_ = int(exits[k])
+            trade["exit_bar"] = exit_
+            trade["exit_price"] = close[exit_]
+            trade["exit_timestamp"] = str(data.index[exit_])[:19]
+            trade["pnl"] = pnl[k]
+            trade["days_held"] = int(days_held[k])
+        trades.append(trade)
+    
+    return portfolio_values.tolist(), trades
+
+def _backtest_loop(data: pd.DataFrame,
+                   strategy_name: str,
+                   stock_symbol: str,
+                   initial_capital: float,
+                   shares_to_buy: int,
+                   backtest_id: Optional[str]) -> Tuple[List[float], List[Dict[str, Any]]]:
+    """Reference engine: walks the frame bar by bar"""
     
     # Initialize variables
     portfolio_values = []
+    trades = []
     cash = initial_capital
     shares_held = 0
-    current_trade_id = None
+    current_trade = None
     entry_date = None
     entry_price = None
-    total_trades = 0
-    winning_trades = 0
-    
-    # Ensure data is sorted by date
-    data = data.sort_index()
     
     # Iterate through each row in the data
-    for index, row in data.iterrows():
+    for bar, (index, row) in enumerate(data.iterrows()):
         current_price = row['Close']
         position = row.get('Position', 0)  # Get position signal
         
@@ -58,17 +210,12 @@ def backtest_strategy(data: pd.DataFrame,
                     entry_price = current_price
                     entry_date = index
                     
-                    # Insert trade into database
-                    current_trade_id = db_engine.insert_trade(
-                        strategy_name=strategy_name,
-                        stock_symbol=stock_symbol,  # This will be mapped to stock_symbol in db_engine
-                        trade_type="buy",
-                        quantity=shares_to_buy,
-                        entry_price=current_price,
-                        entry_timestamp=str(index)[:19],  # Format timestamp
-                        backtest_id=backtest_id
-                    )
-                    total_trades += 1
+                    # Open the trade in memory
+                    current_trade = _trade_record(strategy_name, stock_symbol, shares_to_buy, backtest_id,
+                                                  entry_price=current_price,
+                                                  entry_timestamp=str(index)[:19],  # Format timestamp
+                                                  entry_bar=bar)
+                    trades.append(current_trade)
             # else: already holding shares, do nothing
         
         # SELL SIGNAL (position == -1)
@@ -78,27 +225,16 @@ def backtest_strategy(data: pd.DataFrame,
                 proceeds = shares_held * current_price
                 cash += proceeds
                 
-                # Calculate PnL and days held
-                pnl = (current_price - entry_price) * shares_held
-                days_held = (pd.to_datetime(index) - pd.to_datetime(entry_date)).days
-                
-                # Update trade in database
-                if current_trade_id:
-                    db_engine.update_trade_exit(
-                        trade_id=current_trade_id,
-                        exit_price=current_price,
-                        exit_timestamp=str(index)[:19],
-                        pnl=pnl,
-                        days_held=days_held
-                    )
-                
-                # Track winning trades
-                if pnl > 0:
-                    winning_trades += 1
+                # Close the trade with PnL and days held
+                current_trade["exit_bar"] = bar
+                current_trade["exit_price"] = current_price
+                current_trade["exit_timestamp"] = str(index)[:19]
+                current_trade["pnl"] = (current_price - entry_price) * shares_held
+                current_trade["days_held"] = (pd.to_datetime(index) - pd.to_datetime(entry_date)).days
                 
                 # Reset position
                 shares_held = 0
-                current_trade_id = None
+                current_trade = None
                 entry_date = None
                 entry_price = None
             # else: not holding any shares, do nothing
@@ -107,14 +243,18 @@ def backtest_strategy(data: pd.DataFrame,
         portfolio_value = cash + (shares_held * current_price)
         portfolio_values.append(portfolio_value)
     
-    # Calculate performance metrics
-    final_portfolio_value = portfolio_values[-1] if portfolio_values else initial_capital
+    return portfolio_values, trades
+
+def calculate_performance_metrics(portfolio_values,
+                                  total_trades: int,
+                                  winning_trades: int,
+                                  initial_capital: float) -> Dict[str, Any]:
+    """Performance figures shared by single backtests and parameter sweeps"""
+    final_portfolio_value = portfolio_values[-1] if len(portfolio_values) > 0 else initial_capital
     total_return = ((final_portfolio_value - initial_capital) / initial_capital) * 100
     win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
     
-    performance_metrics = {
-        'timeframe_start': str(data.index[0])[:10],
-        'timeframe_end': str(data.index[-1])[:10],
+    return {
         'initial_capital': initial_capital,
         'final_portfolio_value': final_portfolio_value,
         'total_return_pct': round(total_return, 2),
@@ -122,9 +262,90 @@ def backtest_strategy(data: pd.DataFrame,
         'total_trades': total_trades,
         'winning_trades': winning_trades,
         'losing_trades': total_trades - winning_trades,
-        'win_rate_pct': round(win_rate, 2),
-        'strategy_name': strategy_name,
-        'stock_symbol': stock_symbol
+        'win_rate_pct': round(win_rate, 2)
     }
+
+# Simulation engines selectable through backtest_strategy(engine=...)
+ENGINES = {
+    "vectorized": _backtest_vectorized,
+    "loop": _backtest_loop,
+}
+
+def backtest_strategy(data: pd.DataFrame, 
+                     strategy_name: str,
+                     stock_symbol: str,
+                     initial_capital: float = settings.INITIAL_CAPITAL, 
+                     shares_to_buy: int = settings.SHARES_TO_BUY,
+                     backtest_id: Optional[str] = None,
+                     engine: str = settings.BACKTEST_ENGINE,
+                     persist_trades: bool = True) -> Tuple[List[float], Dict[str, Any]]:
+    """
+    Backtest trading strategy based on position signals
+    
+    Args:
+        data: DataFrame with OHLCV data and Position column (1 for buy, -1 for sell)
+        strategy_name: Name of the strategy being backtested
+        stock_symbol: Stock symbol being traded
+        initial_capital: Starting capital amount
+        shares_to_buy: Number of shares to buy on buy signal
+        backtest_id: Backtest job the recorded trades belong to
+        engine: "vectorized" (NumPy arrays) or "loop" (bar-by-bar reference implementation)
+        persist_trades: Write the trades to the database (False for throwaway runs)
+    
+    Returns:
+        Tuple of (portfolio_values_list, performance_metrics_dict)
+    """
+    
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown backtest engine '{engine}'. Available engines: {', '.join(ENGINES)}")
+    
+    # Ensure data is sorted by date
+    data = data.sort_index()
+    
+    portfolio_values, trades = ENGINES[engine](
+        data, strategy_name, stock_symbol, initial_capital, shares_to_buy, backtest_id
+    )
+    
+    # Write all trades at once, each already carrying its exit fields
+    if persist_trades:
+        with timed_stage("trade_writes"):
+            db_engine.insert_trades(trades)
+        count_event("trades_written", len(trades))
+    
+    # Calculate performance metrics
+    performance_metrics = backtest_metrics(
+        portfolio_values, data.index, trades, initial_capital, strategy_name, stock_symbol
+    )
+    
+    return portfolio_values, performance_metrics
+
+def backtest_metrics(portfolio_values,
+                     dates: pd.DatetimeIndex,
+                     trades: List[Dict[str, Any]],
+                     initial_capital: float,
+                     strategy_name: str,
+                     stock_symbol: str) -> Dict[str, Any]:
+    """
+    Performance and risk metrics of a single backtest
     
-    return portfolio_values, performance_metrics
\ No newline at end of file
+    Args:
+        portfolio_values: Portfolio value per bar
+        dates: Timestamp per bar
+        trades: Trade records with their entry_bar/exit_bar positions
+    """
+    total_trades = len(trades)
+    winning_trades = sum(1 for trade in trades if trade["exit_price"] is not None and trade["pnl"] > 0)
+    
+    return {
+        'timeframe_start': str(dates[0])[:10],
+        'timeframe_end': str(dates[-1])[:10],
+        **calculate_performance_metrics(portfolio_values, total_trades, winning_trades, initial_capital),
+        **calculate_risk_metrics(
+            portfolio_values, dates, initial_capital,
+            entry_bars=np.array([trade["entry_bar"] for trade in trades], dtype=np.int64),
+            exit_bars=np.array([-1 if trade["exit_bar"] is None else trade["exit_bar"] for trade in trades], dtype=np.int64),
+            pnl=np.array([trade["pnl"] for trade in trades], dtype=np.float64)
+        ),
+        'strategy_name': strategy_name,
+        'stock_symbol': stock_symbol
+    }
\ No newline at end of file
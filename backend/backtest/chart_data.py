@@ -0,0 +1,86 @@
+import json
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from strategy.registry import STRATEGIES
+from backtest.downsampling import downsample_curve
+
+# Price fields sent for every bar, rounded to cents
+PRICE_FIELDS = ("Open", "High", "Low", "Close")
+
+
+def _rounded(values, decimals: int = 2) -> List[float]:
+    """Round a whole column at once and return plain Python floats"""
+    return np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+
+
+def chart_columns(strategy_data: pd.DataFrame, strategy_name: str,
+                  strategy_params: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Chart data as one list per field, built directly from the frame's arrays
+
+    Field names and rounding are the same as the per-bar chart records.
+    """
+    n = len(strategy_data)
+    index = strategy_data.index
+    columns = {
+        "Date": list(index.strftime("%Y-%m-%dT%H:%M:%S%z")) if hasattr(index, "strftime") else [str(i) for i in index]
+    }
+    for field in PRICE_FIELDS:
+        columns[field] = _rounded(strategy_data[field])
+    columns["Volume"] = strategy_data["Volume"].to_numpy().astype(np.int64).tolist()
+    # Signal for frontend markers
+    if "Position" in strategy_data.columns:
+        columns["Position"] = strategy_data["Position"].to_numpy(dtype=np.float64).tolist()
+    else:
+        columns["Position"] = [0.0] * n
+
+    # Add strategy-specific indicators
+    spec = STRATEGIES.get(strategy_name)
+    indicators = spec.chart_indicators(strategy_params) if spec else []
+
+    for column, decimals in indicators:
+        columns[column] = _rounded(strategy_data[column], decimals) if column in strategy_data.columns else [None] * n
+
+    return columns
+
+
+def equity_columns(index: pd.Index, portfolio_values, max_points: Optional[int] = None,
+                   keep: Optional[np.ndarray] = None) -> Dict[str, List[Any]]:
+    """
+    Equity curve as a date list and a value list
+
+    With max_points, longer curves are downsampled with LTTB, always keeping the
+    positions in keep (e.g. the bars with trade signals).
+    """
+    n = min(len(index), len(portfolio_values))
+    index = index[:n]
+    values = np.asarray(portfolio_values[:n], dtype=np.float64)
+    if max_points:
+        positions = downsample_curve(index, values, max_points, keep)
+        index, values = index[positions], values[positions]
+    return {
+        "date": list(pd.DatetimeIndex(index).strftime("%Y-%m-%d")),
+        "value": _rounded(values)
+    }
+
+
+def columns_to_records(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Turn columnar data back into one dict per row"""
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def iter_chart_ndjson(strategy_data: pd.DataFrame, strategy_name: str,
+                      strategy_params: Dict[str, Any], chunk_size: int = 5000) -> Iterator[str]:
+    """
+    Stream chart records as newline-delimited JSON
+
+    The frame is converted a chunk of bars at a time, so memory stays bounded by
+    the chunk size no matter how many bars the backtest produced.
+    """
+    for start in range(0, len(strategy_data), chunk_size):
+        chunk = strategy_data.iloc[start:start + chunk_size]
+        records = columns_to_records(chart_columns(chunk, strategy_name, strategy_params))
+        yield "".join(json.dumps(record) + "\n" for record in records)
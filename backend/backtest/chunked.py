@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from config import settings
+from database.db_engine import db_engine
+from database.serialization import serialize_frame
+from data_feed.bar_store import bar_store
+from data_feed.data_feed import update_store
+from strategy.registry import get_strategy
+from backtest.backtesting_engine import _trade_record, backtest_metrics, resume_long_flat
+from backtest.instrumentation import timed_stage, count_event
+
+
+def run_chunked_backtest(strategy_name: str,
+                         strategy_params: Optional[Dict[str, Any]],
+                         stock_symbol: str,
+                         start_date: str,
+                         end_date: str,
+                         initial_capital: float = settings.INITIAL_CAPITAL,
+                         shares_to_buy: int = settings.SHARES_TO_BUY,
+                         backtest_id: Optional[str] = None,
+                         persist_trades: bool = True,
+                         chunk_bars: int = 100000,
+                         store_frames: bool = False) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Backtest a strategy over the local bar store one chunk of bars at a time
+
+    The strategy's stream object carries the indicator state (EMAs, rolling
+    windows) and the simulation carries cash and the open trade across chunk
+    boundaries, so the results equal those of backtest_strategy on the full
+    strategy frame. Only one chunk of bars is in memory at a time; apart from
+    the trades, the per-bar state kept is the portfolio value and timestamp
+    (16 bytes per bar), which the metrics need.
+
+    Args:
+        chunk_bars: Bars read from the store per chunk
+        store_frames: Save each chunk's strategy frame with the job (needs backtest_id),
+            so result reads don't have to rebuild the frame
+
+    Returns:
+        Tuple of (portfolio_values, performance_metrics_dict)
+    """
+    if not settings.USE_DATA_STORE:
+        raise ValueError("Chunked backtests read from the local bar store; enable USE_DATA_STORE")
+
+    with timed_stage("fetch"):
+        update_store(stock_symbol, start_date, end_date, settings.INTERVAL)
+    stream = get_strategy(strategy_name).stream(strategy_params)
+
+    cash = float(initial_capital)
+    current_trade = None
+    entry_date = None
+    bars = 0
+    chunks_stored = 0
+    tz = None
+
+    value_chunks: List[np.ndarray] = []
+    stamp_chunks: List[np.ndarray] = []
+    # Only the fields the metrics need are kept for closed trades
+    trades: List[Dict[str, Any]] = []
+
+    for chunk in bar_store.iter_chunks(stock_symbol, settings.INTERVAL, start_date, end_date, chunk_bars):
+        with timed_stage("indicators"):
+            frame = stream.extend(chunk)
+        if frame.empty:
+            continue
+
+        close = frame['Close'].to_numpy(dtype=np.float64)
+        position = frame['Position'].to_numpy()
+        n = len(close)
+
+        values, entries, exits, cash = resume_long_flat(close, position, cash, shares_to_buy,
+                                                        holding=current_trade is not None)
+        value_chunks.append(values)
+
+        # Turn the chunk's entries and exits into trades; an entry at -1 is the trade carried in
+        closed = []
+        for entry, exit_ in zip(entries.tolist(), exits.tolist()):
+            if entry >= 0:
+                entry_date = frame.index[entry]
+                current_trade = _trade_record(strategy_name, stock_symbol, shares_to_buy, backtest_id,
+                                              entry_price=close[entry], entry_timestamp=str(entry_date)[:19],
+                                              entry_bar=bars + entry)
+            if exit_ >= 0:
+                current_trade["exit_bar"] = bars + exit_
+                current_trade["exit_price"] = close[exit_]
+                current_trade["exit_timestamp"] = str(frame.index[exit_])[:19]
+                current_trade["pnl"] = (close[exit_] - current_trade["entry_price"]) * shares_to_buy
+                current_trade["days_held"] = (frame.index[exit_] - entry_date).days
+                closed.append(current_trade)
+                current_trade = None
+
+        index = pd.DatetimeIndex(frame.index)
+        tz = index.tz
+        stamp_chunks.append((index.tz_convert("UTC").tz_localize(None) if tz is not None else index).asi8)
+
+        if store_frames and backtest_id:
+            with timed_stage("db_writes"):
+                db_engine.save_strategy_frame_chunk(backtest_id, chunks_stored, serialize_frame(frame))
+            chunks_stored += 1
+
+        if persist_trades and closed:
+            with timed_stage("trade_writes"):
+                db_engine.insert_trades(closed)
+            count_event("trades_written", len(closed))
+        trades.extend({key: trade[key] for key in ("entry_bar", "exit_bar", "exit_price", "pnl")}
+                      for trade in closed)
+        bars += n
+
+    # A trade still open on the last bar is recorded without exit details
+    if current_trade is not None:
+        if persist_trades:
+            with timed_stage("trade_writes"):
+                db_engine.insert_trades([current_trade])
+            count_event("trades_written", 1)
+        trades.append(current_trade)
+
+    if not value_chunks:
+        raise ValueError(f"No bars for {stock_symbol} between {start_date} and {end_date}")
+
+    portfolio_values = np.concatenate(value_chunks)
+    dates = pd.DatetimeIndex(np.concatenate(stamp_chunks).view("datetime64[ns]"))
+    if tz is not None:
+        dates = dates.tz_localize("UTC").tz_convert(tz)
+
+    performance_metrics = backtest_metrics(
+        portfolio_values, dates, trades, initial_capital, strategy_name, stock_symbol
+    )
+    return portfolio_values, performance_metrics
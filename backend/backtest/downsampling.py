@@ -0,0 +1,134 @@
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _bound(value: str, index: pd.DatetimeIndex) -> pd.Timestamp:
+    """A start/end parameter as a timestamp comparable with the index"""
+    stamp = pd.Timestamp(value)
+    if index.tz is not None and stamp.tzinfo is None:
+        return stamp.tz_localize(index.tz)
+    if index.tz is None and stamp.tzinfo is not None:
+        return stamp.tz_convert(None)
+    return stamp
+
+
+def window_positions(index: pd.Index, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Bar positions [lo, hi) of a sorted index between start and end
+
+    A date-only end ("2024-06-30") includes the whole day.
+    """
+    index = pd.DatetimeIndex(index)
+    lo, hi = 0, len(index)
+    if start:
+        lo = int(index.searchsorted(_bound(start, index), side="left"))
+    if end:
+        if len(end) <= 10:
+            hi = int(index.searchsorted(_bound(end, index) + pd.Timedelta(days=1), side="left"))
+        else:
+            hi = int(index.searchsorted(_bound(end, index), side="right"))
+    return lo, max(lo, hi)
+
+
+def signal_positions(frame: pd.DataFrame) -> np.ndarray:
+    """Positions of the bars where Position is non-zero (trade entries and exits)"""
+    if "Position" not in frame.columns:
+        return np.empty(0, dtype=np.int64)
+    position = frame["Position"].to_numpy(dtype=np.float64)
+    return np.flatnonzero(np.nan_to_num(position) != 0)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of n_out points that keep the shape of a line
+
+    The first and last points are always kept. The points in between are split
+    into n_out - 2 buckets, and each bucket keeps the point that forms the
+    largest triangle with the point kept in the previous bucket and the average
+    of the next bucket. Peaks and troughs survive, unlike with every-nth sampling.
+    """
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    n_out = max(n_out, 3)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for bucket in range(n_out - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket == n_out - 3:
+            next_x, next_y = x[n - 1], y[n - 1]
+        else:
+            next_x = x[hi:edges[bucket + 2]].mean()
+            next_y = y[hi:edges[bucket + 2]].mean()
+        # Twice the triangle areas; the factor doesn't change the argmax
+        areas = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+
+def downsample_curve(index: pd.Index, values, max_points: int,
+                     keep: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Positions of the points of a value curve (e.g. equity) to send for charting
+
+    Uses LTTB with time as x, so gaps such as weekends are weighted correctly.
+    Positions in keep are always included; they count against max_points.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = min(len(index), len(values))
+    if n <= max_points:
+        return np.arange(n)
+    keep = np.empty(0, dtype=np.int64) if keep is None else keep[keep < n]
+    x = pd.DatetimeIndex(index[:n]).asi8.astype(np.float64)
+    selected = lttb_indices(x, values[:n], max(3, max_points - len(keep)))
+    return np.union1d(selected, keep)
+
+
+def downsample_ohlc(frame: pd.DataFrame, max_points: int) -> pd.DataFrame:
+    """
+    Aggregate consecutive bars into at most about max_points candles
+
+    Each candle keeps its bucket's first Open, highest High, lowest Low, last
+    Close and total Volume, so price extremes stay visible. Bars with a
+    non-zero Position (trade signals) become candles of their own, so every
+    trade marker keeps its exact bar and Close; with more than max_points / 2
+    signals the result is therefore larger than max_points. Other columns
+    (indicators) take the bucket's last value. The candle is dated at its
+    first bar.
+    """
+    n = len(frame)
+    if n <= max_points:
+        return frame
+
+    signals = signal_positions(frame)
+    # Each signal bar can split a bucket in three, so reserve room for that
+    n_buckets = max(1, max_points - 2 * len(signals))
+    bucket_size = -(-n // n_buckets)
+    starts = np.union1d(np.arange(0, n, bucket_size), np.concatenate((signals, signals + 1)))
+    starts = starts[starts < n]
+    last = np.append(starts[1:], n) - 1
+
+    sampled = frame.iloc[last].copy()
+    sampled.index = frame.index[starts]
+    if "Open" in frame.columns:
+        sampled["Open"] = frame["Open"].to_numpy(dtype=np.float64)[starts]
+    if "High" in frame.columns:
+        sampled["High"] = np.fmax.reduceat(frame["High"].to_numpy(dtype=np.float64), starts)
+    if "Low" in frame.columns:
+        sampled["Low"] = np.fmin.reduceat(frame["Low"].to_numpy(dtype=np.float64), starts)
+    if "Volume" in frame.columns:
+        sampled["Volume"] = np.add.reduceat(np.nan_to_num(frame["Volume"].to_numpy(dtype=np.float64)), starts)
+    if "Position" in frame.columns:
+        # Zero everywhere except the single-bar signal candles
+        sampled["Position"] = np.add.reduceat(np.nan_to_num(frame["Position"].to_numpy(dtype=np.float64)), starts)
+    return sampled
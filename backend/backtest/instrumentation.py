@@ -0,0 +1,271 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from database.db_engine import db_engine
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Timer of the job or request running in the current context, if any
+_active_timer: ContextVar[Optional["StageTimer"]] = ContextVar("active_timer", default=None)
+
+
+class StageTimer:
+    """
+    Wall time per pipeline stage and counters for one job or request
+
+    Stages can nest; a stage's time excludes the stages inside it, so the stage
+    times add up to the total instead of counting work twice.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._child_time: List[float] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of work under a stage name"""
+        started = time.perf_counter()
+        self._child_time.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - self._child_time.pop()
+            if self._child_time:
+                self._child_time[-1] += elapsed
+
+    def count(self, name: str, value: int = 1):
+        """Add to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    @contextmanager
+    def activate(self):
+        """Make this timer collect timed_stage/count_event calls made by code deeper in the stack"""
+        token = _active_timer.set(self)
+        try:
+            yield self
+        finally:
+            _active_timer.reset(token)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Total time, stage times and counters, ready to be stored as JSON"""
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters)
+        }
+
+
+@contextmanager
+def timed_stage(name: str):
+    """
+    Time a block under the active timer; does nothing when no timer is active
+
+    Also usable as a decorator, e.g. @timed_stage("fetch").
+    """
+    timer = _active_timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
+
+
+def count_event(name: str, value: int = 1):
+    """Add to a counter of the active timer, if any"""
+    timer = _active_timer.get()
+    if timer is not None:
+        timer.count(name, value)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus sense (bucket counts include smaller buckets)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Record one observation"""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str = "") -> List[str]:
+        """Sample lines of the histogram in Prometheus text format"""
+        prefix = f"{labels}," if labels else ""
+        lines = [f'{name}_bucket{{{prefix}le="{bound}"}} {count}'
+                 for bound, count in zip(self.buckets, self.bucket_counts)]
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class ResultsMetrics:
+    """Timings of result reads, which run in the API process and are aggregated in memory"""
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.stage_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, Any]):
+        """Add the as_dict() output of one request's timer"""
+        with self._lock:
+            self.duration.observe(timings["total_seconds"])
+            for stage, seconds in timings["stages"].items():
+                self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+            for name, value in timings["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+
+# Create a global results metrics instance
+results_metrics = ResultsMetrics()
+
+
+class JobMetrics:
+    """
+    Run timings of finished jobs, aggregated as the jobs finish
+
+    Jobs run in worker processes and store their timings with the job. The
+    stored timings are read once, when the metrics are first needed; after that
+    the executor adds each job when its worker exits, so a scrape never rereads
+    the timings of every job. Jobs whose worker is still running are left out of
+    that first read, since they are added when the worker exits.
+    """
+
+    def __init__(self):
+        self.durations: Dict[Tuple[str, str], Histogram] = {}
+        self.stage_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        self._running: Set[str] = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _add(self, status: str, timings: Optional[str]):
+        """Add the run timings of one job (a timings column value)"""
+        run = json.loads(timings).get("run") if timings else None
+        if not run:
+            return
+        key = (run.get("job_type", "backtest"), status)
+        self.durations.setdefault(key, Histogram()).observe(run["total_seconds"])
+        for stage, seconds in run["stages"].items():
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        for name, value in run["counters"].items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def load(self):
+        """Aggregate the timings already stored, once"""
+        with self._lock:
+            if self._loaded:
+                return
+            for row in db_engine.get_backtest_job_timings():
+                if row["backtest_id"] not in self._running:
+                    self._add(row["status"], row["timings"])
+            self._loaded = True
+
+    def record_started(self, backtest_id: str):
+        """Note a job whose worker was just started"""
+        with self._lock:
+            self._running.add(backtest_id)
+
+    def record_finished(self, backtest_id: str):
+        """Add a job whose worker has exited (its outcome and timings are already stored)"""
+        with self._lock:
+            self._running.discard(backtest_id)
+            # Until the first load, the load itself picks the job up
+            if not self._loaded:
+                return
+            job = db_engine.get_backtest_job(backtest_id, include_results=False)
+            if job:
+                self._add(job["status"], job["timings"])
+
+
+# Create a global job metrics instance
+job_metrics = JobMetrics()
+
+
+def job_timings(timer: StageTimer, **extra) -> Dict[str, Any]:
+    """Entry stored under one key of a job's timings column (e.g. "run" or "results")"""
+    return {**extra, **timer.as_dict()}
+
+
+def store_job_timings(backtest_id: str, key: str, timer: StageTimer, **extra):
+    """Save a timer under one key of the job's timings column, leaving the other keys alone"""
+    entry = job_timings(timer, **extra)
+    db_engine.save_job_timings(backtest_id, {key: entry})
+    return entry
+
+
+def _metric(lines: List[str], name: str, metric_type: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def render_prometheus_metrics() -> str:
+    """
+    All backtest metrics in the Prometheus text exposition format
+
+    Job metrics are aggregated from the timings stored with each job, since jobs
+    run in worker processes (see JobMetrics); result-read metrics come from this
+    process.
+    """
+    lines: List[str] = []
+    status_counts = db_engine.count_backtest_jobs_by_status()
+
+    _metric(lines, "backtest_queue_depth", "gauge", "Backtest jobs waiting for a worker")
+    lines.append(f"backtest_queue_depth {status_counts.get('PENDING', 0)}")
+
+    _metric(lines, "backtest_jobs", "gauge", "Backtest jobs by status")
+    for status in ("PENDING", "RUNNING", "COMPLETED", "FAILED", "CANCELLED"):
+        lines.append(f'backtest_jobs{{status="{status}"}} {status_counts.get(status, 0)}')
+
+    job_metrics.load()
+    with job_metrics._lock:
+        _metric(lines, "backtest_job_duration_seconds", "histogram", "Run time of finished backtest jobs")
+        for (job_type, status), histogram in sorted(job_metrics.durations.items()):
+            lines.extend(histogram.lines("backtest_job_duration_seconds", f'job_type="{job_type}",status="{status}"'))
+
+        _metric(lines, "backtest_stage_seconds_total", "counter", "Time spent in each stage of backtest jobs")
+        for stage, seconds in sorted(job_metrics.stage_seconds.items()):
+            lines.append(f'backtest_stage_seconds_total{{stage="{stage}"}} {round(seconds, 6)}')
+
+        for name, help_text in (("bars_processed", "Bars run through strategies by backtest jobs"),
+                                ("trades_written", "Trades written to the database by backtest jobs"),
+                                ("bytes_serialized", "Bytes of results and frames stored by backtest jobs"),
+                                ("indicator_cache_hits", "Indicator series served from the indicator cache"),
+                                ("indicator_cache_misses", "Indicator series computed on an indicator cache miss"),
+                                ("indicator_cache_evictions", "Indicator series evicted from the indicator cache"),
+                                ("indicator_disk_hits", "Indicator series read from the bar store's indicator files"),
+                                ("indicator_disk_writes", "Indicator series saved to the bar store's indicator files")):
+            _metric(lines, f"backtest_{name}_total", "counter", help_text)
+            lines.append(f"backtest_{name}_total {job_metrics.counters.get(name, 0)}")
+
+    with results_metrics._lock:
+        _metric(lines, "backtest_results_request_duration_seconds", "histogram",
+                "Time to build and encode backtest result responses")
+        lines.extend(results_metrics.duration.lines("backtest_results_request_duration_seconds"))
+
+        _metric(lines, "backtest_results_stage_seconds_total", "counter",
+                "Time spent in each stage of backtest result responses")
+        for stage, seconds in sorted(results_metrics.stage_seconds.items()):
+            lines.append(f'backtest_results_stage_seconds_total{{stage="{stage}"}} {round(seconds, 6)}')
+
+        _metric(lines, "backtest_results_bytes_serialized_total", "counter", "Bytes of result responses sent")
+        lines.append(f"backtest_results_bytes_serialized_total {results_metrics.counters.get('bytes_serialized', 0)}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Statuses after which a job produces no further events
+TERMINAL_STATUSES = ("COMPLETED", "FAILED", "CANCELLED")
+
+
+class JobEventBus:
+    """
+    In-process publish/subscribe for backtest job events
+
+    Subscribers are asyncio queues owned by a streaming endpoint; publishers may be
+    any thread (the executor's dispatcher and progress threads), so events are
+    handed to each subscriber's event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, backtest_id: str) -> asyncio.Queue:
+        """Register a queue that receives every event of one job (call from the event loop)"""
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(backtest_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, backtest_id: str, queue: asyncio.Queue):
+        """Remove a queue registered with subscribe"""
+        with self._lock:
+            remaining = [(loop, q) for loop, q in self._subscribers.get(backtest_id, []) if q is not queue]
+            if remaining:
+                self._subscribers[backtest_id] = remaining
+            else:
+                self._subscribers.pop(backtest_id, None)
+
+    def publish(self, backtest_id: str, event: Dict[str, Any]):
+        """Deliver an event to all current subscribers of a job"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(backtest_id, []))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # The subscriber's loop is already closed
+                pass
+
+
+# Create a global event bus instance
+job_event_bus = JobEventBus()
+
+# Set inside executor worker processes, where events travel to the server through a queue
+_worker_queue: Optional[Any] = None
+
+
+def set_worker_queue(queue):
+    """Route events published in this process through a multiprocessing queue"""
+    global _worker_queue
+    _worker_queue = queue
+
+
+def publish_job_event(backtest_id: str, job_status: str, stage: Optional[str] = None,
+                      progress: Optional[float] = None, error_message: Optional[str] = None,
+                      queue_position: Optional[int] = None):
+    """
+    Publish a job state transition, progress update or (for PENDING jobs) queue position
+
+    In the server process the event goes straight to the bus; in a worker process
+    it is sent to the executor, which republishes it on the bus.
+    """
+    event = {
+        "backtest_id": backtest_id,
+        "job_status": job_status,
+        "stage": stage,
+        "progress": progress,
+        "error_message": error_message,
+        "queue_position": queue_position
+    }
+    if _worker_queue is not None:
+        _worker_queue.put(event)
+    else:
+        job_event_bus.publish(backtest_id, event)
@@ -0,0 +1,196 @@
+import json
+import logging
+import multiprocessing
+import threading
+from typing import Callable, Dict, Optional
+
+from config import settings
+from database.db_engine import db_engine
+from backtest.job_events import job_event_bus, publish_job_event, set_worker_queue
+from backtest.instrumentation import job_metrics
+
+logger = logging.getLogger(__name__)
+
+# Job handlers take (backtest_id, request_data) and record their own outcome
+JobHandler = Callable[[str, dict], None]
+
+# Workers are started fresh rather than forked: the server process runs several threads
+# (dispatcher, event relay, request threadpool), and a fork taken while one of them holds
+# a lock (bar store, indicator cache, logging) would leave that lock held in the child
+_mp_context = multiprocessing.get_context("spawn")
+
+
+def _run_job(handler: JobHandler, backtest_id: str, request_data: dict, events):
+    """Worker process entry point: send job events to the server, then run the handler"""
+    set_worker_queue(events)
+    handler(backtest_id, request_data)
+
+
+class BacktestExecutor:
+    """
+    Runs queued backtest jobs in a bounded set of worker processes
+
+    The queue is the backtest_jobs table itself: a dispatcher thread claims the
+    oldest PENDING job (PENDING -> RUNNING) whenever a worker slot is free and
+    runs its handler in a separate process, so pandas work never competes with
+    the API for the server process. Each job gets its own process, which lets a
+    running job be cancelled by terminating it.
+    """
+
+    def __init__(self, max_workers: int = settings.EXECUTOR_MAX_WORKERS,
+                 poll_interval: float = settings.EXECUTOR_POLL_INTERVAL):
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, JobHandler] = {}
+        self._running: Dict[str, multiprocessing.Process] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._events = None
+        self._event_relay: Optional[threading.Thread] = None
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the function that runs jobs of a given job_type"""
+        self._handlers[job_type] = handler
+
+    def start(self):
+        """Requeue jobs interrupted by a previous shutdown and start dispatching"""
+        if self._dispatcher and self._dispatcher.is_alive():
+            return
+        db_engine.requeue_running_jobs()
+        self._stopping.clear()
+        
+        # Worker processes report progress through this queue; a thread republishes it
+        self._events = _mp_context.Queue()
+        self._event_relay = threading.Thread(target=self._relay_events, name="backtest-events", daemon=True)
+        self._event_relay.start()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="backtest-dispatcher", daemon=True)
+        self._dispatcher.start()
+        logger.info(f"Backtest executor started with {self.max_workers} worker processes")
+
+    def stop(self):
+        """Stop dispatching and terminate running jobs (they are requeued on the next start)"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._dispatcher:
+            self._dispatcher.join()
+        with self._lock:
+            for process in self._running.values():
+                process.terminate()
+                process.join()
+            self._running.clear()
+        if self._event_relay:
+            self._events.put(None)
+            self._event_relay.join()
+
+    def notify(self):
+        """Wake the dispatcher after a job was queued"""
+        self._wakeup.set()
+
+    def cancel(self, backtest_id: str) -> bool:
+        """
+        Cancel a queued or running job
+        Returns True if the job was cancelled, False if it had already finished
+        """
+        if db_engine.transition_backtest_status(backtest_id, ["PENDING"], "CANCELLED", "Cancelled by user"):
+            publish_job_event(backtest_id, "CANCELLED", error_message="Cancelled by user")
+            self._publish_queue_positions()
+            return True
+
+        with self._lock:
+            process = self._running.pop(backtest_id, None)
+            if process is not None:
+                process.terminate()
+                process.join()
+                job_metrics.record_finished(backtest_id)
+
+        cancelled = db_engine.transition_backtest_status(backtest_id, ["RUNNING"], "CANCELLED", "Cancelled by user")
+        if cancelled:
+            publish_job_event(backtest_id, "CANCELLED", error_message="Cancelled by user")
+        self._wakeup.set()
+        return cancelled
+
+    def queue_position(self, backtest_id: str) -> Optional[int]:
+        """1-based position of a PENDING job in the queue"""
+        return db_engine.get_queue_position(backtest_id)
+
+    def _publish_queue_positions(self):
+        """Tell every waiting job its queue position, after a job left the queue"""
+        for position, backtest_id in enumerate(db_engine.get_pending_job_ids(), start=1):
+            publish_job_event(backtest_id, "PENDING", queue_position=position)
+
+    def _relay_events(self):
+        """Republish events sent by worker processes on the in-process event bus"""
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            job_event_bus.publish(event["backtest_id"], event)
+
+    def _dispatch_loop(self):
+        """Reap finished workers and start queued jobs while slots are free"""
+        while not self._stopping.is_set():
+            try:
+                self._reap_finished()
+                while len(self._running) < self.max_workers and not self._stopping.is_set():
+                    if not self._start_next_job():
+                        break
+            except Exception as e:
+                logger.error(f"Backtest dispatcher error: {e}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _reap_finished(self):
+        """Collect exited worker processes and fail jobs whose worker crashed"""
+        with self._lock:
+            finished = [(backtest_id, process) for backtest_id, process in self._running.items()
+                        if not process.is_alive()]
+            for backtest_id, process in finished:
+                process.join()
+                del self._running[backtest_id]
+                if process.exitcode != 0:
+                    error_message = f"Worker process exited with code {process.exitcode}"
+                    if db_engine.transition_backtest_status(backtest_id, ["RUNNING"], "FAILED", error_message):
+                        publish_job_event(backtest_id, "FAILED", error_message=error_message)
+                job_metrics.record_finished(backtest_id)
+
+    def _start_next_job(self) -> bool:
+        """Claim the oldest PENDING job and start it; False when the queue is empty"""
+        job = db_engine.get_next_pending_job()
+        if job is None:
+            return False
+
+        backtest_id = job["backtest_id"]
+        request_data = json.loads(job["request_params"])
+        job_type = request_data.get("job_type", "backtest")
+        handler = self._handlers.get(job_type)
+
+        # Claim and register the worker under the lock cancel() takes, so a cancel
+        # either wins the claim or finds the started process and terminates it
+        with self._lock:
+            # Another dispatcher (or a cancel) may have taken the job in the meantime
+            if not db_engine.transition_backtest_status(backtest_id, ["PENDING"], "RUNNING"):
+                return True
+
+            if handler is None:
+                error_message = f"Unknown job type '{job_type}'"
+                db_engine.transition_backtest_status(backtest_id, ["RUNNING"], "FAILED", error_message)
+                publish_job_event(backtest_id, "FAILED", error_message=error_message)
+                return True
+
+            process = _mp_context.Process(
+                target=_run_job,
+                args=(handler, backtest_id, request_data, self._events),
+                name=f"backtest-{backtest_id[:8]}"
+            )
+            job_metrics.record_started(backtest_id)
+            process.start()
+            self._running[backtest_id] = process
+        publish_job_event(backtest_id, "RUNNING", stage="started", progress=0.0)
+        self._publish_queue_positions()
+        return True
+
+# Create a global executor instance
+backtest_executor = BacktestExecutor()
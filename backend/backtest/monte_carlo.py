@@ -0,0 +1,162 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Resampling schemes: iid draws with replacement, contiguous blocks with replacement,
+# and random reordering without replacement
+METHODS = ("bootstrap", "block_bootstrap", "shuffle")
+
+# What gets resampled: closed trade P&Ls (added to the capital) or per-bar portfolio returns (compounded)
+SOURCES = ("trades", "returns")
+
+# Upper bound on the number of float64 cells (paths x steps) resampled at once; small
+# enough for the working buffers to stay in cache, which beats one huge matrix
+CHUNK_CELLS = 250_000
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def resample_indices(rng: np.random.Generator, method: str, n_paths: int, n_steps: int,
+                     block_size: int = 20) -> np.ndarray:
+    """
+    Index matrix (n_paths x n_steps) selecting the steps of each resampled path
+
+    Block bootstrap draws random block starts and lays consecutive blocks side
+    by side, keeping the short-range ordering (volatility clustering, trade
+    streaks) that iid draws destroy.
+    """
+    if method == "bootstrap":
+        return rng.integers(0, n_steps, size=(n_paths, n_steps), dtype=np.int32)
+    if method == "block_bootstrap":
+        block_size = max(1, min(block_size, n_steps))
+        n_blocks = -(-n_steps // block_size)
+        starts = rng.integers(0, n_steps - block_size + 1, size=(n_paths, n_blocks), dtype=np.int32)
+        indices = (starts[:, :, None] + np.arange(block_size, dtype=np.int32)).reshape(n_paths, n_blocks * block_size)
+        return indices[:, :n_steps]
+    if method == "shuffle":
+        return rng.permuted(np.broadcast_to(np.arange(n_steps, dtype=np.int32), (n_paths, n_steps)), axis=1)
+    raise ValueError(f"Unknown method '{method}'. Available methods: {', '.join(METHODS)}")
+
+
+def path_statistics(paths: np.ndarray, source: str, initial_capital: float,
+                    work: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Final equity, max drawdown (%) and win rate (%) of every row of a step matrix
+
+    Rows hold trade P&Ls (added to the capital) or log returns (summed, which is
+    compounding without a cumprod). paths is overwritten; work is an optional
+    scratch array of the same shape. The win rate counts positive steps among
+    the non-zero ones (flat bars are neither).
+    """
+    wins = np.count_nonzero(paths > 0, axis=1)
+    decided = np.count_nonzero(paths != 0, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(decided > 0, wins / decided * 100, 0.0)
+
+    # Running total and its running peak; the peak starts at the initial capital (0 offset)
+    np.cumsum(paths, axis=1, out=paths)
+    work = np.maximum.accumulate(paths, axis=1, out=work)
+    np.maximum(work, 0.0, out=work)
+
+    if source == "trades":
+        np.add(paths, initial_capital, out=paths)
+        np.add(work, initial_capital, out=work)
+        final_equity = paths[:, -1].copy()
+        # Lowest equity / peak ratio along the path
+        np.divide(paths, work, out=work)
+        max_drawdown = (1.0 - work.min(axis=1)) * 100
+    else:
+        final_equity = initial_capital * np.exp(paths[:, -1])
+        # Lowest log(equity / peak) along the path
+        np.subtract(paths, work, out=work)
+        max_drawdown = (1.0 - np.exp(work.min(axis=1))) * 100
+
+    return {
+        "final_equity": final_equity,
+        "max_drawdown_pct": max_drawdown,
+        "win_rate_pct": win_rate
+    }
+
+
+def summarize(values: np.ndarray, bins: int) -> Dict[str, Any]:
+    """Percentiles, moments and a histogram of one simulated metric"""
+    lo, hi = float(values.min()), float(values.max())
+    if hi - lo <= 1e-9 * max(1.0, abs(hi)):
+        # Every path has (up to rounding) the same value, e.g. final equity of shuffled trades
+        lo, hi = lo - 0.5, hi + 0.5
+    counts, edges = np.histogram(values, bins=bins, range=(lo, hi))
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        "histogram": {"counts": counts.tolist(), "edges": edges.tolist()}
+    }
+
+
+def run_monte_carlo(steps: np.ndarray,
+                    source: str,
+                    initial_capital: float,
+                    method: str = "bootstrap",
+                    n_paths: int = 10000,
+                    block_size: int = 20,
+                    seed: Optional[int] = None,
+                    bins: int = 50) -> Dict[str, Any]:
+    """
+    Resample a backtest's trade P&Ls or returns into n_paths alternative histories
+
+    Paths are generated and evaluated as whole matrices, a chunk of rows at a
+    time so memory stays bounded for long histories.
+
+    Args:
+        steps: Trade P&Ls or per-bar returns of the original backtest, in order
+        source: "trades" or "returns"
+        method: "bootstrap", "block_bootstrap" or "shuffle"
+
+    Returns:
+        Distribution summary per metric, the original backtest's values and the
+        share of paths that lose money
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source '{source}'. Available sources: {', '.join(SOURCES)}")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Available methods: {', '.join(METHODS)}")
+    steps = np.asarray(steps, dtype=np.float64)
+    n_steps = len(steps)
+    if n_steps == 0:
+        raise ValueError(f"The backtest has no {'closed trades' if source == 'trades' else 'returns'} to resample")
+    if n_paths < 1:
+        raise ValueError("n_paths must be at least 1")
+
+    if source == "returns":
+        with np.errstate(divide="ignore"):
+            steps = np.log1p(steps)
+
+    rng = np.random.default_rng(seed)
+    chunk_paths = min(n_paths, max(1, CHUNK_CELLS // n_steps))
+    # Two buffers reused by every chunk, so no chunk allocates (and page-faults) fresh matrices
+    paths = np.empty((chunk_paths, n_steps))
+    work = np.empty((chunk_paths, n_steps))
+    chunks: Dict[str, List[np.ndarray]] = {"final_equity": [], "max_drawdown_pct": [], "win_rate_pct": []}
+    for start in range(0, n_paths, chunk_paths):
+        rows = min(chunk_paths, n_paths - start)
+        indices = resample_indices(rng, method, rows, n_steps, block_size)
+        # mode="clip" lets take write straight into the buffer (indices are always in range)
+        np.take(steps, indices, out=paths[:rows], mode="clip")
+        for name, values in path_statistics(paths[:rows], source, initial_capital, work[:rows]).items():
+            chunks[name].append(values)
+    simulated = {name: np.concatenate(values) for name, values in chunks.items()}
+
+    original = path_statistics(steps[None, :].copy(), source, initial_capital)
+    return {
+        "method": method,
+        "source": source,
+        "n_paths": n_paths,
+        "n_steps": n_steps,
+        "block_size": block_size if method == "block_bootstrap" else None,
+        "seed": seed,
+        "original": {name: float(values[0]) for name, values in original.items()},
+        "probability_of_loss": float(np.mean(simulated["final_equity"] < initial_capital)),
+        "distributions": {name: summarize(values, bins) for name, values in simulated.items()}
+    }
@@ -0,0 +1,92 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from config import settings
+from data_feed.data_feed import fetch_stock_data
+from strategy.registry import get_strategy, build_strategy_frames
+from strategy.indicator_cache import price_series_key
+from backtest.backtesting_engine import backtest_strategy
+
+logger = logging.getLogger(__name__)
+
+
+def strategy_labels(strategies: List[Dict[str, Any]]) -> List[str]:
+    """Unique label per requested strategy (the name, numbered when a strategy appears twice)"""
+    labels = []
+    for entry in strategies:
+        label = entry.get("label") or entry["strategy_name"].lower()
+        base, n = label, 2
+        while label in labels:
+            label = f"{base}_{n}"
+            n += 1
+        labels.append(label)
+    return labels
+
+
+def run_multi_strategy_backtest(stock_symbol: str,
+                                start_date: str,
+                                end_date: str,
+                                strategies: List[Dict[str, Any]],
+                                initial_capital: float = settings.INITIAL_CAPITAL,
+                                shares_to_buy: int = settings.SHARES_TO_BUY,
+                                backtest_id: Optional[str] = None,
+                                persist_trades: bool = True) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+    """
+    Backtest several strategies against one symbol in a single pass over the data
+
+    Prices are fetched once and every indicator the strategies need is computed
+    once, then each strategy derives its signals and is simulated separately.
+
+    Args:
+        strategies: List of {"strategy_name", "strategy_params", optional "label"}
+
+    Returns:
+        Tuple of (equity_frame, results) where equity_frame has one portfolio value
+        column per strategy label and results holds each strategy's metrics
+    """
+    if not strategies:
+        raise ValueError("At least one strategy is required")
+    # Fail on unknown names before fetching anything
+    for entry in strategies:
+        get_strategy(entry["strategy_name"])
+
+    data = fetch_stock_data(
+        symbol=stock_symbol,
+        start=start_date,
+        end=end_date,
+        data_interval=settings.INTERVAL
+    )
+    if data.empty:
+        raise ValueError(f"No price data for {stock_symbol} between {start_date} and {end_date}")
+
+    frames = build_strategy_frames(
+        data, [(entry["strategy_name"], entry.get("strategy_params") or {}) for entry in strategies],
+        price_series_key(stock_symbol, settings.INTERVAL, start_date, end_date, data)
+    )
+
+    labels = strategy_labels(strategies)
+    equity = {}
+    results = []
+    for label, entry, frame in zip(labels, strategies, frames):
+        strategy_name = entry["strategy_name"].lower()
+        portfolio_values, performance_metrics = backtest_strategy(
+            data=frame,
+            strategy_name=strategy_name,
+            stock_symbol=stock_symbol,
+            initial_capital=initial_capital,
+            shares_to_buy=shares_to_buy,
+            backtest_id=backtest_id,
+            persist_trades=persist_trades
+        )
+        equity[label] = pd.Series(portfolio_values, index=frame.sort_index().index[:len(portfolio_values)])
+        results.append({
+            "label": label,
+            "strategy_name": strategy_name,
+            "strategy_params": get_strategy(strategy_name).params(entry.get("strategy_params")),
+            "bars": len(frame),
+            "performance_metrics": performance_metrics
+        })
+
+    logger.info(f"Multi-strategy backtest: {len(strategies)} strategies on {stock_symbol}, {len(data)} bars, one fetch")
+    return pd.DataFrame(equity).sort_index(), results
@@ -0,0 +1,248 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from config import settings
+from data_feed.data_feed import fetch_stock_data
+from data_feed.bar_store import active_read_log, record_reads
+from database.db_engine import db_engine
+from strategy.registry import get_strategy
+from backtest.backtesting_engine import calculate_performance_metrics
+from backtest.risk_metrics import calculate_risk_metrics
+from backtest.instrumentation import timed_stage, count_event
+
+logger = logging.getLogger(__name__)
+
+
+def load_price_matrix(stock_symbols: List[str], start_date: str, end_date: str,
+                      max_fetch_threads: int = 8) -> pd.DataFrame:
+    """
+    Fetch every symbol and align the closes on the union of their timestamps
+
+    Returns:
+        DataFrame of closes (time x symbol); NaN where a symbol has no bar
+    """
+    # Worker threads don't inherit the caller's context, so the job's read log is handed over
+    read_log = active_read_log()
+
+    def fetch(symbol):
+        with record_reads(read_log):
+            return symbol, fetch_stock_data(
+                symbol=symbol,
+                start=start_date,
+                end=end_date,
+                data_interval=settings.INTERVAL
+            )
+
+    # Fetching is I/O bound, so a few threads hide the network latency
+    with ThreadPoolExecutor(max_workers=max(1, min(max_fetch_threads, len(stock_symbols)))) as pool:
+        frames = dict(pool.map(fetch, stock_symbols))
+
+    missing = [symbol for symbol, data in frames.items() if data.empty]
+    if missing:
+        raise ValueError(f"No price data for: {', '.join(missing)}")
+
+    closes = pd.concat({symbol: frames[symbol]['Close'] for symbol in stock_symbols}, axis=1)
+    return closes.sort_index()
+
+
+def compute_portfolio_positions(strategy_name: str, strategy_params: Dict[str, Any],
+                                closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Position signals for all symbols (time x symbol)
+
+    Each symbol's strategy frame is built by the registered strategy on that
+    symbol's own bars, then aligned on the shared timeline, so indicators and
+    crossovers never land on timestamps where the symbol has no bar. Rows
+    without a signal (gaps, warm-up) are NaN.
+    """
+    spec = get_strategy(strategy_name)
+    positions = {}
+    for symbol in closes.columns:
+        prices = closes[[symbol]].dropna().rename(columns={symbol: 'Close'})
+        frame = spec.signals(prices, strategy_params, None)
+        positions[symbol] = frame['Position'].reindex(closes.index)
+    return pd.DataFrame(positions, index=closes.index, columns=closes.columns)
+
+
+def simulate_portfolio(closes: np.ndarray,
+                       positions: np.ndarray,
+                       tradable: np.ndarray,
+                       initial_capital: float,
+                       shares_to_buy: int) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+    """
+    Long/flat simulation of many symbols sharing one cash balance
+
+    Only bars that carry a signal are visited; on those bars sells are filled
+    before buys so freed cash can be reused, and buys are filled in symbol order
+    as long as the cash covers them. Cash and holdings on all other bars are
+    filled in with array operations.
+
+    Args:
+        closes: Close prices (time x symbol), forward-filled
+        positions: Position signals (time x symbol), 1 for buy, -1 for sell
+        tradable: True where the symbol has an actual bar
+        initial_capital: Starting capital shared by all symbols
+        shares_to_buy: Number of shares to buy per buy signal
+
+    Returns:
+        Tuple of (portfolio_values, trades) where each trade is
+        (symbol_index, entry_bar, exit_bar) and exit_bar is -1 while still open
+    """
+    n_bars, n_symbols = closes.shape
+    buys = (positions == 1) & tradable
+    sells = (positions == -1) & tradable
+
+    cash_after = np.full(n_bars, np.nan)
+    share_delta = np.zeros((n_bars, n_symbols), dtype=np.int64)
+    holding = np.zeros(n_symbols, dtype=bool)
+    open_entry = np.full(n_symbols, -1, dtype=np.int64)
+    trades = []
+    cash = initial_capital
+
+    for t in np.flatnonzero((buys | sells).any(axis=1)):
+        prices = closes[t]
+
+        to_sell = np.flatnonzero(sells[t] & holding)
+        if len(to_sell):
+            cash += float(np.sum(shares_to_buy * prices[to_sell]))
+            share_delta[t, to_sell] = -shares_to_buy
+            holding[to_sell] = False
+            for s in to_sell:
+                trades.append((int(s), int(open_entry[s]), int(t)))
+                open_entry[s] = -1
+
+        for s in np.flatnonzero(buys[t] & ~holding):
+            cost = shares_to_buy * prices[s]
+            if cash >= cost:
+                cash -= cost
+                share_delta[t, s] = shares_to_buy
+                holding[s] = True
+                open_entry[s] = t
+
+        cash_after[t] = cash
+
+    # Positions still open at the end of the run
+    for s in np.flatnonzero(holding):
+        trades.append((int(s), int(open_entry[s]), -1))
+
+    cash_series = pd.Series(cash_after).ffill().fillna(initial_capital).to_numpy()
+    shares_held = np.cumsum(share_delta, axis=0)
+    holdings_value = np.where(shares_held > 0, shares_held * np.nan_to_num(closes), 0.0).sum(axis=1)
+    return cash_series + holdings_value, trades
+
+
+def run_portfolio_backtest(stock_symbols: List[str],
+                           start_date: str,
+                           end_date: str,
+                           strategy_name: str,
+                           strategy_params: Dict[str, Any],
+                           initial_capital: float = settings.INITIAL_CAPITAL,
+                           shares_to_buy: int = settings.SHARES_TO_BUY,
+                           backtest_id: Optional[str] = None,
+                           persist_trades: bool = True) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Backtest one strategy over a universe of symbols with shared capital
+
+    Returns:
+        Tuple of (equity_frame, results) where equity_frame holds the portfolio
+        value per bar and results holds the aggregate and per-symbol metrics
+    """
+    strategy_name = strategy_name.lower()
+    symbols = list(dict.fromkeys(symbol.upper() for symbol in stock_symbols))
+    if not symbols:
+        raise ValueError("At least one stock symbol is required")
+
+    closes = load_price_matrix(symbols, start_date, end_date)
+    positions = compute_portfolio_positions(strategy_name, strategy_params, closes)
+
+    close_matrix = closes.ffill().to_numpy(dtype=np.float64)
+    portfolio_values, trades = simulate_portfolio(
+        close_matrix,
+        positions.to_numpy(),
+        closes.notna().to_numpy(),
+        initial_capital,
+        shares_to_buy
+    )
+
+    # Build trade rows and per-symbol statistics
+    index = closes.index
+    trade_rows = []
+    symbol_stats = {symbol: {"total_trades": 0, "winning_trades": 0, "realized_pnl": 0.0, "open_position": False}
+                    for symbol in symbols}
+    trades = sorted(trades, key=lambda trade: (trade[1], trade[0]))
+    for s, entry, exit_ in trades:
+        symbol = symbols[s]
+        stats = symbol_stats[symbol]
+        stats["total_trades"] += 1
+        row = {
+            "strategy_name": strategy_name,
+            "stock_symbol": symbol,
+            "trade_type": "buy",
+            "quantity": shares_to_buy,
+            "entry_price": close_matrix[entry, s],
+            "entry_timestamp": str(index[entry])[:19],
+            "exit_price": None,
+            "exit_timestamp": None,
+            "pnl": 0.0,
+            "days_held": 0,
+            "backtest_id": backtest_id
+        }
+        if exit_ >= 0:
+            pnl = (close_matrix[exit_, s] - close_matrix[entry, s]) * shares_to_buy
+            row["exit_price"] = close_matrix[exit_, s]
+            row["exit_timestamp"] = str(index[exit_])[:19]
+            row["pnl"] = pnl
+            row["days_held"] = (index[exit_] - index[entry]).days
+            stats["realized_pnl"] += float(pnl)
+            if pnl > 0:
+                stats["winning_trades"] += 1
+        else:
+            stats["open_position"] = True
+        trade_rows.append(row)
+
+    if persist_trades:
+        with timed_stage("trade_writes"):
+            db_engine.insert_trades(trade_rows)
+        count_event("trades_written", len(trade_rows))
+
+    symbol_metrics = []
+    for symbol, stats in symbol_stats.items():
+        total = stats["total_trades"]
+        symbol_metrics.append({
+            "stock_symbol": symbol,
+            "total_trades": total,
+            "winning_trades": stats["winning_trades"],
+            "losing_trades": total - stats["winning_trades"],
+            "win_rate_pct": round(stats["winning_trades"] / total * 100, 2) if total > 0 else 0,
+            "realized_pnl": round(stats["realized_pnl"], 2),
+            "open_position": stats["open_position"]
+        })
+
+    total_trades = sum(stats["total_trades"] for stats in symbol_stats.values())
+    winning_trades = sum(stats["winning_trades"] for stats in symbol_stats.values())
+    performance_metrics = {
+        'timeframe_start': str(index[0])[:10],
+        'timeframe_end': str(index[-1])[:10],
+        **calculate_performance_metrics(portfolio_values, total_trades, winning_trades, initial_capital),
+        # Exposure counts the bars where any symbol is held
+        **calculate_risk_metrics(
+            portfolio_values, index, initial_capital,
+            entry_bars=np.array([entry for _, entry, _ in trades], dtype=np.int64),
+            exit_bars=np.array([exit_ for _, _, exit_ in trades], dtype=np.int64),
+            pnl=np.array([row["pnl"] for row in trade_rows], dtype=np.float64)
+        ),
+        'strategy_name': strategy_name,
+        'stock_symbols': symbols
+    }
+    performance_metrics['final_portfolio_value'] = float(performance_metrics['final_portfolio_value'])
+
+    equity_frame = pd.DataFrame({"Portfolio_Value": portfolio_values}, index=index)
+    logger.info(f"Portfolio backtest: {len(symbols)} symbols, {len(index)} bars, {total_trades} trades")
+
+    return equity_frame, {
+        "performance_metrics": performance_metrics,
+        "symbol_metrics": symbol_metrics
+    }
@@ -0,0 +1,248 @@
+import argparse
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from config import settings
+from data_feed.bar_store import bar_store
+from data_feed.synthetic import generate_bars
+from database.db_engine import db_engine
+from strategy.registry import get_strategy
+from backtest.backtesting_engine import _trade_record, calculate_performance_metrics
+
+# Data sources a replay can read bars from
+REPLAY_SOURCES = ("csv", "store", "synthetic")
+
+
+def create_strategy_stream(strategy_name: str, strategy_params: Dict[str, Any]):
+    """Bar-by-bar strategy object for a strategy name and its parameters"""
+    return get_strategy(strategy_name).stream(strategy_params)
+
+
+def load_replay_bars(source: str,
+                     stock_symbol: str = settings.STOCK_SYMBOL,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     csv_path: Optional[str] = None,
+                     n_bars: int = 10_000,
+                     seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load the bars to replay from a local source, never from the network
+
+    Args:
+        source: "csv" (a file saved by fetch_stock_data), "store" (the local bar
+                store) or "synthetic" (generated random-walk bars)
+        csv_path: Path of the CSV file for the "csv" source
+        n_bars, seed: Size and random seed of a synthetic series
+    """
+    if source == "csv":
+        if not csv_path:
+            raise ValueError("A CSV path is required for the csv source")
+        data = pd.read_csv(csv_path, index_col=0)
+        data.index = pd.to_datetime(data.index, utc=True)
+        if start_date:
+            data = data[data.index >= pd.Timestamp(start_date, tz="UTC")]
+        if end_date:
+            data = data[data.index < pd.Timestamp(end_date, tz="UTC")]
+    elif source == "store":
+        data = bar_store.load(stock_symbol, settings.INTERVAL, start_date, end_date)
+    elif source == "synthetic":
+        data = generate_bars(n_bars, start=start_date or settings.START_DATE, seed=seed)
+    else:
+        raise ValueError(f"Unknown replay source '{source}'. Available sources: {', '.join(REPLAY_SOURCES)}")
+
+    if data.empty:
+        raise ValueError(f"No bars to replay from the {source} source")
+    return data.sort_index()
+
+
+class ReplaySession:
+    """
+    Paper-trading session that receives bars one event at a time
+
+    Each bar goes through the strategy's streaming state and a long/flat paper
+    broker with the same rules as the backtest engine. Closed trades are written
+    to the trades table with the session id as backtest_id, in batches of
+    flush_every. The time from receiving a bar to the trading decision is
+    measured for every bar.
+    """
+
+    def __init__(self,
+                 strategy_name: str,
+                 strategy_params: Dict[str, Any],
+                 stock_symbol: str,
+                 initial_capital: float = settings.INITIAL_CAPITAL,
+                 shares_to_buy: int = settings.SHARES_TO_BUY,
+                 session_id: Optional[str] = None,
+                 record_trades: bool = True,
+                 flush_every: int = 100):
+        self.strategy_name = strategy_name.lower()
+        self.stock_symbol = stock_symbol
+        self.initial_capital = initial_capital
+        self.shares_to_buy = shares_to_buy
+        self.session_id = session_id or str(uuid.uuid4())
+        self.record_trades = record_trades
+        self.flush_every = max(1, flush_every)
+        self.stream = create_strategy_stream(self.strategy_name, strategy_params)
+
+        self.cash = initial_capital
+        self.shares_held = 0
+        self.open_trade: Optional[Dict[str, Any]] = None
+        self.entry_date = None
+        self.trades: List[Dict[str, Any]] = []
+        self._unsaved_trades: List[Dict[str, Any]] = []
+        self.portfolio_values: List[float] = []
+        self.latencies_ns: List[int] = []
+
+    def on_bar(self, timestamp, close: float) -> Optional[str]:
+        """
+        Process one bar and return the fill it caused ("buy", "sell" or None)
+        """
+        started = time.perf_counter_ns()
+        position = self.stream.update(close)['Position']
+
+        fill = None
+        if position == 1 and self.shares_held == 0:
+            cost = self.shares_to_buy * close
+            if self.cash >= cost:
+                self.cash -= cost
+                self.shares_held = self.shares_to_buy
+                self.entry_date = timestamp
+                self.open_trade = _trade_record(self.strategy_name, self.stock_symbol, self.shares_to_buy,
+                                                self.session_id, entry_price=close,
+                                                entry_timestamp=str(timestamp)[:19])
+                fill = "buy"
+        elif position == -1 and self.shares_held > 0:
+            self.cash += self.shares_held * close
+            self.open_trade["exit_price"] = close
+            self.open_trade["exit_timestamp"] = str(timestamp)[:19]
+            self.open_trade["pnl"] = (close - self.open_trade["entry_price"]) * self.shares_held
+            self.open_trade["days_held"] = (pd.to_datetime(timestamp) - pd.to_datetime(self.entry_date)).days
+            self.shares_held = 0
+            fill = "sell"
+        self.latencies_ns.append(time.perf_counter_ns() - started)
+
+        self.portfolio_values.append(self.cash + self.shares_held * close)
+
+        # The closed trade is recorded after the decision, outside the measured latency
+        if fill == "sell":
+            self._record(self.open_trade)
+            self.open_trade = None
+            self.entry_date = None
+        return fill
+
+    def run(self, data: pd.DataFrame, speed: float = 0.0) -> Dict[str, Any]:
+        """
+        Replay a frame of bars through the session
+
+        Args:
+            data: Bars to replay, oldest first
+            speed: Bars per second to emit; 0 replays as fast as possible
+
+        Returns:
+            Session report (see report)
+        """
+        interval = 1.0 / speed if speed > 0 else 0.0
+        closes = data['Close'].to_numpy(dtype=float)
+        timestamps = data.index
+
+        started = time.perf_counter()
+        next_due = started
+        for timestamp, close in zip(timestamps, closes):
+            if interval:
+                # Pace against a schedule so sleep overshoot does not accumulate
+                delay = next_due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_due += interval
+            self.on_bar(timestamp, close)
+        elapsed = time.perf_counter() - started
+
+        self.finish()
+        return self.report(elapsed)
+
+    def _record(self, trade: Dict[str, Any]):
+        """Keep a finished trade and write pending trades once a batch is full"""
+        self.trades.append(trade)
+        if not self.record_trades:
+            return
+        self._unsaved_trades.append(trade)
+        if len(self._unsaved_trades) >= self.flush_every:
+            db_engine.insert_trades(self._unsaved_trades)
+            self._unsaved_trades = []
+
+    def finish(self):
+        """Record a position that is still open when the replay ends and write pending trades"""
+        if self.open_trade is not None:
+            self._record(self.open_trade)
+            self.open_trade = None
+        if self._unsaved_trades:
+            db_engine.insert_trades(self._unsaved_trades)
+            self._unsaved_trades = []
+
+    def report(self, elapsed_seconds: float) -> Dict[str, Any]:
+        """Trading results, decision latency percentiles and throughput of the session"""
+        bars = len(self.latencies_ns)
+        latencies_us = np.asarray(self.latencies_ns, dtype=np.float64) / 1000.0
+        closed = [trade for trade in self.trades if trade["exit_price"] is not None]
+        winning_trades = sum(1 for trade in closed if trade["pnl"] > 0)
+
+        performance_metrics = calculate_performance_metrics(
+            self.portfolio_values, len(self.trades), winning_trades, self.initial_capital
+        ) if bars else {}
+        if bars:
+            performance_metrics['final_portfolio_value'] = float(performance_metrics['final_portfolio_value'])
+
+        return {
+            "session_id": self.session_id,
+            "strategy_name": self.strategy_name,
+            "stock_symbol": self.stock_symbol,
+            "bars": bars,
+            "elapsed_seconds": round(elapsed_seconds, 4),
+            "bars_per_second": round(bars / elapsed_seconds, 1) if elapsed_seconds > 0 else None,
+            "latency_us": {
+                "mean": round(float(latencies_us.mean()), 2),
+                "p50": round(float(np.percentile(latencies_us, 50)), 2),
+                "p95": round(float(np.percentile(latencies_us, 95)), 2),
+                "p99": round(float(np.percentile(latencies_us, 99)), 2),
+                "max": round(float(latencies_us.max()), 2)
+            } if bars else None,
+            "performance_metrics": performance_metrics
+        }
+
+
+def main():
+    """Command line entry point: python -m backtest.replay --source synthetic --bars 100000"""
+    parser = argparse.ArgumentParser(description="Replay bars through a strategy as a paper-trading session")
+    parser.add_argument("--source", choices=REPLAY_SOURCES, default="synthetic")
+    parser.add_argument("--csv", dest="csv_path", help="CSV file for the csv source")
+    parser.add_argument("--symbol", default=settings.STOCK_SYMBOL)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--bars", type=int, default=10_000, help="Number of synthetic bars")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--strategy", default=settings.STRATEGY_NAME)
+    parser.add_argument("--params", default="{}", help='Strategy parameters as JSON, e.g. \'{"short_window": 10}\'')
+    parser.add_argument("--capital", type=float, default=settings.INITIAL_CAPITAL)
+    parser.add_argument("--speed", type=float, default=0.0, help="Bars per second, 0 for as fast as possible")
+    parser.add_argument("--no-record", action="store_true", help="Do not write fills to the trades table")
+    args = parser.parse_args()
+
+    data = load_replay_bars(args.source, args.symbol, args.start, args.end,
+                            csv_path=args.csv_path, n_bars=args.bars, seed=args.seed)
+    session = ReplaySession(
+        strategy_name=args.strategy,
+        strategy_params=json.loads(args.params),
+        stock_symbol=args.symbol,
+        initial_capital=args.capital,
+        record_trades=not args.no_record
+    )
+    print(f"Replaying {len(data)} bars of {args.symbol} ({args.source}) as session {session.session_id}")
+    print(json.dumps(session.run(data, speed=args.speed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
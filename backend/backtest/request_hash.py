@@ -0,0 +1,111 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from data_feed.bar_store import bar_store, ReadLog
+from strategy.registry import get_strategy
+
+# Request fields that change what a job computes, per job type (persist_trades is
+# included because a run without stored trades cannot stand in for one with them)
+HASHED_FIELDS = {
+    "backtest": ("stock_symbol", "start_date", "end_date", "initial_capital",
+                 "strategy_name", "strategy_params", "persist_trades"),
+    "portfolio": ("stock_symbols", "start_date", "end_date", "initial_capital",
+                  "strategy_name", "strategy_params", "persist_trades"),
+    "multi_strategy": ("stock_symbol", "start_date", "end_date", "initial_capital",
+                       "strategies", "persist_trades"),
+    "walk_forward": ("stock_symbol", "start_date", "end_date", "initial_capital", "strategy_name",
+                     "param_grid", "train_bars", "test_bars", "step_bars", "anchored", "rank_by"),
+    "sweep": ("stock_symbol", "start_date", "end_date", "initial_capital", "strategy_name",
+              "param_grid", "rank_by", "top_n"),
+}
+
+
+def _normalize(value: Any) -> Any:
+    """Make equal values encode the same way (2.0 and 2, nested dict key order)"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def canonical_request(job_type: str, request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parts of a job request that determine its results, in a normal form
+
+    Strategy names are lower-cased and their parameters reduced to the ones the
+    strategy reads, with defaults filled in, so requests that only differ in
+    unused or defaulted parameters map to the same form.
+    """
+    canonical = {field: request_data.get(field) for field in HASHED_FIELDS[job_type]}
+    if "strategy_name" in canonical:
+        spec = get_strategy(canonical["strategy_name"])
+        canonical["strategy_name"] = spec.name
+        if "strategy_params" in canonical:
+            canonical["strategy_params"] = spec.params(canonical["strategy_params"])
+    if "stock_symbol" in canonical:
+        canonical["stock_symbol"] = canonical["stock_symbol"].upper()
+    if "stock_symbols" in canonical:
+        canonical["stock_symbols"] = [symbol.upper() for symbol in canonical["stock_symbols"]]
+    if "strategies" in canonical:
+        canonical["strategies"] = [
+            {
+                "strategy_name": get_strategy(entry["strategy_name"]).name,
+                "strategy_params": get_strategy(entry["strategy_name"]).params(entry.get("strategy_params")),
+                "label": entry.get("label")
+            }
+            for entry in canonical["strategies"]
+        ]
+
+    # Server-side settings the results also depend on
+    canonical["job_type"] = job_type
+    canonical["interval"] = settings.INTERVAL
+    canonical["shares_to_buy"] = settings.SHARES_TO_BUY
+    return _normalize(canonical)
+
+
+def request_params_hash(job_type: str, request_data: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical request, identical for requests with identical results"""
+    encoded = json.dumps(canonical_request(job_type, request_data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def request_data_version(symbols: List[str], start_date: str, end_date: str) -> Optional[str]:
+    """
+    Bar store versions of the bars a request will read, e.g. "AAPL:3,MSFT:1"
+
+    None when any symbol's date range is not fully stored yet: the job will
+    download bars, so there is no fixed data version its results belong to.
+    """
+    if not settings.USE_DATA_STORE:
+        return None
+    versions = []
+    for symbol in sorted({symbol.upper() for symbol in symbols}):
+        if bar_store.missing_ranges(symbol, settings.INTERVAL, start_date, end_date):
+            return None
+        meta = bar_store.read_meta(symbol, settings.INTERVAL)
+        if not meta:
+            return None
+        versions.append(f"{symbol}:{meta['version']}")
+    return ",".join(versions)
+
+
+def read_data_version(read_log: ReadLog, symbols: List[str]) -> Optional[str]:
+    """
+    Bar store versions a finished job actually read, in the request_data_version format
+
+    A symbol read from more than one version (rewritten while the job ran) is
+    recorded as e.g. "AAPL:3+4", which no request version matches. None when
+    any symbol was not read from the store at all.
+    """
+    versions = []
+    for symbol in sorted({symbol.upper() for symbol in symbols}):
+        read = read_log.versions.get((symbol, settings.INTERVAL))
+        if not read:
+            return None
+        versions.append(f"{symbol}:{'+'.join(str(version) for version in sorted(read))}")
+    return ",".join(versions)
@@ -0,0 +1,103 @@
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Bars per year assumed when the equity curve spans no time (a single timestamp)
+DEFAULT_PERIODS_PER_YEAR = 252
+
+RISK_METRIC_NAMES = (
+    "sharpe_ratio", "sortino_ratio", "cagr_pct", "max_drawdown_pct",
+    "max_drawdown_duration_days", "max_drawdown_duration_bars", "exposure_pct",
+    "profit_factor", "avg_trade_duration_days", "avg_trade_duration_bars"
+)
+
+
+def _finite(value, digits: int = 4) -> Optional[float]:
+    """Round a metric, turning NaN/inf (undefined ratios) into None so it stays valid JSON and SQL"""
+    if value is None or not math.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def calculate_risk_metrics(portfolio_values,
+                           dates,
+                           initial_capital: float,
+                           entry_bars: Optional[np.ndarray] = None,
+                           exit_bars: Optional[np.ndarray] = None,
+                           pnl: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Risk and trade statistics of an equity curve, computed on whole arrays
+
+    Returns are taken bar to bar starting from the initial capital and annualized
+    with the number of bars per year actually in the data, so any interval works.
+    Sharpe and Sortino assume a zero risk-free rate. Undefined ratios (no
+    volatility, no losing trades) are None.
+
+    Args:
+        portfolio_values: Portfolio value per bar
+        dates: Timestamp per bar
+        entry_bars: Bar position of each trade's entry (optional)
+        exit_bars: Bar position of each trade's exit, -1 while still open (optional)
+        pnl: P&L of each trade, ignored for open trades (optional)
+
+    Returns:
+        Dict with the names in RISK_METRIC_NAMES; the trade-based ones are None
+        when no trade arrays are given
+    """
+    metrics: Dict[str, Any] = {name: None for name in RISK_METRIC_NAMES}
+    values = np.asarray(portfolio_values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return metrics
+
+    # Equity including the starting point, which sits on the first bar's timestamp
+    equity = np.concatenate(([initial_capital], values))
+    stamps = pd.DatetimeIndex(dates[:n]).asi8
+    stamps = np.concatenate((stamps[:1], stamps))
+    years = (stamps[-1] - stamps[0]) / 1e9 / 86400 / 365.25
+
+    returns = equity[1:] / equity[:-1] - 1.0
+    periods_per_year = n / years if years > 0 else DEFAULT_PERIODS_PER_YEAR
+    mean_return = returns.mean()
+    volatility = returns.std(ddof=1) if n > 1 else 0.0
+    downside = math.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["sharpe_ratio"] = _finite(mean_return / volatility * math.sqrt(periods_per_year)) if volatility > 0 else None
+        metrics["sortino_ratio"] = _finite(mean_return / downside * math.sqrt(periods_per_year)) if downside > 0 else None
+    if years > 0 and equity[-1] > 0:
+        metrics["cagr_pct"] = _finite(((equity[-1] / initial_capital) ** (1.0 / years) - 1.0) * 100)
+
+    # Drawdown depth, and the longest time spent below a previous peak (still open at the end counts)
+    peaks = np.maximum.accumulate(equity)
+    metrics["max_drawdown_pct"] = _finite(((peaks - equity) / peaks).max() * 100)
+    positions = np.arange(len(equity))
+    last_peak = np.maximum.accumulate(np.where(equity >= peaks, positions, 0))
+    metrics["max_drawdown_duration_bars"] = int((positions - last_peak).max())
+    metrics["max_drawdown_duration_days"] = _finite((stamps - stamps[last_peak]).max() / 1e9 / 86400, 2)
+
+    if entry_bars is None or exit_bars is None:
+        return metrics
+
+    entry_bars = np.asarray(entry_bars, dtype=np.int64)
+    exit_bars = np.asarray(exit_bars, dtype=np.int64)
+    closed = exit_bars >= 0
+
+    # A position is held from the entry bar's close until the exit bar's close
+    held = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(held, entry_bars, 1)
+    np.add.at(held, np.where(closed, exit_bars, n), -1)
+    metrics["exposure_pct"] = _finite(np.count_nonzero(np.cumsum(held[:n]) > 0) / n * 100, 2)
+
+    if np.any(closed):
+        closed_pnl = np.asarray(pnl, dtype=np.float64)[closed] if pnl is not None else np.empty(0)
+        gross_loss = -closed_pnl[closed_pnl < 0].sum()
+        if gross_loss > 0:
+            metrics["profit_factor"] = _finite(closed_pnl[closed_pnl > 0].sum() / gross_loss)
+        bar_stamps = stamps[1:]
+        metrics["avg_trade_duration_bars"] = _finite((exit_bars[closed] - entry_bars[closed]).mean(), 2)
+        metrics["avg_trade_duration_days"] = _finite(
+            (bar_stamps[exit_bars[closed]] - bar_stamps[entry_bars[closed]]).mean() / 1e9 / 86400, 2
+        )
+    return metrics
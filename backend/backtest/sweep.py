@@ -0,0 +1,207 @@
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from config import settings
+from data_feed.data_feed import fetch_stock_data
+from strategy.registry import STRATEGIES, compute_indicators
+from strategy.indicator_cache import price_series_key
+from backtest.backtesting_engine import simulate_long_flat, calculate_performance_metrics
+
+logger = logging.getLogger(__name__)
+
+# Strategies with array-based signal functions below; their parameters and defaults come from the registry
+SWEEP_PARAMETERS = {name: STRATEGIES[name].defaults for name in ("ma_crossover", "bollinger_bands")}
+
+# Shared inputs of the worker processes, set once per process by _init_worker
+_sweep_state: Dict[str, Any] = {}
+
+
+def _init_worker(state: Dict[str, Any]):
+    """Receive the price arrays and precomputed indicators once per worker process"""
+    global _sweep_state
+    _sweep_state = state
+
+
+def pool_workers(tasks: int, max_workers: Optional[int] = None) -> int:
+    """
+    Worker processes for a sweep or walk-forward pool of the given number of tasks
+
+    Each executor worker may run such a pool at the same time, so by default the
+    CPU cores are shared out between them instead of every pool taking all cores.
+    """
+    workers = max_workers or settings.SWEEP_MAX_WORKERS or (os.cpu_count() or 1) // settings.EXECUTOR_MAX_WORKERS
+    return max(1, min(workers, tasks))
+
+
+def build_combinations(strategy_name: str, param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Expand a parameter grid into the list of parameter sets to evaluate"""
+    if strategy_name not in SWEEP_PARAMETERS:
+        raise ValueError(f"Strategy '{strategy_name}' cannot be swept. Available strategies: {', '.join(SWEEP_PARAMETERS)}")
+
+    defaults = SWEEP_PARAMETERS[strategy_name]
+    unknown = set(param_grid) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown parameters for {strategy_name}: {', '.join(sorted(unknown))}")
+
+    names = list(defaults)
+    values = [list(param_grid.get(name, [defaults[name]])) for name in names]
+    combinations = [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+    if strategy_name == "ma_crossover":
+        # A short EMA that is not shorter than the long one is not a crossover setup
+        combinations = [c for c in combinations if int(c["short_window"]) < int(c["long_window"])]
+    return combinations
+
+
+def compute_shared_indicators(strategy_name: str, close: pd.Series,
+                              combinations: List[Dict[str, Any]],
+                              series_key: Optional[Tuple] = None) -> Dict[Any, Any]:
+    """Compute every distinct EMA span or rolling window once for the whole grid"""
+    spec = STRATEGIES[strategy_name]
+    keys = {key for combination in combinations for key in spec.indicators(combination)}
+    return {key: series.to_numpy() for key, series in compute_indicators(close, keys, series_key).items()}
+
+
+def _signal_diff(signal: np.ndarray) -> np.ndarray:
+    """Same as Series.diff(): NaN on the first bar, then the bar-to-bar change"""
+    position = np.empty(len(signal), dtype=np.float64)
+    position[:1] = np.nan
+    position[1:] = np.diff(signal)
+    return position
+
+
+def _ma_crossover_positions(params: Dict[str, Any], indicators: Dict[Any, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Position signals and valid-row mask matching ma_crossover_strategy"""
+    ema_short = indicators[("ema", int(params["short_window"]))]
+    ema_long = indicators[("ema", int(params["long_window"]))]
+    position = _signal_diff((ema_short > ema_long).astype(np.float64))
+    return position, ~np.isnan(position)
+
+
+def _bollinger_positions(params: Dict[str, Any], indicators: Dict[Any, Any],
+                         close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Position signals and valid-row mask matching bollinger_bands_strategy"""
+    window = int(params["window"])
+    sma = indicators[("sma", window)]
+    std = indicators[("std", window)]
+    upper = sma + (std * params["std_dev"])
+    lower = sma - (std * params["std_dev"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_b = (close - lower) / (upper - lower)
+
+    signal = np.zeros(len(close), dtype=np.float64)
+    signal[close <= lower] = 1
+    signal[close >= upper] = -1
+    position = _signal_diff(signal)
+
+    # The strategy drops every row with a NaN indicator (including 0/0 in %B)
+    valid = ~(np.isnan(sma) | np.isnan(std) | np.isnan(percent_b) | np.isnan(position))
+    return position, valid
+
+
+def simulate_params(state: Dict[str, Any], params: Dict[str, Any],
+                    start: int = 0, stop: Optional[int] = None) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+    """
+    Simulate one parameter set on bars [start, stop) of the shared state
+
+    The indicators cover the whole series, so a slice starts with warmed-up
+    values; the simulation itself starts flat with the initial capital.
+
+    Returns:
+        Tuple of (params and metrics row, portfolio values, bar positions of the values)
+    """
+    close = state["close"]
+    if state["strategy_name"] == "ma_crossover":
+        position, valid = _ma_crossover_positions(params, state["indicators"])
+    else:
+        position, valid = _bollinger_positions(params, state["indicators"], close)
+    valid &= state["row_valid"]
+
+    bars = np.flatnonzero(valid[start:stop]) + start
+    run_close = close[bars]
+    portfolio_values, entries, exits = simulate_long_flat(
+        run_close, position[bars], state["initial_capital"], state["shares_to_buy"]
+    )
+    closed = exits >= 0
+    pnl = (run_close[exits[closed]] - run_close[entries[closed]]) * state["shares_to_buy"]
+
+    metrics = calculate_performance_metrics(
+        portfolio_values, len(entries), int(np.count_nonzero(pnl > 0)), state["initial_capital"]
+    )
+    metrics["final_portfolio_value"] = float(metrics["final_portfolio_value"])
+    return {**params, **metrics, "bars": int(len(run_close))}, portfolio_values, bars
+
+
+def _evaluate_combinations(combinations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Simulate a chunk of parameter sets against the shared worker state"""
+    return [simulate_params(_sweep_state, params)[0] for params in combinations]
+
+
+def run_parameter_sweep(strategy_name: str,
+                        param_grid: Dict[str, List[Any]],
+                        stock_symbol: str,
+                        start_date: str,
+                        end_date: str,
+                        initial_capital: float = settings.INITIAL_CAPITAL,
+                        shares_to_buy: int = settings.SHARES_TO_BUY,
+                        rank_by: str = "total_return_pct",
+                        max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Evaluate every parameter combination of a strategy and rank the results
+
+    Prices are fetched once and each distinct indicator series is computed once,
+    then the combinations are split across worker processes that only derive
+    signals and simulate.
+
+    Returns:
+        List of parameter/metric rows sorted by rank_by (best first)
+    """
+    strategy_name = strategy_name.lower()
+    combinations = build_combinations(strategy_name, param_grid)
+    if not combinations:
+        return []
+
+    data = fetch_stock_data(
+        symbol=stock_symbol,
+        start=start_date,
+        end=end_date,
+        data_interval=settings.INTERVAL
+    )
+    if data.empty:
+        raise ValueError(f"No price data for {stock_symbol} between {start_date} and {end_date}")
+    series_key = price_series_key(stock_symbol, settings.INTERVAL, start_date, end_date, data)
+    data = data.sort_index()
+
+    state = {
+        "strategy_name": strategy_name,
+        "close": data['Close'].to_numpy(dtype=np.float64),
+        "row_valid": data.notna().all(axis=1).to_numpy(),
+        "indicators": compute_shared_indicators(strategy_name, data['Close'], combinations, series_key),
+        "initial_capital": initial_capital,
+        "shares_to_buy": shares_to_buy,
+    }
+
+    workers = pool_workers(len(combinations), max_workers)
+    logger.info(f"Parameter sweep: {len(combinations)} combinations of {strategy_name} on {stock_symbol}, {workers} workers")
+
+    if workers == 1:
+        _init_worker(state)
+        results = _evaluate_combinations(combinations)
+    else:
+        # A few chunks per worker keeps the pool busy without per-combination overhead
+        chunk_size = max(1, len(combinations) // (workers * 4))
+        chunks = [combinations[i:i + chunk_size] for i in range(0, len(combinations), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as pool:
+            results = [row for chunk in pool.map(_evaluate_combinations, chunks) for row in chunk]
+
+    if results and rank_by not in results[0]:
+        raise ValueError(f"Cannot rank by '{rank_by}'. Available fields: {', '.join(results[0])}")
+    results.sort(key=lambda row: row[rank_by], reverse=True)
+    for rank, row in enumerate(results, start=1):
+        row["rank"] = rank
+    return results
@@ -0,0 +1,209 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from config import settings
+from data_feed.data_feed import fetch_stock_data
+from strategy.indicator_cache import price_series_key
+from backtest import sweep
+from backtest.sweep import build_combinations, compute_shared_indicators, simulate_params
+from backtest.backtesting_engine import calculate_performance_metrics
+from backtest.risk_metrics import calculate_risk_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def build_folds(n_bars: int, train_bars: int, test_bars: int,
+                step_bars: Optional[int] = None, anchored: bool = False) -> List[Dict[str, int]]:
+    """
+    Split bar positions into consecutive train/test windows
+
+    Each fold trains on train_bars bars and tests on the test_bars bars right
+    after them; the next fold moves forward by step_bars (default test_bars).
+    step_bars may not be smaller than test_bars, since overlapping test windows
+    cannot be chained into one out-of-sample curve. Anchored folds keep the train window starting
+    at the first bar and let it grow. The last test window may be shorter.
+
+    Returns:
+        List of {"fold", "train_start", "train_stop", "test_start", "test_stop"} (stop exclusive)
+    """
+    if train_bars < 1 or test_bars < 1:
+        raise ValueError("train_bars and test_bars must be at least 1")
+    step_bars = step_bars or test_bars
+    if step_bars < test_bars:
+        raise ValueError("step_bars must be at least test_bars, otherwise the test windows overlap")
+
+    folds = []
+    train_start = 0
+    train_stop = train_bars
+    while train_stop < n_bars:
+        folds.append({
+            "fold": len(folds),
+            "train_start": 0 if anchored else train_start,
+            "train_stop": train_stop,
+            "test_start": train_stop,
+            "test_stop": min(train_stop + test_bars, n_bars)
+        })
+        train_start += step_bars
+        train_stop += step_bars
+    return folds
+
+
+def _run_fold(fold: Dict[str, int]) -> Dict[str, Any]:
+    """Pick the best parameters on a fold's train window and run them on its test window"""
+    state = sweep._sweep_state
+    rank_by = state["rank_by"]
+
+    best_row = None
+    for params in state["combinations"]:
+        row = simulate_params(state, params, fold["train_start"], fold["train_stop"])[0]
+        if best_row is None or row[rank_by] > best_row[rank_by]:
+            best_row = row
+    best_params = {key: best_row[key] for key in state["combinations"][0]}
+
+    test_row, portfolio_values, bars = simulate_params(state, best_params, fold["test_start"], fold["test_stop"])
+    return {
+        **fold,
+        "best_params": best_params,
+        "train_metrics": {key: value for key, value in best_row.items() if key not in best_params},
+        "test_metrics": {key: value for key, value in test_row.items() if key not in best_params},
+        "test_values": portfolio_values,
+        "test_bars": bars
+    }
+
+
+def stitch_equity(folds: List[Dict[str, Any]], initial_capital: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Chain the test windows into one out-of-sample equity curve
+
+    Every test window is simulated from initial_capital; with a fixed share size
+    its P&L does not depend on the capital, so each window's P&L is added on top
+    of where the previous window ended.
+
+    Returns:
+        Tuple of (bar positions, portfolio values)
+    """
+    positions, values = [], []
+    offset = 0.0
+    for fold in folds:
+        fold_values = np.asarray(fold["test_values"], dtype=np.float64)
+        if len(fold_values) == 0:
+            continue
+        positions.append(fold["test_bars"])
+        values.append(fold_values + offset)
+        offset += fold_values[-1] - initial_capital
+    if not values:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return np.concatenate(positions), np.concatenate(values)
+
+
+def run_walk_forward(strategy_name: str,
+                     param_grid: Dict[str, List[Any]],
+                     stock_symbol: str,
+                     start_date: str,
+                     end_date: str,
+                     train_bars: int,
+                     test_bars: int,
+                     step_bars: Optional[int] = None,
+                     anchored: bool = False,
+                     initial_capital: float = settings.INITIAL_CAPITAL,
+                     shares_to_buy: int = settings.SHARES_TO_BUY,
+                     rank_by: str = "total_return_pct",
+                     max_workers: Optional[int] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Walk-forward optimization of a strategy's parameters
+
+    On every fold the parameter grid is evaluated on the train window, the best
+    set (by rank_by) is run on the following test window, and the test windows
+    are stitched into one out-of-sample equity curve. Prices are fetched and
+    indicators computed once; folds are independent and run in worker processes
+    that each receive the price and indicator arrays once.
+
+    Returns:
+        Tuple of (equity_frame, result) where equity_frame holds the stitched
+        Portfolio_Value per out-of-sample bar and result the fold details and
+        the overall out-of-sample metrics
+    """
+    strategy_name = strategy_name.lower()
+    combinations = build_combinations(strategy_name, param_grid)
+    if not combinations:
+        raise ValueError("The parameter grid has no valid combinations")
+
+    data = fetch_stock_data(
+        symbol=stock_symbol,
+        start=start_date,
+        end=end_date,
+        data_interval=settings.INTERVAL
+    )
+    if data.empty:
+        raise ValueError(f"No price data for {stock_symbol} between {start_date} and {end_date}")
+    series_key = price_series_key(stock_symbol, settings.INTERVAL, start_date, end_date, data)
+    data = data.sort_index()
+
+    folds = build_folds(len(data), train_bars, test_bars, step_bars, anchored)
+    if not folds:
+        raise ValueError(f"{len(data)} bars are not enough for a {train_bars}-bar train window plus a test window")
+
+    state = {
+        "strategy_name": strategy_name,
+        "close": data['Close'].to_numpy(dtype=np.float64),
+        "row_valid": data.notna().all(axis=1).to_numpy(),
+        "indicators": compute_shared_indicators(strategy_name, data['Close'], combinations, series_key),
+        "initial_capital": initial_capital,
+        "shares_to_buy": shares_to_buy,
+        "combinations": combinations,
+        "rank_by": rank_by,
+    }
+    rank_fields = set(calculate_performance_metrics([], 0, 0, initial_capital)) | {"bars"}
+    if rank_by not in rank_fields:
+        raise ValueError(f"Cannot rank by '{rank_by}'. Available fields: {', '.join(sorted(rank_fields))}")
+
+    workers = sweep.pool_workers(len(folds), max_workers)
+    logger.info(f"Walk-forward: {len(folds)} folds x {len(combinations)} combinations of {strategy_name} "
+                f"on {stock_symbol}, {workers} workers")
+
+    if workers == 1:
+        sweep._init_worker(state)
+        fold_results = [_run_fold(fold) for fold in folds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=sweep._init_worker, initargs=(state,)) as pool:
+            fold_results = list(pool.map(_run_fold, folds))
+
+    positions, values = stitch_equity(fold_results, initial_capital)
+    equity_frame = pd.DataFrame({"Portfolio_Value": values}, index=data.index[positions])
+
+    # Out-of-sample figures over all test windows together
+    total_trades = sum(fold["test_metrics"]["total_trades"] for fold in fold_results)
+    winning_trades = sum(fold["test_metrics"]["winning_trades"] for fold in fold_results)
+    metrics = calculate_performance_metrics(values, total_trades, winning_trades, initial_capital)
+    metrics["final_portfolio_value"] = float(metrics["final_portfolio_value"])
+    # Trade-level figures (exposure, profit factor, durations) are not tracked across folds
+    metrics.update(calculate_risk_metrics(values, equity_frame.index, initial_capital))
+
+    index = data.index
+    folds_out = []
+    for fold in fold_results:
+        folds_out.append({
+            "fold": fold["fold"],
+            "train_start": str(index[fold["train_start"]]),
+            "train_end": str(index[fold["train_stop"] - 1]),
+            "test_start": str(index[fold["test_start"]]),
+            "test_end": str(index[fold["test_stop"] - 1]),
+            "best_params": fold["best_params"],
+            "train_metrics": fold["train_metrics"],
+            "test_metrics": fold["test_metrics"]
+        })
+
+    return equity_frame, {
+        "strategy_name": strategy_name,
+        "stock_symbol": stock_symbol,
+        "rank_by": rank_by,
+        "train_bars": train_bars,
+        "test_bars": test_bars,
+        "step_bars": step_bars or test_bars,
+        "anchored": anchored,
+        "performance_metrics": metrics,
+        "folds": folds_out
+    }
@@ -0,0 +1 @@
+# Benchmarks module
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Status-read throughput while a backtest is writing trades
+
+Runs reader threads that poll get_backtest_job (like the status endpoint) while a
+writer thread keeps inserting trade batches and updating job status (like a running
+backtest), once with the legacy setup (rollback journal, new connection per call)
+and once with the tuned setup (WAL, per-thread connections).
+
+Usage (from the backend folder):
+    python -m benchmarks.db_concurrency --readers 8 --duration 5
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from config import settings
+from database.db_engine import DatabaseEngine
+
+
+class LegacyDatabaseEngine(DatabaseEngine):
+    """The setup before per-thread connections: a new connection for every call"""
+
+    def get_connection(self):
+        # Close the previous call's connection, as each call used to close its own when done
+        self.close()
+        return super().get_connection()
+
+
+SETUPS = {
+    "legacy": {"DB_JOURNAL_MODE": "DELETE", "DB_SYNCHRONOUS": "FULL", "engine": LegacyDatabaseEngine},
+    "tuned": {"DB_JOURNAL_MODE": settings.DB_JOURNAL_MODE, "DB_SYNCHRONOUS": settings.DB_SYNCHRONOUS,
+              "engine": DatabaseEngine},
+}
+
+
+def make_trades(backtest_id: str, count: int):
+    """Complete trade rows as produced by a backtest"""
+    return [{
+        "strategy_name": "ma_crossover",
+        "stock_symbol": "BENCH",
+        "trade_type": "buy",
+        "quantity": 50,
+        "entry_price": 100.0 + i,
+        "entry_timestamp": f"2024-01-01 00:{i % 60:02d}:00",
+        "exit_price": 101.0 + i,
+        "exit_timestamp": f"2024-01-02 00:{i % 60:02d}:00",
+        "pnl": 50.0,
+        "days_held": 1,
+        "backtest_id": backtest_id
+    } for i in range(count)]
+
+
+def run_setup(name: str, readers: int, duration: float, batch_size: int):
+    """Run one reader/writer mix and return the measured rates"""
+    setup = SETUPS[name]
+    settings.DB_JOURNAL_MODE = setup["DB_JOURNAL_MODE"]
+    settings.DB_SYNCHRONOUS = setup["DB_SYNCHRONOUS"]
+
+    db_path = os.path.join(tempfile.mkdtemp(), f"bench_{name}.db")
+    engine = setup["engine"](db_path)
+    backtest_id = str(uuid.uuid4())
+    engine.create_backtest_job(backtest_id, "{}")
+    trades = make_trades(backtest_id, batch_size)
+
+    stop = threading.Event()
+    read_counts = [0] * readers
+    write_counts = [0]
+
+    def reader(slot: int):
+        while not stop.is_set():
+            engine.get_backtest_job(backtest_id)
+            read_counts[slot] += 1
+
+    def writer():
+        while not stop.is_set():
+            engine.update_backtest_status(backtest_id, "RUNNING")
+            engine.insert_trades(trades)
+            write_counts[0] += len(trades)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "setup": name,
+        "status_reads_per_sec": sum(read_counts) / duration,
+        "trades_written_per_sec": write_counts[0] / duration,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent status reads vs. trade writes")
+    parser.add_argument("--readers", type=int, default=8, help="Number of status-polling threads")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per setup")
+    parser.add_argument("--batch-size", type=int, default=500, help="Trades per insert transaction")
+    args = parser.parse_args()
+
+    # The per-call INFO logs would dominate the timings
+    logging.getLogger("database.db_engine").setLevel(logging.WARNING)
+
+    print(f"{'setup':<8} {'status reads/s':>16} {'trades written/s':>18}")
+    for name in SETUPS:
+        result = run_setup(name, args.readers, args.duration, args.batch_size)
+        print(f"{result['setup']:<8} {result['status_reads_per_sec']:>16,.0f} {result['trades_written_per_sec']:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
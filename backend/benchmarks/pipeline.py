@@ -0,0 +1,204 @@
+"""
+Stage-by-stage timings of the backtest pipeline on synthetic data
+
+Generates GBM-style OHLCV frames (same shape as a yfinance download) for each
+size and times every stage separately:
+
+    ma_crossover       ma_crossover_strategy indicator math (fetch stubbed)
+    bollinger_bands    bollinger_bands_strategy indicator math (fetch stubbed)
+    backtest           backtest_strategy on the MA crossover frame
+    trade_writes       DatabaseEngine.insert_trades of the resulting trades
+    results            get_backtest_results for the stored job, JSON encoded
+
+Each stage reports wall time, bars per second and peak traced memory (measured
+in a separate run, since tracemalloc slows the code down). Results are written
+to JSON so runs can be compared over time.
+
+Usage (from the backend folder):
+    python -m benchmarks.pipeline --sizes 1000,100000,1000000
+    python -m benchmarks.pipeline --sizes 10000000 --stages ma_crossover,bollinger_bands,backtest
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import settings
+
+# Keep the benchmark away from the real database: the global engine is created on import
+settings.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_pipeline.db")
+
+from data_feed.synthetic import generate_bars
+from database.db_engine import DatabaseEngine, db_engine
+from database.serialization import serialize_frame, serialize_curve
+from backtest.backtesting_engine import backtest_strategy, ENGINES
+import strategy.ma_crossover as ma_module
+import strategy.bollinger_bands as bb_module
+
+STAGES = ("ma_crossover", "bollinger_bands", "backtest", "trade_writes", "results")
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+
+# The short/long windows and band settings used for every size
+MA_PARAMS = {"short_window": 20, "long_window": 50}
+BB_PARAMS = {"window": 20, "std_dev": 2.0}
+
+
+def stub_fetch(bars: pd.DataFrame):
+    """Make both strategies read the synthetic frame instead of downloading"""
+    def fetch_stock_data(*args, **kwargs):
+        return bars.copy(), None
+    ma_module.fetch_stock_data = fetch_stock_data
+    bb_module.fetch_stock_data = fetch_stock_data
+
+
+def measure(func, trace_memory: bool):
+    """Run func once; return (result, wall seconds, peak traced MB or None)"""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    # Strategy progress prints are not part of the measured work
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - started
+    peak_mb = None
+    if trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    return result, wall, peak_mb
+
+
+def build_stages(bars: pd.DataFrame, stages, scratch_dir: str):
+    """Stage name -> zero-argument callable, plus the inputs each stage needs"""
+    stub_fetch(bars)
+    ma_frame = ma_module.ma_crossover_strategy(**MA_PARAMS)
+    _, trades = ENGINES[settings.BACKTEST_ENGINE](
+        ma_frame, "ma_crossover", "BENCH", settings.INITIAL_CAPITAL, settings.SHARES_TO_BUY, "bench"
+    )
+
+    def run_trade_writes():
+        engine = DatabaseEngine(os.path.join(scratch_dir, f"trades_{time.perf_counter_ns()}.db"))
+        engine.insert_trades(trades)
+        engine.close()
+
+    def run_results():
+        # The endpoint returns the already encoded JSON response
+        return asyncio.run(app_module.get_backtest_results(
+            backtest_id, chart_format="records", max_points=None, start_date=None, end_date=None
+        )).body
+
+    backtest_id = None
+    if "results" in stages:
+        # Imported here, outside the timings: the app module is only needed for this stage
+        import main as app_module
+        portfolio_values, performance_metrics = backtest_strategy(
+            ma_frame, "ma_crossover", "BENCH", settings.INITIAL_CAPITAL, settings.SHARES_TO_BUY,
+            persist_trades=False
+        )
+        backtest_id = f"bench-{len(bars)}-{time.perf_counter_ns()}"
+        db_engine.create_backtest_job(backtest_id, json.dumps({
+            "stock_symbol": "BENCH", "strategy_name": "ma_crossover", "strategy_params": MA_PARAMS
+        }))
+        db_engine.save_strategy_frame(backtest_id, serialize_frame(ma_frame))
+        db_engine.save_backtest_curve(backtest_id, "portfolio_value", serialize_curve(portfolio_values))
+        db_engine.update_backtest_status(backtest_id, "COMPLETED", json.dumps({
+            "performance_metrics": performance_metrics
+        }))
+
+    return {
+        "ma_crossover": lambda: ma_module.ma_crossover_strategy(**MA_PARAMS),
+        "bollinger_bands": lambda: bb_module.bollinger_bands_strategy(**BB_PARAMS),
+        "backtest": lambda: backtest_strategy(
+            ma_frame, "ma_crossover", "BENCH", settings.INITIAL_CAPITAL, settings.SHARES_TO_BUY,
+            persist_trades=False
+        ),
+        "trade_writes": run_trade_writes,
+        "results": run_results,
+    }, len(trades)
+
+
+def run_size(n_bars: int, stages, trace_memory: bool, scratch_dir: str, seed: int):
+    """Benchmark every selected stage on one synthetic frame"""
+    # Minute bars keep even 10M-bar frames inside pandas' timestamp range
+    bars = generate_bars(n_bars, freq="1min", seed=seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stage_funcs, trade_count = build_stages(bars, stages, scratch_dir)
+
+    rows = []
+    for stage in stages:
+        _, wall, _ = measure(stage_funcs[stage], trace_memory=False)
+        peak_mb = measure(stage_funcs[stage], trace_memory=True)[2] if trace_memory else None
+        rows.append({
+            "stage": stage,
+            "bars": n_bars,
+            "trades": trade_count if stage in ("backtest", "trade_writes") else None,
+            "wall_seconds": round(wall, 6),
+            "bars_per_second": round(n_bars / wall, 1) if wall > 0 else None,
+            "trades_per_second": round(trade_count / wall, 1) if stage == "trade_writes" and wall > 0 else None,
+            "peak_memory_mb": round(peak_mb, 2) if peak_mb is not None else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each backtest pipeline stage on synthetic OHLCV data")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated bar counts (up to 10000000)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run of each stage")
+    parser.add_argument("--output", default=None, help="JSON file for the results (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    # The per-call INFO logs would dominate the small sizes
+    logging.getLogger("database.db_engine").setLevel(logging.WARNING)
+    scratch_dir = tempfile.mkdtemp()
+
+    results = []
+    print(f"{'stage':<16} {'bars':>10} {'wall s':>10} {'bars/s':>14} {'peak MB':>10}")
+    for n_bars in sizes:
+        for row in run_size(n_bars, stages, not args.no_memory, scratch_dir, args.seed):
+            results.append(row)
+            peak = f"{row['peak_memory_mb']:>10.1f}" if row["peak_memory_mb"] is not None else f"{'-':>10}"
+            print(f"{row['stage']:<16} {row['bars']:>10,} {row['wall_seconds']:>10.4f} "
+                  f"{row['bars_per_second'] or 0:>14,.0f} {peak}")
+
+    started_at = datetime.now()
+    report = {
+        "run_at": started_at.isoformat(timespec="seconds"),
+        "backtest_engine": settings.BACKTEST_ENGINE,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"pipeline_{started_at.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import os
 from pydantic_settings import BaseSettings
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Settings(BaseSettings):
     STOCK_SYMBOL: str = "AAPL"
     INTERVAL: str = "1d"
@@ -9,6 +12,44 @@ class Settings(BaseSettings):
     SHARES_TO_BUY: int = 50
     STRATEGY_NAME: str = "MA_Crossover"
     
+    # Simulation engine: "vectorized" or "loop" (reference implementation)
+    BACKTEST_ENGINE: str = "vectorized"
+    
+    # Bars per chunk for out-of-core backtests over the bar store (0 = load the whole range at once)
+    BACKTEST_CHUNK_BARS: int = 0
+    
+    # Job executor: concurrent backtest worker processes and queue poll interval (seconds)
+    EXECUTOR_MAX_WORKERS: int = 2
+    EXECUTOR_POLL_INTERVAL: float = 1.0
+    
+    # Worker processes per parameter sweep or walk-forward job (0 = the CPU cores divided
+    # by EXECUTOR_MAX_WORKERS, so concurrent jobs together use at most all cores)
+    SWEEP_MAX_WORKERS: int = 0
+    
+    # SQLite connection settings (one long-lived connection per thread)
+    DB_PATH: str = "trade_data.db"
+    DB_JOURNAL_MODE: str = "WAL"
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE: int = -65536  # Negative values are KiB (64 MiB)
+    DB_MMAP_SIZE: int = 268435456  # 256 MiB
+    DB_BUSY_TIMEOUT: float = 30.0  # Seconds to wait for a lock held by another writer
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    
+    # GET /trades page size when no limit is given, and the largest limit accepted
+    TRADES_PAGE_SIZE: int = 1000
+    TRADES_MAX_PAGE_SIZE: int = 10000
+    
+    # Local OHLCV bar store
+    USE_DATA_STORE: bool = True
+    DATA_STORE_DIR: str = os.path.join(BASE_DIR, "data_feed", "store")
+    
+    # Per-process LRU cache of indicator series computed from stored bars (0 disables it)
+    INDICATOR_CACHE_MAX_BYTES: int = 268435456  # 256 MiB
+    
+    # Save indicator series next to the bar store version they were computed from,
+    # so job worker processes reuse each other's indicators
+    INDICATOR_DISK_CACHE: bool = True
+    
     class Config:
         env_file = ".env"
 
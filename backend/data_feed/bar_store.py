@@ -0,0 +1,337 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from config import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; series files are locked with msvcrt instead
+    fcntl = None
+    import msvcrt
+
+# Columns yfinance may return that describe corporate actions rather than prices.
+# Rows merged from different downloads default these to 0 when a column is missing.
+EVENT_COLUMNS = ("Dividends", "Stock Splits", "Capital Gains")
+
+
+class ReadLog:
+    """Versions of each stored series read while the log is active (see record_reads)"""
+
+    def __init__(self):
+        self.versions: Dict[Tuple[str, str], Set[int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, symbol: str, interval: str, version: int):
+        with self._lock:
+            self.versions.setdefault((symbol.upper(), interval), set()).add(version)
+
+
+# Read log of the job running in the current context, if any
+_active_read_log: ContextVar[Optional[ReadLog]] = ContextVar("active_read_log", default=None)
+
+
+def active_read_log() -> Optional[ReadLog]:
+    """Read log of the current context, to be passed on to worker threads"""
+    return _active_read_log.get()
+
+
+@contextmanager
+def record_reads(log: Optional[ReadLog] = None):
+    """Record the version of every series loaded from the store in this context into log (a new one by default)"""
+    log = log if log is not None else ReadLog()
+    token = _active_read_log.set(log)
+    try:
+        yield log
+    finally:
+        _active_read_log.reset(token)
+
+
+def _lock_file(lock_file):
+    """Block until this process holds an exclusive lock on an open lock file"""
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return
+    lock_file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK gives up after about 10 seconds; keep waiting like flock does
+            continue
+
+
+def _unlock_file(lock_file):
+    """Release a lock taken with _lock_file"""
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _to_naive(ts) -> pd.Timestamp:
+    """Convert a date string or timestamp into a naive (exchange-local) Timestamp"""
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts
+
+
+def merge_ranges(ranges: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Merge overlapping or touching [start, end) ranges"""
+    merged = []
+    for start, end in sorted(ranges):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_ranges(start: pd.Timestamp, end: pd.Timestamp,
+                    covered: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Return the parts of [start, end) that are not inside any covered range"""
+    missing = []
+    cursor = start
+    for cov_start, cov_end in merge_ranges(covered):
+        if cov_end <= cursor:
+            continue
+        if cov_start >= end:
+            break
+        if cov_start > cursor:
+            missing.append((cursor, min(cov_start, end)))
+        cursor = max(cursor, cov_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+class BarStore:
+    """
+    Local on-disk OHLCV bar store keyed by (symbol, interval)
+
+    Each series lives in its own directory holding one ``.npy`` file per column
+    (the index is stored as int64 nanoseconds) plus a ``meta.json`` describing the
+    columns, timezone and the [start, end) date ranges that have been downloaded.
+    Column files are opened memory-mapped, so loading a date range only reads the
+    rows inside it.
+
+    Every write goes into a fresh ``v<N>`` directory and ``meta.json`` is swapped
+    atomically afterwards, so readers in other processes never see half-written data.
+    Writers hold an exclusive lock on the series' ``.lock`` file for the whole
+    read-merge-write, so concurrent writes from other processes (job workers, the
+    bulk importer) are serialized instead of overwriting each other.
+    """
+
+    def __init__(self, root: str = settings.DATA_STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _series_dir(self, symbol: str, interval: str) -> str:
+        """Directory holding all versions of one (symbol, interval) series"""
+        return os.path.join(self.root, f"{symbol.upper().replace('.', '_')}_{interval}")
+
+    @contextmanager
+    def _series_lock(self, symbol: str, interval: str):
+        """Exclusive lock on one series, held across threads and processes"""
+        series_dir = self._series_dir(symbol, interval)
+        os.makedirs(series_dir, exist_ok=True)
+        with self._lock, open(os.path.join(series_dir, ".lock"), "a+") as lock_file:
+            _lock_file(lock_file)
+            try:
+                yield
+            finally:
+                _unlock_file(lock_file)
+
+    def version_dir(self, symbol: str, interval: str, version: int) -> str:
+        """Directory holding one stored version of a series (removed two writes later)"""
+        return os.path.join(self._series_dir(symbol, interval), f"v{version}")
+
+    def read_meta(self, symbol: str, interval: str) -> Optional[dict]:
+        """Load the metadata of a series, or None if nothing is stored yet"""
+        meta_path = os.path.join(self._series_dir(symbol, interval), "meta.json")
+        try:
+            with open(meta_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def coverage(self, symbol: str, interval: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Date ranges already downloaded for a series"""
+        meta = self.read_meta(symbol, interval)
+        if not meta:
+            return []
+        return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in meta["coverage"]]
+
+    def missing_ranges(self, symbol: str, interval: str, start, end) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """Return the sub-ranges of [start, end) that still have to be downloaded"""
+        return subtract_ranges(_to_naive(start), _to_naive(end), self.coverage(symbol, interval))
+
+    def load(self, symbol: str, interval: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Load stored bars with start <= timestamp < end
+
+        Bounds are interpreted in the exchange timezone of the stored data, the same
+        way yfinance interprets its start/end arguments.
+        """
+        meta = self.read_meta(symbol, interval)
+        if not meta or meta["rows"] == 0:
+            return pd.DataFrame()
+        lo, hi = self._row_range(symbol, interval, meta, start, end)
+        self._record_read(symbol, interval, meta)
+        return self._load_rows(symbol, interval, meta, lo, hi)
+
+    def iter_chunks(self, symbol: str, interval: str, start=None, end=None,
+                    chunk_bars: int = 100000) -> Iterator[pd.DataFrame]:
+        """
+        Yield the bars with start <= timestamp < end as frames of at most chunk_bars rows
+
+        Only one chunk is read into memory at a time. All chunks come from the
+        version that was current when iteration started, even if the series is
+        rewritten meanwhile (the store keeps the previous version around for that).
+        """
+        if chunk_bars < 1:
+            raise ValueError("chunk_bars must be at least 1")
+        meta = self.read_meta(symbol, interval)
+        if not meta or meta["rows"] == 0:
+            return
+        lo, hi = self._row_range(symbol, interval, meta, start, end)
+        self._record_read(symbol, interval, meta)
+        for chunk_lo in range(lo, hi, chunk_bars):
+            yield self._load_rows(symbol, interval, meta, chunk_lo, min(chunk_lo + chunk_bars, hi))
+
+    @staticmethod
+    def _record_read(symbol: str, interval: str, meta: dict):
+        """Note the version being read in the active read log, if any"""
+        read_log = _active_read_log.get()
+        if read_log is not None:
+            read_log.add(symbol, interval, meta["version"])
+
+    def _row_range(self, symbol: str, interval: str, meta: dict, start=None, end=None) -> Tuple[int, int]:
+        """Translate date bounds into row positions [lo, hi) on the (sorted) stored index"""
+        data_dir = self.version_dir(symbol, interval, meta["version"])
+        index_ns = np.load(os.path.join(data_dir, "index.npy"), mmap_mode="r")
+        tz = meta["tz"]
+        lo, hi = 0, len(index_ns)
+        if start is not None:
+            lo = int(np.searchsorted(index_ns, self._bound_ns(start, tz), side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(index_ns, self._bound_ns(end, tz), side="left"))
+        return lo, max(lo, hi)
+
+    def _load_rows(self, symbol: str, interval: str, meta: dict, lo: int, hi: int) -> pd.DataFrame:
+        """Read rows [lo, hi) of one stored version; only those rows are paged in"""
+        data_dir = self.version_dir(symbol, interval, meta["version"])
+        index_ns = np.load(os.path.join(data_dir, "index.npy"), mmap_mode="r")
+        tz = meta["tz"]
+
+        index = pd.DatetimeIndex(np.array(index_ns[lo:hi]).view("datetime64[ns]"), name=meta["index_name"])
+        index = index.tz_localize("UTC").tz_convert(tz) if tz else index
+
+        columns = {}
+        for i, column in enumerate(meta["columns"]):
+            values = np.load(os.path.join(data_dir, f"col{i}.npy"), mmap_mode="r")
+            columns[column] = np.array(values[lo:hi])
+
+        data = pd.DataFrame(columns, index=index)
+        # Lets callers tell apart bars loaded from different versions of the series
+        data.attrs["store_version"] = meta["version"]
+        return data
+
+    @staticmethod
+    def _bound_ns(bound, tz: Optional[str]) -> int:
+        """Convert a naive date bound into UTC nanoseconds for searching the index"""
+        ts = _to_naive(bound)
+        if tz:
+            ts = ts.tz_localize(tz).tz_convert("UTC").tz_localize(None)
+        return ts.value
+
+    def write(self, symbol: str, interval: str, data: pd.DataFrame,
+              covered: List[Tuple[pd.Timestamp, pd.Timestamp]]):
+        """
+        Merge newly downloaded bars into the store and record the covered ranges
+
+        Rows already present are replaced by the new download, so re-fetching a
+        range also picks up upstream corrections.
+        """
+        with self._series_lock(symbol, interval):
+            meta = self.read_meta(symbol, interval)
+            # Read directly so the merge doesn't count as a read of the old version
+            existing = self._load_rows(symbol, interval, meta, 0, meta["rows"]) if meta and meta["rows"] else pd.DataFrame()
+
+            if not data.empty:
+                data = data.copy()
+                tz = str(data.index.tz) if data.index.tz is not None else None
+                tz = meta["tz"] if meta and meta["tz"] else tz
+                if data.index.tz is not None:
+                    data.index = data.index.tz_convert("UTC")
+                if not existing.empty and existing.index.tz is not None:
+                    existing.index = existing.index.tz_convert("UTC")
+                merged = pd.concat([existing, data]) if not existing.empty else data
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                for column in EVENT_COLUMNS:
+                    if column in merged.columns:
+                        merged[column] = merged[column].fillna(0.0)
+                if tz:
+                    merged.index = merged.index.tz_convert(tz)
+            else:
+                merged = existing
+                tz = meta["tz"] if meta else None
+
+            coverage = self.coverage(symbol, interval) + [(_to_naive(s), _to_naive(e)) for s, e in covered]
+            self._write_version(symbol, interval, merged, tz, merge_ranges(coverage), meta)
+
+    def _write_version(self, symbol: str, interval: str, data: pd.DataFrame, tz: Optional[str],
+                       coverage: List[Tuple[pd.Timestamp, pd.Timestamp]], old_meta: Optional[dict]):
+        """Write a complete new version of a series and point meta.json at it"""
+        series_dir = self._series_dir(symbol, interval)
+        version = (old_meta["version"] + 1) if old_meta else 1
+        data_dir = os.path.join(series_dir, f"v{version}")
+        os.makedirs(data_dir, exist_ok=True)
+
+        index = data.index
+        if tz:
+            index = index.tz_convert("UTC").tz_localize(None)
+        # A series whose first download held no bars is stored empty, to record its coverage
+        index_ns = index.asi8 if isinstance(index, pd.DatetimeIndex) else np.empty(0)
+        np.save(os.path.join(data_dir, "index.npy"), index_ns.astype(np.int64))
+        for i, column in enumerate(data.columns):
+            np.save(os.path.join(data_dir, f"col{i}.npy"), data[column].to_numpy())
+
+        meta = {
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "version": version,
+            "tz": tz,
+            "index_name": data.index.name or "Date",
+            "columns": [str(c) for c in data.columns],
+            "rows": int(len(data)),
+            "coverage": [[s.isoformat(), e.isoformat()] for s, e in coverage],
+        }
+        tmp_path = os.path.join(series_dir, f"meta.json.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(series_dir, "meta.json"))
+
+        # Keep the previous version around for readers that opened it before the swap
+        for name in os.listdir(series_dir):
+            if name.startswith("v") and name[1:].isdigit() and int(name[1:]) < version - 1:
+                shutil.rmtree(os.path.join(series_dir, name), ignore_errors=True)
+
+
+# Create a global bar store instance
+bar_store = BarStore()
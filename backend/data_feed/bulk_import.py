@@ -0,0 +1,372 @@
+"""
+Bulk import of OHLCV files on disk into the local bar store
+
+Walks a directory tree for CSV and Parquet files (vendor dumps, or the CSVs
+written by fetch_stock_data(save_to_file=True)), parses them in parallel worker
+processes, normalizes their columns and timestamps to what a yfinance download
+looks like, and merges each (symbol, interval) series into the bar store with a
+single write. The ranges the files span are recorded as covered, so later
+backtests on those ranges run without any network access.
+
+Symbol and interval come from, in order:
+    symbol:   the fetch_stock_data file name (SYMBOL_start_end_interval.csv),
+              a symbol/ticker column, --symbol, or the file name
+    interval: the fetch_stock_data file name, a parent folder named like an
+              interval (e.g. data/5m/AAPL.csv), or --interval
+
+Where files overlap, bars from the most recently modified file win. New
+series are stored in the exchange timezone given by --tz; CSVs only carry UTC
+offsets, so a new series whose files name no timezone is skipped without it.
+
+Usage (from the backend folder):
+    python -m data_feed.bulk_import /data/vendor --interval 1d --tz America/New_York
+    python -m data_feed.bulk_import data_feed --workers 4
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import settings
+from data_feed.bar_store import bar_store, EVENT_COLUMNS
+
+FILE_EXTENSIONS = (".csv", ".parquet", ".pq")
+
+# Intervals yfinance accepts, used to recognize interval folders and file name suffixes
+INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"}
+
+# Names written by fetch_stock_data: SYMBOL_start_end_interval.csv (dots in the symbol become "_")
+EXPORT_NAME = re.compile(r"^(?P<symbol>.+)_(?P<start>\d{4}-\d{2}-\d{2})_(?P<end>\d{4}-\d{2}-\d{2})_(?P<interval>[0-9a-z]+)$")
+
+UTC_OFFSET = re.compile(r"(Z|[+-]\d{2}:?\d{2})$")
+ISO_WITH_OFFSET = r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}[+-]\d{2}:\d{2}"
+
+TIMESTAMP_NAMES = ("date", "datetime", "timestamp", "time", "index")
+SYMBOL_NAMES = ("symbol", "ticker")
+
+# Lower-cased vendor spellings of the columns the store keeps; anything else is dropped
+COLUMN_NAMES = {
+    "open": "Open", "o": "Open",
+    "high": "High", "h": "High",
+    "low": "Low", "l": "Low",
+    "close": "Close", "c": "Close", "last": "Close",
+    "volume": "Volume", "vol": "Volume", "v": "Volume",
+    "dividends": "Dividends",
+    "stock splits": "Stock Splits", "stock_splits": "Stock Splits", "splits": "Stock Splits",
+    "capital gains": "Capital Gains", "capital_gains": "Capital Gains",
+}
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+
+
+def find_files(root: str) -> List[str]:
+    """Data files below root, oldest modification first (so newer files win on overlap)"""
+    paths = []
+    for folder, _, names in os.walk(root):
+        paths.extend(os.path.join(folder, name) for name in names if name.lower().endswith(FILE_EXTENSIONS))
+    return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    """Read a CSV or Parquet file; a datetime index (as pandas writes Parquet) becomes a column"""
+    if path.lower().endswith(".csv"):
+        # round_trip parses floats written by to_csv back to exactly the same values
+        return pd.read_csv(path, float_precision="round_trip")
+    table = pd.read_parquet(path)
+    if isinstance(table.index, pd.DatetimeIndex):
+        table = table.reset_index()
+    return table
+
+
+def _parse_timestamps(values: pd.Series) -> pd.DatetimeIndex:
+    """
+    Parse a timestamp column, keeping whatever timezone it carries
+
+    Strings with a UTC offset (as in the CSVs yfinance data is saved to) are
+    parsed as UTC, since one file may span a DST change; timestamps without any
+    offset stay naive.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.DatetimeIndex(values)
+    if pd.api.types.is_numeric_dtype(values):
+        # Epoch numbers: seconds or milliseconds since 1970, in UTC
+        unit = "ms" if values.abs().max() > 1e11 else "s"
+        return pd.DatetimeIndex(pd.to_datetime(values, unit=unit, utc=True))
+    first = values.dropna().astype(str).str.strip()
+    has_offset = not first.empty and bool(UTC_OFFSET.search(first.iloc[0]))
+    if has_offset and values.notna().all() and values.str.fullmatch(ISO_WITH_OFFSET).all():
+        return _parse_iso_with_offset(values)
+    try:
+        # The format inferred from the first value parses the whole column in one pass
+        return pd.DatetimeIndex(pd.to_datetime(values, utc=has_offset))
+    except ValueError:
+        return pd.DatetimeIndex(pd.to_datetime(values, format="mixed", utc=has_offset))
+
+
+def _parse_iso_with_offset(values: pd.Series) -> pd.DatetimeIndex:
+    """
+    Parse "YYYY-MM-DD HH:MM:SS+HH:MM" strings as UTC
+
+    pandas resolves the offset of every string on its own; splitting off the
+    offset and parsing the local part with one fixed format is several times
+    faster on large intraday files.
+    """
+    local = pd.to_datetime(values.str.slice(0, 19).str.replace("T", " ", regex=False), format="%Y-%m-%d %H:%M:%S")
+    offset = values.str.slice(-6)
+    minutes = offset.str.slice(1, 3).astype(np.int64) * 60 + offset.str.slice(4, 6).astype(np.int64)
+    minutes = np.where(offset.str.slice(0, 1) == "-", -minutes, minutes)
+    return pd.DatetimeIndex(local - pd.to_timedelta(minutes, unit="min")).tz_localize("UTC")
+
+
+def normalize_frame(table: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn a vendor table into a yfinance-shaped bar frame
+
+    Column names are matched case-insensitively, the timestamp column (or the
+    first column if none is named like one) becomes a "Date" index, and rows
+    missing a price are dropped. A symbol/ticker column is kept as "Symbol".
+    """
+    lowered = {str(column).strip().lower(): column for column in table.columns}
+    timestamp_column = next((lowered[name] for name in TIMESTAMP_NAMES if name in lowered), table.columns[0])
+    symbol_column = next((lowered[name] for name in SYMBOL_NAMES if name in lowered), None)
+
+    columns = {}
+    for name, column in lowered.items():
+        target = COLUMN_NAMES.get(name)
+        if target and target not in columns and column != timestamp_column:
+            columns[target] = pd.to_numeric(table[column], errors="coerce").to_numpy()
+    missing = [column for column in PRICE_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"missing columns {', '.join(missing)} (found {', '.join(map(str, table.columns))})")
+
+    data = pd.DataFrame(columns, index=_parse_timestamps(table[timestamp_column]).rename("Date"))
+    if "Volume" not in data.columns:
+        data["Volume"] = 0
+    for column in EVENT_COLUMNS:
+        if column in data.columns:
+            data[column] = data[column].fillna(0.0)
+    if symbol_column is not None:
+        data["Symbol"] = table[symbol_column].astype(str).str.strip().str.upper().to_numpy()
+
+    return data[data.index.notna() & data[list(PRICE_COLUMNS)].notna().all(axis=1).to_numpy()]
+
+
+def read_file(path: str, default_symbol: Optional[str] = None,
+              default_interval: str = settings.INTERVAL) -> Dict[str, Any]:
+    """
+    Parse one file into bar frames keyed by (symbol, interval); runs in a worker process
+
+    Returns a dict with the path, the pieces found as (symbol, interval, frame,
+    exported_range) tuples, the row count and an error message if the file
+    could not be read.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    exported = EXPORT_NAME.match(stem)
+    if exported and exported.group("interval") not in INTERVALS:
+        exported = None
+    folder = os.path.basename(os.path.dirname(path))
+    try:
+        data = normalize_frame(_read_table(path))
+    except Exception as e:
+        return {"path": path, "pieces": [], "rows": 0, "error": str(e)}
+
+    if exported:
+        interval = exported.group("interval")
+        exported_range = (pd.Timestamp(exported.group("start")), pd.Timestamp(exported.group("end")))
+    else:
+        interval = folder if folder in INTERVALS else default_interval
+        exported_range = None
+
+    if exported:
+        groups = [(exported.group("symbol").upper(), data.drop(columns="Symbol", errors="ignore"))]
+    elif "Symbol" in data.columns:
+        groups = [(symbol, frame.drop(columns="Symbol")) for symbol, frame in data.groupby("Symbol", sort=False)]
+    else:
+        groups = [((default_symbol or stem).upper(), data)]
+
+    pieces = [(symbol, interval, frame, exported_range) for symbol, frame in groups if not frame.empty]
+    return {"path": path, "pieces": pieces, "rows": len(data), "error": None}
+
+
+def _read_file_task(task: Tuple[str, Optional[str], str]) -> Dict[str, Any]:
+    """Picklable wrapper around read_file for the process pool"""
+    return read_file(*task)
+
+
+def _day_range(index: pd.DatetimeIndex) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """[first day, day after the last bar) in the index's own (exchange-local) time"""
+    first, last = index.min(), index.max()
+    if first.tzinfo is not None:
+        first, last = first.tz_localize(None), last.tz_localize(None)
+    return first.normalize(), last.normalize() + pd.Timedelta(days=1)
+
+
+def merge_series(symbol: str, interval: str,
+                 pieces: List[Tuple[pd.DataFrame, Optional[Tuple[pd.Timestamp, pd.Timestamp]]]],
+                 naive_tz: Optional[str] = None) -> Tuple[pd.DataFrame, List[Tuple[pd.Timestamp, pd.Timestamp]]]:
+    """
+    Combine the pieces of one series into a single frame in the store's timezone
+
+    The store's existing timezone wins; a new series takes naive_tz, else the
+    first named timezone among the files (e.g. from Parquet). Files with only
+    UTC offsets or naive timestamps don't name the exchange timezone the store
+    interprets date bounds in, so a new series made of them raises ValueError
+    unless naive_tz is given. Naive timestamps are read as naive_tz (or the
+    store's timezone). Later pieces win on duplicate bars.
+
+    Returns:
+        Tuple of (merged frame, covered date ranges)
+    """
+    frames = [frame for frame, _ in pieces]
+    meta = bar_store.read_meta(symbol, interval)
+    if meta:
+        store_tz = meta["tz"]
+    else:
+        named = [str(frame.index.tz) for frame in frames
+                 if frame.index.tz is not None and "/" in str(frame.index.tz)]
+        store_tz = naive_tz or (named[0] if named else None)
+        if store_tz is None:
+            raise ValueError("the files carry no exchange timezone; "
+                             "pass --tz (e.g. America/New_York) to create this series")
+    naive_tz = naive_tz or store_tz
+
+    today = pd.Timestamp.now().normalize()
+    aligned = []
+    covered = []
+    for frame, exported_range in pieces:
+        index = frame.index
+        if index.tz is None and naive_tz:
+            index = index.tz_localize(naive_tz, ambiguous="NaT", nonexistent="NaT")
+        if index.tz is not None:
+            index = index.tz_convert(store_tz) if store_tz else index.tz_convert(naive_tz or "UTC").tz_localize(None)
+        frame = frame.set_axis(index)[index.notna()]
+        if frame.empty:
+            continue
+        aligned.append(frame)
+
+        # Like update_store, ranges reaching today are only covered up to today
+        start, end = exported_range or _day_range(frame.index)
+        if start < today:
+            covered.append((start, min(end, today)))
+
+    if not aligned:
+        return pd.DataFrame(), []
+    merged = pd.concat(aligned) if len(aligned) > 1 else aligned[0]
+    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+    for column in EVENT_COLUMNS:
+        if column in merged.columns:
+            merged[column] = merged[column].fillna(0.0)
+    return merged, covered
+
+
+def import_directory(root: str,
+                     default_symbol: Optional[str] = None,
+                     default_interval: str = settings.INTERVAL,
+                     naive_tz: Optional[str] = None,
+                     max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Import every CSV/Parquet file below root into the bar store
+
+    Args:
+        root: Directory (or single file) to import
+        default_symbol: Symbol for files that name none themselves
+        default_interval: Interval for files that name none themselves
+        naive_tz: Exchange timezone of new series and of timestamps without a UTC offset
+        max_workers: Parser processes (default: one per CPU core)
+
+    Returns:
+        Summary with per-series row counts, skipped files and rows per second
+    """
+    paths = [root] if os.path.isfile(root) else find_files(root)
+    started = time.perf_counter()
+    if not paths:
+        return {"files": 0, "rows_read": 0, "rows_stored": 0, "series": [], "errors": [],
+                "seconds": 0.0, "rows_per_second": 0.0}
+
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    print(f"Bulk import: {len(paths)} files from {root}, {workers} workers")
+    tasks = [(path, default_symbol, default_interval) for path in paths]
+    if workers == 1:
+        results = [_read_file_task(task) for task in tasks]
+    else:
+        # Results come back in task order, which keeps the newest-file-wins order
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_file_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    parsed = time.perf_counter()
+
+    series: Dict[Tuple[str, str], list] = {}
+    errors = []
+    rows_read = 0
+    for result in results:
+        rows_read += result["rows"]
+        if result["error"]:
+            errors.append({"path": result["path"], "error": result["error"]})
+            print(f"Skipping {result['path']}: {result['error']}")
+        for symbol, interval, frame, exported_range in result["pieces"]:
+            series.setdefault((symbol, interval), []).append((frame, exported_range))
+    del results
+
+    # One store write per series: each write rewrites the whole series
+    summary = []
+    rows_stored = 0
+    for (symbol, interval), pieces in series.items():
+        try:
+            merged, covered = merge_series(symbol, interval, pieces, naive_tz)
+        except ValueError as e:
+            errors.append({"series": f"{symbol} {interval}", "error": str(e)})
+            print(f"Skipping {symbol} {interval}: {e}")
+            continue
+        if merged.empty:
+            continue
+        bar_store.write(symbol, interval, merged, covered)
+        rows_stored += len(merged)
+        summary.append({
+            "symbol": symbol,
+            "interval": interval,
+            "files": len(pieces),
+            "rows": len(merged),
+            "start": str(merged.index[0]),
+            "end": str(merged.index[-1]),
+        })
+
+    elapsed = time.perf_counter() - started
+    return {
+        "files": len(paths),
+        "rows_read": rows_read,
+        "rows_stored": rows_stored,
+        "series": summary,
+        "errors": errors,
+        "parse_seconds": round(parsed - started, 3),
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_read / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import CSV/Parquet OHLCV files into the local bar store")
+    parser.add_argument("path", help="Directory tree (or single file) to import")
+    parser.add_argument("--symbol", default=None, help="Symbol for files that don't name one (default: file name)")
+    parser.add_argument("--interval", default=settings.INTERVAL, help="Interval for files that don't name one")
+    parser.add_argument("--tz", default=None, help="Exchange timezone of new series and of timestamps without a UTC offset (e.g. America/New_York)")
+    parser.add_argument("--workers", type=int, default=0, help="Parser processes (0 = one per CPU core)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        parser.error(f"No such file or directory: {args.path}")
+
+    report = import_directory(args.path, args.symbol, args.interval, args.tz, args.workers or None)
+
+    print(f"{'symbol':<14} {'interval':<9} {'files':>6} {'rows':>12}  range")
+    for row in report["series"]:
+        print(f"{row['symbol']:<14} {row['interval']:<9} {row['files']:>6} {row['rows']:>12,}  {row['start']} .. {row['end']}")
+    print(f"{report['rows_read']:,} rows read from {report['files']} files, {report['rows_stored']:,} bars stored "
+          f"in {report['seconds']:.2f}s ({report['rows_per_second'] or 0:,.0f} rows/s, "
+          f"parsing {report.get('parse_seconds', 0):.2f}s), {len(report['errors'])} files or series skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
 import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError
+import pandas as pd
+import logging
 import os
+from typing import List, Optional, Tuple
 from config import settings
+from data_feed.bar_store import bar_store
+from backtest.instrumentation import timed_stage
+
+logger = logging.getLogger(__name__)
 
 # Configuration variables
 stock_symbol = settings.STOCK_SYMBOL
@@ -8,28 +16,135 @@ start_date = settings.START_DATE
 end_date = settings.END_DATE
 interval = settings.INTERVAL
 
+# Longest date range yfinance serves in one request, per intraday interval
+INTRADAY_WINDOW_DAYS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "90m": 60,
+    "60m": 730,
+    "1h": 730
+}
+
+def provider_chunks(start, end, data_interval: str) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """Split [start, end) into consecutive ranges the provider accepts in one request"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    window_days = INTRADAY_WINDOW_DAYS.get(data_interval)
+    if window_days is None:
+        return [(start, end)]
+    
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + pd.Timedelta(days=window_days), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end
+    return chunks
+
+def download_stock_data(symbol: str, start, end, data_interval: str) -> pd.DataFrame:
+    """
+    Download a date range straight from yfinance
+    
+    Intraday ranges longer than the provider allows per request are downloaded
+    in consecutive chunks and joined. A range the provider has no bars for gives
+    an empty frame; network and provider failures raise, so callers can tell
+    the two apart.
+    """
+    ticker = yf.Ticker(symbol)
+    pieces = []
+    for chunk_start, chunk_end in provider_chunks(start, end, data_interval):
+        try:
+            piece = ticker.history(
+                start=chunk_start,
+                end=chunk_end,
+                interval=data_interval,
+                raise_errors=True
+            )
+        except YFPricesMissingError:
+            # The provider answered, but has no bars in this range (holidays, before listing)
+            continue
+        if piece is not None and not piece.empty:
+            pieces.append(piece)
+    if not pieces:
+        return pd.DataFrame()
+    if len(pieces) == 1:
+        return pieces[0]
+    data = pd.concat(pieces)
+    return data[~data.index.duplicated(keep="last")]
+
+def update_store(symbol: str, start, end, data_interval: str):
+    """
+    Download the parts of a date range the local bar store does not hold yet
+    
+    Gaps are fetched one provider-sized chunk at a time, and each chunk that
+    downloads without an error is recorded as covered on its own, even when it
+    holds no bars (holidays, before listing). A failed chunk in the middle of a
+    long intraday range is retried on the next call without downloading the
+    rest again.
+    """
+    # Ranges ending today or later are not final yet, so only the part before today is
+    # recorded as covered and the rest is downloaded again on the next call
+    today = pd.Timestamp.now().normalize()
+    
+    missing = bar_store.missing_ranges(symbol, data_interval, start, end)
+    if not missing:
+        logger.info(f"Loading {symbol} {data_interval} bars from local store")
+        return
+    
+    for gap_start, gap_end in missing:
+        logger.info(f"Downloading {symbol} {data_interval} bars from {gap_start.date()} to {gap_end.date()}")
+        pieces = []
+        covered = []
+        for chunk_start, chunk_end in provider_chunks(gap_start, gap_end, data_interval):
+            try:
+                piece = download_stock_data(symbol, chunk_start, chunk_end, data_interval)
+            except Exception:
+                # Leave the chunk open so the next call retries it
+                logger.exception(f"Download of {symbol} {data_interval} bars from {chunk_start} to {chunk_end} failed")
+                continue
+            if not piece.empty:
+                pieces.append(piece)
+            if chunk_start < today:
+                covered.append((chunk_start, min(chunk_end, today)))
+        
+        # One store write per gap (each write rewrites the series, so not one per chunk)
+        if pieces or covered:
+            bar_store.write(symbol, data_interval, pd.concat(pieces) if pieces else pd.DataFrame(), covered)
+
+def fetch_from_store(symbol: str, start: str, end: str, data_interval: str) -> pd.DataFrame:
+    """
+    Serve a date range from the local bar store, downloading only the missing pieces
+    """
+    update_store(symbol, start, end, data_interval)
+    return bar_store.load(symbol, data_interval, start, end)
+
+@timed_stage("fetch")
 def fetch_stock_data(
         symbol: str=stock_symbol, 
         start: str=start_date, 
         end: str=end_date, 
         data_interval: str=interval, 
-        save_to_file=False
+        save_to_file=False,
+        use_store: Optional[bool]=None
     ):
     
     """
     Fetch stock data using yfinance and return as pandas DataFrame
+    Bars are served from the local bar store when enabled, so only date ranges
+    that were never downloaded before hit the network
     Optional: save data to CSV file in data_feed folder
     """
     
-    # Create ticker object
-    ticker = yf.Ticker(symbol)
+    if use_store is None:
+        use_store = settings.USE_DATA_STORE
     
     # Download historical data
-    data = ticker.history(
-        start=start,
-        end=end,
-        interval=data_interval
-    )
+    if use_store:
+        data = fetch_from_store(symbol, start, end, data_interval)
+    else:
+        data = download_stock_data(symbol, start, end, data_interval)
     
     # Save to file if requested
     if save_to_file and not data.empty:
@@ -38,7 +153,8 @@ def fetch_stock_data(
         filepath = os.path.join(os.path.dirname(__file__), filename)
         
         # Save to CSV
-        data.to_csv(filepath)
+        with timed_stage("csv_export"):
+            data.to_csv(filepath)
         return data, filepath
     
     return data
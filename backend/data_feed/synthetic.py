@@ -0,0 +1,54 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def generate_bars(n_bars: int,
+                  start: str = "2020-01-01",
+                  freq: str = "B",
+                  initial_price: float = 100.0,
+                  drift: float = 0.0002,
+                  volatility: float = 0.02,
+                  seed: Optional[int] = None,
+                  tz: str = "America/New_York") -> pd.DataFrame:
+    """
+    Synthetic OHLCV bars from a geometric Brownian motion
+
+    The frame has the same columns and index name as a yfinance download, so it
+    can stand in for real data in replays and benchmarks without a network.
+
+    Args:
+        n_bars: Number of bars to generate
+        start: Timestamp of the first bar
+        freq: Pandas frequency between bars ("B" for business days, "1min", ...)
+        initial_price: Close of the first bar
+        drift: Mean log return per bar
+        volatility: Standard deviation of the log return per bar
+        seed: Random seed for reproducible series
+
+    Returns:
+        DataFrame with Open, High, Low, Close, Volume, Dividends and Stock Splits
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start=start, periods=n_bars, freq=freq, tz=tz, name="Date")
+
+    log_returns = rng.normal(drift, volatility, n_bars)
+    log_returns[0] = 0.0
+    close = initial_price * np.exp(np.cumsum(log_returns))
+
+    # Open at the previous close; high/low extend past the body by a random range
+    open_ = np.concatenate(([initial_price], close[:-1]))
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    wick = np.abs(rng.normal(0.0, volatility / 2, (2, n_bars)))
+
+    return pd.DataFrame({
+        "Open": open_,
+        "High": body_high * (1 + wick[0]),
+        "Low": body_low * (1 - wick[1]),
+        "Close": close,
+        "Volume": rng.integers(100_000, 10_000_000, n_bars),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0
+    }, index=index)
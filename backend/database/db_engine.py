@@ -1,37 +1,122 @@
 import sqlite3
-from typing import Optional, List, Dict, Any
+import os
+import threading
+from typing import Optional, List, Dict, Any, Tuple
 import logging
 import json
+from config import settings
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Result metrics stored as real columns of backtest_jobs, so completed runs can be
+# filtered and ranked in SQL without parsing the results JSON
+BACKTEST_METRIC_COLUMNS = {
+    "strategy_name": "TEXT",
+    "stock_symbol": "TEXT",
+    "total_return_pct": "REAL",
+    "total_trades": "INTEGER",
+    "win_rate_pct": "REAL",
+    "sharpe_ratio": "REAL",
+    "sortino_ratio": "REAL",
+    "cagr_pct": "REAL",
+    "max_drawdown_pct": "REAL",
+    "max_drawdown_duration_days": "REAL",
+    "exposure_pct": "REAL",
+    "profit_factor": "REAL",
+    "avg_trade_duration_days": "REAL",
+}
+
+# Every backtest_jobs column except the results JSON, for status reads
+JOB_STATUS_COLUMNS = ", ".join(
+    ["backtest_id", "status", "request_params", "error_message", "timings", "params_hash", "data_version"]
+    + list(BACKTEST_METRIC_COLUMNS) + ["created_at", "updated_at"]
+)
+
+# Columns of the trades table that can be selected by name
+TRADE_COLUMNS = ("trade_id", "strategy_name", "stock_symbol", "trade_type", "quantity", "entry_price",
+                 "exit_price", "entry_timestamp", "exit_timestamp", "pnl", "days_held", "backtest_id",
+                 "created_at", "updated_at")
+
+# Metric columns with an index (over completed jobs) for ranking and range filters
+INDEXED_METRIC_COLUMNS = ("total_return_pct", "sharpe_ratio", "sortino_ratio", "cagr_pct",
+                          "max_drawdown_pct", "profit_factor")
+
+# Job statuses: PENDING jobs wait in the executor queue (FIFO by insertion order)
+BACKTEST_JOBS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        backtest_id TEXT PRIMARY KEY,
+        status TEXT NOT NULL CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED')),
+        request_params TEXT NOT NULL,
+        results TEXT,
+        error_message TEXT,
+        timings TEXT,
+        params_hash TEXT,
+        data_version TEXT,
+        {metric_columns},
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+def _metric_columns_sql() -> str:
+    """Column definitions of the metric columns for BACKTEST_JOBS_SCHEMA"""
+    return ",\n        ".join(f"{name} {sql_type}" for name, sql_type in BACKTEST_METRIC_COLUMNS.items())
+
 class DatabaseEngine:
     """
     SQLite Database Engine for Trading System
     Manages trades table with all required columns and operations
     """
     
-    def __init__(self, db_path = "trade_data.db"):
+    def __init__(self, db_path: str = settings.DB_PATH):
         """Initialize database connection and create tables"""
         self.db_path = db_path
+        self._local = threading.local()
         self.init_database()
     
     def get_connection(self):
-        """Get database connection"""
+        """
+        Get this thread's long-lived database connection
+        Connections are opened once per thread (and again after a fork), tuned with the
+        DB_* pragmas from settings, and cache their prepared statements between calls
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=settings.DB_BUSY_TIMEOUT,
+                cached_statements=settings.DB_STATEMENT_CACHE_SIZE
+            )
             conn.row_factory = sqlite3.Row  # Enable column access by name
+            conn.execute(f"PRAGMA journal_mode = {settings.DB_JOURNAL_MODE}")
+            conn.execute(f"PRAGMA synchronous = {settings.DB_SYNCHRONOUS}")
+            conn.execute(f"PRAGMA cache_size = {int(settings.DB_CACHE_SIZE)}")
+            conn.execute(f"PRAGMA mmap_size = {int(settings.DB_MMAP_SIZE)}")
+            conn.execute("PRAGMA temp_store = MEMORY")
+            
+            self._local.conn = conn
+            self._local.pid = os.getpid()
             return conn
         except sqlite3.Error as e:
             logger.error(f"Database connection error: {e}")
             raise
     
+    def close(self):
+        """Close the calling thread's connection (a new one is opened on next use)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+    
     def init_database(self):
         """Initialize database and create tables"""
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             # Create trades table with all required columns
@@ -62,50 +147,133 @@ class DatabaseEngine:
                 # Column already exists, ignore error
                 pass
             
-            # Create index for better query performance
+            # Indexes matching the trade listing filters, each ending in entry_timestamp so a
+            # page is read in order straight off the index (trade_id, the rowid, comes last implicitly)
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_trades_symbol_strategy 
-                ON trades(stock_symbol, strategy_name)
+                CREATE INDEX IF NOT EXISTS idx_trades_timestamp 
+                ON trades(entry_timestamp)
             ''')
             
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_trades_timestamp 
-                ON trades(entry_timestamp)
+                CREATE INDEX IF NOT EXISTS idx_trades_backtest_timestamp 
+                ON trades(backtest_id, entry_timestamp)
             ''')
             
-            # Create index for backtest_id
             cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_trades_backtest_id 
-                ON trades(backtest_id)
+                CREATE INDEX IF NOT EXISTS idx_trades_strategy_symbol_timestamp 
+                ON trades(strategy_name, stock_symbol, entry_timestamp)
             ''')
             
-            # Create backtest_jobs table
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS backtest_jobs (
-                    backtest_id TEXT PRIMARY KEY,
-                    status TEXT NOT NULL CHECK (status IN ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')),
-                    request_params TEXT NOT NULL,
-                    results TEXT,
-                    error_message TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
+                CREATE INDEX IF NOT EXISTS idx_trades_symbol_timestamp 
+                ON trades(stock_symbol, entry_timestamp)
             ''')
             
+            # Superseded by the composite indexes above
+            cursor.execute('DROP INDEX IF EXISTS idx_trades_symbol_strategy')
+            cursor.execute('DROP INDEX IF EXISTS idx_trades_backtest_id')
+            
+            # Create backtest_jobs table
+            cursor.execute(BACKTEST_JOBS_SCHEMA.format(table="backtest_jobs", metric_columns=_metric_columns_sql()))
+            
+            # Tables created before job cancellation existed reject the CANCELLED status
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'backtest_jobs'")
+            if "'CANCELLED'" not in cursor.fetchone()[0]:
+                self._rebuild_backtest_jobs(cursor)
+            
+            # Stage timings and counters of each job (added after the table was first released)
+            cursor.execute("PRAGMA table_info(backtest_jobs)")
+            job_columns = {row["name"] for row in cursor.fetchall()}
+            if "timings" not in job_columns:
+                cursor.execute("ALTER TABLE backtest_jobs ADD COLUMN timings TEXT")
+            
+            # Request hash and data version used to reuse identical jobs
+            for column in ("params_hash", "data_version"):
+                if column not in job_columns:
+                    cursor.execute(f"ALTER TABLE backtest_jobs ADD COLUMN {column} TEXT")
+            
+            # Result metric columns
+            for column, sql_type in BACKTEST_METRIC_COLUMNS.items():
+                if column not in job_columns:
+                    cursor.execute(f"ALTER TABLE backtest_jobs ADD COLUMN {column} {sql_type}")
+            
             # Create index for backtest jobs
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_backtest_status 
                 ON backtest_jobs(status)
             ''')
             
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_backtest_params_hash 
+                ON backtest_jobs(params_hash, status)
+            ''')
+            
+            # Partial indexes: rankings only ever look at completed jobs
+            for column in INDEXED_METRIC_COLUMNS:
+                cursor.execute(f'''
+                    CREATE INDEX IF NOT EXISTS idx_backtest_{column} 
+                    ON backtest_jobs({column}) WHERE status = 'COMPLETED'
+                ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_backtest_strategy_symbol 
+                ON backtest_jobs(strategy_name, stock_symbol) WHERE status = 'COMPLETED'
+            ''')
+            
+            # Create backtest_frames table holding the computed strategy frame of each job
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS backtest_frames (
+                    backtest_id TEXT PRIMARY KEY,
+                    frame BLOB NOT NULL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Strategy frames of chunked (out-of-core) jobs, written one chunk at a time
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS backtest_frame_chunks (
+                    backtest_id TEXT NOT NULL,
+                    chunk INTEGER NOT NULL,
+                    frame BLOB NOT NULL,
+                    PRIMARY KEY (backtest_id, chunk)
+                )
+            ''')
+            
+            # Create backtest_curves table holding per-bar series (equity curves) as compressed
+            # binary arrays, kept out of backtest_jobs so job and metric reads never load them
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS backtest_curves (
+                    backtest_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (backtest_id, name)
+                )
+            ''')
+            
             conn.commit()
             logger.info("Database initialized successfully")
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Database initialization error: {e}")
             raise
-        finally:
-            conn.close()
+    
+    def _rebuild_backtest_jobs(self, cursor):
+        """Recreate backtest_jobs with the current schema, keeping rows and queue order"""
+        cursor.execute("PRAGMA table_info(backtest_jobs)")
+        old_columns = [row["name"] for row in cursor.fetchall()]
+        
+        cursor.execute(BACKTEST_JOBS_SCHEMA.format(table="backtest_jobs_new", metric_columns=_metric_columns_sql()))
+        cursor.execute("PRAGMA table_info(backtest_jobs_new)")
+        columns = ", ".join(row["name"] for row in cursor.fetchall() if row["name"] in old_columns)
+        
+        cursor.execute(f'''
+            INSERT INTO backtest_jobs_new ({columns})
+            SELECT {columns} FROM backtest_jobs ORDER BY rowid
+        ''')
+        cursor.execute("DROP TABLE backtest_jobs")
+        cursor.execute("ALTER TABLE backtest_jobs_new RENAME TO backtest_jobs")
+        logger.info("Rebuilt backtest_jobs table with CANCELLED status")
     
     def insert_trade(self, 
                     strategy_name: str,
@@ -123,8 +291,8 @@ class DatabaseEngine:
         Insert a new trade into the database
         Returns the trade_id of the inserted trade
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -143,10 +311,44 @@ class DatabaseEngine:
             return trade_id
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error inserting trade: {e}")
             raise
-        finally:
-            conn.close()
+    
+    def insert_trades(self, trades: List[Dict[str, Any]]) -> int:
+        """
+        Insert many complete trades in a single transaction
+        Each trade dict uses the same keys as insert_trade's arguments
+        Returns the number of trades inserted
+        """
+        if not trades:
+            return 0
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.executemany('''
+                INSERT INTO trades (
+                    strategy_name, stock_symbol, trade_type, quantity,
+                    entry_price, exit_price, entry_timestamp, exit_timestamp,
+                    pnl, days_held, backtest_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (t["strategy_name"], t["stock_symbol"], t["trade_type"], t["quantity"],
+                 t["entry_price"], t.get("exit_price"), t["entry_timestamp"], t.get("exit_timestamp"),
+                 t.get("pnl") or 0.0, t.get("days_held") or 0, t.get("backtest_id"))
+                for t in trades
+            ])
+            
+            conn.commit()
+            logger.info(f"Inserted {len(trades)} trades in one batch")
+            return len(trades)
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error inserting trades: {e}")
+            raise
     
     def update_trade_exit(self, 
                          trade_id: int,
@@ -157,8 +359,8 @@ class DatabaseEngine:
         """
         Update trade with exit information
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -168,8 +370,9 @@ class DatabaseEngine:
                 WHERE trade_id = ?
             ''', (exit_price, exit_timestamp, pnl, days_held, trade_id))
             
+            # Commit even when nothing matched, so the reused connection doesn't stay in a write transaction
+            conn.commit()
             if cursor.rowcount > 0:
-                conn.commit()
                 logger.info(f"Trade {trade_id} updated successfully")
                 return True
             else:
@@ -177,10 +380,9 @@ class DatabaseEngine:
                 return False
                 
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error updating trade: {e}")
             raise
-        finally:
-            conn.close()
     
     def get_trades(self, 
                   stock_symbol: Optional[str] = None,
@@ -190,8 +392,8 @@ class DatabaseEngine:
         """
         Retrieve trades with optional filtering
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             query = "SELECT * FROM trades WHERE 1=1"
@@ -223,33 +425,161 @@ class DatabaseEngine:
             return trades
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error retrieving trades: {e}")
             raise
-        finally:
-            conn.close()
     
-    def create_backtest_job(self, backtest_id: str, request_params: str) -> bool:
+    def get_trades_page(self,
+                        columns: Dict[str, str],
+                        stock_symbol: Optional[str] = None,
+                        strategy_name: Optional[str] = None,
+                        backtest_id: Optional[str] = None,
+                        after: Optional[Tuple[str, int]] = None,
+                        limit: int = 1000) -> Tuple[List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """
+        One page of trades, newest first, using keyset pagination
+        
+        Trades are ordered by (entry_timestamp, trade_id) descending and a page
+        starts right after the key of the previous page's last trade, so every
+        page is an index range scan no matter how deep it is.
+        
+        Args:
+            columns: Output name -> trades column, in the order wanted (only these are read)
+            after: (entry_timestamp, trade_id) of the last trade already returned
+            limit: Maximum number of trades on the page
+            
+        Returns:
+            Tuple of (trades as dicts keyed by output name, key to pass as after
+            for the next page or None on the last page)
+        """
+        for column in columns.values():
+            if column not in TRADE_COLUMNS:
+                raise ValueError(f"Unknown trades column '{column}'")
+        
+        conn = self.get_connection()
+        try:
+            # Plain tuples: each row becomes exactly one response dict below
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            
+            # The key columns go last so they are read even when not projected
+            query = f"SELECT {', '.join(columns.values())}, entry_timestamp, trade_id FROM trades WHERE 1=1"
+            params: List[Any] = []
+            
+            if stock_symbol:
+                query += " AND stock_symbol = ?"
+                params.append(stock_symbol)
+            
+            if strategy_name:
+                query += " AND strategy_name = ?"
+                params.append(strategy_name)
+            
+            if backtest_id:
+                query += " AND backtest_id = ?"
+                params.append(backtest_id)
+            
+            if after:
+                query += " AND (entry_timestamp, trade_id) < (?, ?)"
+                params.extend(after)
+            
+            # One extra row tells whether another page follows
+            query += " ORDER BY entry_timestamp DESC, trade_id DESC LIMIT ?"
+            params.append(limit + 1)
+            
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            
+            next_key = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_key = (rows[-1][-2], rows[-1][-1])
+            
+            # zip stops at the projected names, leaving out the trailing key columns
+            names = list(columns)
+            return [dict(zip(names, row)) for row in rows], next_key
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving trades page: {e}")
+            raise
+    
+    def create_backtest_job(self, backtest_id: str, request_params: str,
+                            params_hash: Optional[str] = None,
+                            data_version: Optional[str] = None) -> bool:
         """
         Create a new backtest job with PENDING status
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
-                INSERT INTO backtest_jobs (backtest_id, status, request_params)
-                VALUES (?, 'PENDING', ?)
-            ''', (backtest_id, request_params))
+                INSERT INTO backtest_jobs (backtest_id, status, request_params, params_hash, data_version)
+                VALUES (?, 'PENDING', ?, ?, ?)
+            ''', (backtest_id, request_params, params_hash, data_version))
             
             conn.commit()
             logger.info(f"Backtest job {backtest_id} created successfully")
             return True
             
         except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error creating backtest job: {e}")
+            raise
+    
+    def find_or_create_backtest_job(self, backtest_id: str, request_params: str,
+                                    params_hash: str, data_version: Optional[str]) -> Dict[str, Any]:
+        """
+        Reuse a job with the same request hash, or create a new PENDING job
+        
+        A job still PENDING or RUNNING is reused regardless of data version (it reads
+        the same bars a new job would); a COMPLETED job only when the data version it
+        read (recorded when it completed) is the current one. Lookup and insert run in one write transaction, so two
+        identical requests arriving together never both create a job.
+        
+        Returns:
+            Dict with backtest_id, status and created (False when an existing job is reused)
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            cursor.execute('''
+                SELECT backtest_id, status FROM backtest_jobs
+                WHERE params_hash = ? AND status IN ('PENDING', 'RUNNING')
+                ORDER BY rowid
+                LIMIT 1
+            ''', (params_hash,))
+            row = cursor.fetchone()
+            
+            if row is None and data_version is not None:
+                cursor.execute('''
+                    SELECT backtest_id, status FROM backtest_jobs
+                    WHERE params_hash = ? AND status = 'COMPLETED' AND data_version = ?
+                    ORDER BY rowid DESC
+                    LIMIT 1
+                ''', (params_hash, data_version))
+                row = cursor.fetchone()
+            
+            if row is not None:
+                conn.commit()
+                logger.info(f"Reusing backtest job {row['backtest_id']} ({row['status']})")
+                return {"backtest_id": row["backtest_id"], "status": row["status"], "created": False}
+            
+            cursor.execute('''
+                INSERT INTO backtest_jobs (backtest_id, status, request_params, params_hash, data_version)
+                VALUES (?, 'PENDING', ?, ?, ?)
+            ''', (backtest_id, request_params, params_hash, data_version))
+            
+            conn.commit()
+            logger.info(f"Backtest job {backtest_id} created successfully")
+            return {"backtest_id": backtest_id, "status": "PENDING", "created": True}
+            
+        except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error creating backtest job: {e}")
             raise
-        finally:
-            conn.close()
     
     def update_backtest_status(self, backtest_id: str, status: str, 
                               results: Optional[str] = None, 
@@ -257,8 +587,8 @@ class DatabaseEngine:
         """
         Update backtest job status and optionally results or error message
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -267,8 +597,9 @@ class DatabaseEngine:
                 WHERE backtest_id = ?
             ''', (status, results, error_message, backtest_id))
             
+            # Commit even when nothing matched, so the reused connection doesn't stay in a write transaction
+            conn.commit()
             if cursor.rowcount > 0:
-                conn.commit()
                 logger.info(f"Backtest job {backtest_id} status updated to {status}")
                 return True
             else:
@@ -276,21 +607,23 @@ class DatabaseEngine:
                 return False
                 
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error updating backtest job: {e}")
             raise
-        finally:
-            conn.close()
     
-    def get_backtest_job(self, backtest_id: str) -> Optional[Dict[Any, Any]]:
+    def get_backtest_job(self, backtest_id: str, include_results: bool = True) -> Optional[Dict[Any, Any]]:
         """
         Get a specific backtest job by ID
+        
+        Status checks pass include_results=False to skip reading the results JSON.
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT * FROM backtest_jobs WHERE backtest_id = ?
+            columns = "*" if include_results else JOB_STATUS_COLUMNS
+            cursor.execute(f'''
+                SELECT {columns} FROM backtest_jobs WHERE backtest_id = ?
             ''', (backtest_id,))
             
             row = cursor.fetchone()
@@ -299,17 +632,290 @@ class DatabaseEngine:
             return None
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error retrieving backtest job: {e}")
             raise
-        finally:
-            conn.close()
+    
+    @staticmethod
+    def _merge_timings(timings: Optional[Dict[str, Any]]) -> Tuple[str, list]:
+        """
+        SQL expression (and its parameters) that sets keys of the timings JSON column
+        in place, so writers of different keys never overwrite each other
+        """
+        if not timings:
+            return "timings", []
+        pairs = ", ".join("?, json(?)" for _ in timings)
+        params = [value for key, entry in timings.items() for value in (f"$.{key}", json.dumps(entry))]
+        return f"json_set(COALESCE(timings, '{{}}'), {pairs})", params
+    
+    def transition_backtest_status(self, backtest_id: str, from_statuses: List[str], to_status: str,
+                                   error_message: Optional[str] = None,
+                                   results: Optional[str] = None,
+                                   timings: Optional[Dict[str, Any]] = None,
+                                   data_version: Optional[str] = None) -> bool:
+        """
+        Move a job to a new status only if it is currently in one of from_statuses
+        Returns True if this call made the transition (used to claim, cancel and finish jobs)
+        
+        timings entries (e.g. {"run": {...}}) and the data version the job read are
+        stored in the same update as the new status
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            placeholders = ", ".join("?" for _ in from_statuses)
+            timings_sql, timings_params = self._merge_timings(timings)
+            cursor.execute(f'''
+                UPDATE backtest_jobs 
+                SET status = ?, error_message = COALESCE(?, error_message), results = COALESCE(?, results),
+                    timings = {timings_sql}, data_version = COALESCE(?, data_version),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE backtest_id = ? AND status IN ({placeholders})
+            ''', (to_status, error_message, results, *timings_params, data_version,
+                  backtest_id, *from_statuses))
+            
+            conn.commit()
+            if cursor.rowcount > 0:
+                logger.info(f"Backtest job {backtest_id} status updated to {to_status}")
+                return True
+            return False
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error updating backtest job: {e}")
+            raise
+    
+    def get_next_pending_job(self) -> Optional[Dict[Any, Any]]:
+        """
+        Get the oldest PENDING job (FIFO by insertion order)
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT backtest_id, request_params FROM backtest_jobs
+                WHERE status = 'PENDING'
+                ORDER BY rowid
+                LIMIT 1
+            ''')
+            
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+            return None
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving next pending job: {e}")
+            raise
+    
+    def get_pending_job_ids(self) -> List[str]:
+        """
+        IDs of all PENDING jobs in queue order
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT backtest_id FROM backtest_jobs
+                WHERE status = 'PENDING'
+                ORDER BY rowid
+            ''')
+            
+            return [row["backtest_id"] for row in cursor.fetchall()]
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving pending jobs: {e}")
+            raise
+    
+    def get_queue_position(self, backtest_id: str) -> Optional[int]:
+        """
+        1-based position of a PENDING job in the queue, None if the job is not waiting
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT COUNT(*) FROM backtest_jobs
+                WHERE status = 'PENDING'
+                  AND rowid <= (SELECT rowid FROM backtest_jobs WHERE backtest_id = ? AND status = 'PENDING')
+            ''', (backtest_id,))
+            
+            position = cursor.fetchone()[0]
+            return position if position > 0 else None
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving queue position: {e}")
+            raise
+    
+    def requeue_running_jobs(self) -> int:
+        """
+        Put jobs left RUNNING by a previous server process back into the queue
+        Returns the number of jobs requeued
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE backtest_jobs 
+                SET status = 'PENDING', updated_at = CURRENT_TIMESTAMP
+                WHERE status = 'RUNNING'
+            ''')
+            
+            conn.commit()
+            if cursor.rowcount > 0:
+                logger.info(f"Requeued {cursor.rowcount} interrupted backtest jobs")
+            return cursor.rowcount
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error requeuing backtest jobs: {e}")
+            raise
+    
+    def save_job_timings(self, backtest_id: str, timings: Dict[str, Any]) -> bool:
+        """
+        Store stage timings and counters under keys of a backtest job's timings (JSON),
+        keeping the other keys
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            timings_sql, timings_params = self._merge_timings(timings)
+            cursor.execute(f'''
+                UPDATE backtest_jobs SET timings = {timings_sql} WHERE backtest_id = ?
+            ''', (*timings_params, backtest_id))
+            
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error saving backtest job timings: {e}")
+            raise
+    
+    def get_backtest_job_timings(self) -> List[Dict[Any, Any]]:
+        """
+        Get ID, status and stored timings of every job that has timings
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT backtest_id, status, timings FROM backtest_jobs WHERE timings IS NOT NULL
+            ''')
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving backtest job timings: {e}")
+            raise
+    
+    def count_backtest_jobs_by_status(self) -> Dict[str, int]:
+        """
+        Number of backtest jobs in each status
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT status, COUNT(*) AS job_count FROM backtest_jobs GROUP BY status
+            ''')
+            
+            return {row["status"]: row["job_count"] for row in cursor.fetchall()}
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error counting backtest jobs: {e}")
+            raise
+    
+    def save_backtest_metrics(self, backtest_id: str, metrics: Dict[str, Any]) -> bool:
+        """
+        Store the result metrics of a job in its metric columns (keys that are not
+        metric columns are ignored)
+        """
+        values = {name: metrics[name] for name in BACKTEST_METRIC_COLUMNS if name in metrics}
+        if not values:
+            return False
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            assignments = ", ".join(f"{name} = ?" for name in values)
+            cursor.execute(f'''
+                UPDATE backtest_jobs SET {assignments} WHERE backtest_id = ?
+            ''', (*values.values(), backtest_id))
+            
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error saving backtest metrics: {e}")
+            raise
+    
+    def rank_backtest_jobs(self,
+                           order_by: str = "sharpe_ratio",
+                           descending: bool = True,
+                           limit: int = 50,
+                           equals: Optional[Dict[str, Any]] = None,
+                           minimums: Optional[Dict[str, float]] = None,
+                           maximums: Optional[Dict[str, float]] = None) -> List[Dict[Any, Any]]:
+        """
+        Completed jobs ranked by a metric column, with optional filters
+        
+        Only the metric columns are read, never the results JSON. Jobs without a
+        value for order_by (e.g. no volatility, so no Sharpe ratio) are left out.
+        
+        Args:
+            equals: Column -> required value (e.g. strategy_name)
+            minimums: Column -> lowest allowed value
+            maximums: Column -> highest allowed value
+        """
+        filters = [(column, "=", value) for column, value in (equals or {}).items()]
+        filters += [(column, ">=", value) for column, value in (minimums or {}).items()]
+        filters += [(column, "<=", value) for column, value in (maximums or {}).items()]
+        for column in [order_by] + [column for column, _, _ in filters]:
+            if column not in BACKTEST_METRIC_COLUMNS:
+                raise ValueError(f"Unknown metric column '{column}'. Available columns: {', '.join(BACKTEST_METRIC_COLUMNS)}")
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            where = "".join(f" AND {column} {op} ?" for column, op, _ in filters)
+            cursor.execute(f'''
+                SELECT backtest_id, created_at, updated_at, {", ".join(BACKTEST_METRIC_COLUMNS)}
+                FROM backtest_jobs
+                WHERE status = 'COMPLETED' AND {order_by} IS NOT NULL{where}
+                ORDER BY {order_by} {"DESC" if descending else "ASC"}
+                LIMIT ?
+            ''', (*[value for _, _, value in filters], limit))
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error ranking backtest jobs: {e}")
+            raise
     
     def get_all_backtest_jobs(self, status: Optional[str] = None) -> List[Dict[Any, Any]]:
         """
         Get all backtest jobs, optionally filtered by status
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             if status:
@@ -326,18 +932,147 @@ class DatabaseEngine:
             return [dict(row) for row in rows]
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error retrieving backtest jobs: {e}")
             raise
-        finally:
-            conn.close()
+    
+    def save_strategy_frame(self, backtest_id: str, frame: bytes) -> bool:
+        """
+        Store the serialized strategy frame of a backtest job
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO backtest_frames (backtest_id, frame)
+                VALUES (?, ?)
+            ''', (backtest_id, sqlite3.Binary(frame)))
+            
+            conn.commit()
+            logger.info(f"Strategy frame for backtest {backtest_id} saved ({len(frame)} bytes)")
+            return True
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error saving strategy frame: {e}")
+            raise
+    
+    def get_strategy_frame(self, backtest_id: str) -> Optional[bytes]:
+        """
+        Get the serialized strategy frame of a backtest job, if one was stored
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT frame FROM backtest_frames WHERE backtest_id = ?
+            ''', (backtest_id,))
+            
+            row = cursor.fetchone()
+            if row:
+                return bytes(row["frame"])
+            return None
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving strategy frame: {e}")
+            raise
+    
+    def save_strategy_frame_chunk(self, backtest_id: str, chunk: int, frame: bytes) -> bool:
+        """
+        Store one serialized chunk of the strategy frame of a chunked backtest job
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO backtest_frame_chunks (backtest_id, chunk, frame)
+                VALUES (?, ?, ?)
+            ''', (backtest_id, chunk, sqlite3.Binary(frame)))
+            
+            conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error saving strategy frame chunk: {e}")
+            raise
+    
+    def get_strategy_frame_chunk(self, backtest_id: str, chunk: int) -> Optional[bytes]:
+        """
+        Get one serialized strategy frame chunk of a job, or None past the last chunk
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT frame FROM backtest_frame_chunks WHERE backtest_id = ? AND chunk = ?
+            ''', (backtest_id, chunk))
+            
+            row = cursor.fetchone()
+            if row:
+                return bytes(row["frame"])
+            return None
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving strategy frame chunk: {e}")
+            raise
+    
+    def save_backtest_curve(self, backtest_id: str, name: str, data: bytes) -> bool:
+        """
+        Store one serialized per-bar series of a backtest job (e.g. "portfolio_value")
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO backtest_curves (backtest_id, name, data)
+                VALUES (?, ?, ?)
+            ''', (backtest_id, name, sqlite3.Binary(data)))
+            
+            conn.commit()
+            return True
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error saving backtest curve: {e}")
+            raise
+    
+    def get_backtest_curve(self, backtest_id: str, name: str) -> Optional[bytes]:
+        """
+        Get one serialized per-bar series of a backtest job, if one was stored
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT data FROM backtest_curves WHERE backtest_id = ? AND name = ?
+            ''', (backtest_id, name))
+            
+            row = cursor.fetchone()
+            if row:
+                return bytes(row["data"])
+            return None
+            
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Error retrieving backtest curve: {e}")
+            raise
     
     def delete_all_trades(self) -> int:
         """
         Delete all trades from the database
         Returns the number of trades deleted
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             # Get count before deletion
@@ -352,36 +1087,37 @@ class DatabaseEngine:
             return count
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error deleting trades: {e}")
             raise
-        finally:
-            conn.close()
     
     def delete_all_backtests(self) -> int:
         """
         Delete all backtest jobs from the database
         Returns the number of backtest jobs deleted
         """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             # Get count before deletion
             cursor.execute('SELECT COUNT(*) FROM backtest_jobs')
             count = cursor.fetchone()[0]
             
-            # Delete all backtest jobs
+            # Delete all backtest jobs and their stored strategy frames and curves
             cursor.execute('DELETE FROM backtest_jobs')
+            cursor.execute('DELETE FROM backtest_frames')
+            cursor.execute('DELETE FROM backtest_frame_chunks')
+            cursor.execute('DELETE FROM backtest_curves')
             conn.commit()
             
             logger.info(f"Deleted {count} backtest jobs from database")
             return count
             
         except sqlite3.Error as e:
+            conn.rollback()
             logger.error(f"Error deleting backtest jobs: {e}")
             raise
-        finally:
-            conn.close()
 
 # Create a global database instance
 db_engine = DatabaseEngine()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import io
+import json
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+def serialize_frame(data: pd.DataFrame) -> bytes:
+    """
+    Encode a strategy DataFrame as a compressed NumPy archive
+
+    The index is stored as int64 UTC nanoseconds plus its timezone, and every column
+    as its own typed array, so the frame round-trips exactly without pickle.
+    """
+    index = pd.DatetimeIndex(data.index)
+    tz = str(index.tz) if index.tz is not None else None
+    if tz:
+        index = index.tz_convert("UTC").tz_localize(None)
+
+    meta = {
+        "tz": tz,
+        "index_name": data.index.name,
+        "columns": [str(c) for c in data.columns],
+    }
+    arrays = {
+        "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+        "index": index.asi8.astype(np.int64),
+    }
+    for i, column in enumerate(data.columns):
+        arrays[f"col{i}"] = data[column].to_numpy()
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def deserialize_frame(payload: bytes) -> pd.DataFrame:
+    """Decode a frame written by serialize_frame"""
+    with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+        meta = json.loads(archive["meta"].tobytes().decode("utf-8"))
+        index = pd.DatetimeIndex(archive["index"].view("datetime64[ns]"), name=meta["index_name"])
+        if meta["tz"]:
+            index = index.tz_localize("UTC").tz_convert(meta["tz"])
+        columns = {column: archive[f"col{i}"] for i, column in enumerate(meta["columns"])}
+
+    return pd.DataFrame(columns, index=index)
+
+
+def serialize_curve(values) -> bytes:
+    """Encode a numeric series (e.g. an equity curve) as zlib-compressed float64 bytes"""
+    return zlib.compress(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+
+
+def deserialize_curve(payload: bytes) -> np.ndarray:
+    """
+    Decode a curve written by serialize_curve
+
+    The array is a read-only view of the decompressed bytes (no copy into a list
+    or a second buffer); copy it before modifying it.
+    """
+    return np.frombuffer(zlib.decompress(payload), dtype=np.float64)
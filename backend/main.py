@@ -1,21 +1,54 @@
-from fastapi import FastAPI, BackgroundTasks, Query
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uvicorn
-from strategy.ma_crossover import ma_crossover_strategy
-from strategy.bollinger_bands import bollinger_bands_strategy
+from strategy.registry import get_strategy
 from config import settings
 from backtest.backtesting_engine import backtest_strategy
+from backtest.chunked import run_chunked_backtest
+from backtest.sweep import run_parameter_sweep, build_combinations
+from backtest.portfolio import run_portfolio_backtest
+from backtest.multi_strategy import run_multi_strategy_backtest
+from backtest.walk_forward import run_walk_forward, build_folds
+from backtest.monte_carlo import run_monte_carlo
+from backtest.risk_metrics import RISK_METRIC_NAMES
+from backtest.job_executor import backtest_executor
+from backtest.job_events import job_event_bus, publish_job_event, TERMINAL_STATUSES
+from backtest.instrumentation import (
+    StageTimer, timed_stage, job_timings, store_job_timings, results_metrics, render_prometheus_metrics
+)
+from backtest.request_hash import request_params_hash, request_data_version, read_data_version
+from backtest.chart_data import chart_columns, equity_columns, columns_to_records, iter_chart_ndjson
+from backtest.downsampling import window_positions, signal_positions, downsample_ohlc
 from database.db_engine import db_engine
-from typing import Dict, Any, Optional
+from data_feed.bar_store import record_reads
+from database.serialization import serialize_frame, deserialize_frame, serialize_curve, deserialize_curve
+from typing import Dict, Any, Iterator, List, Optional
+import numpy as np
+import pandas as pd
 import uuid
 import json
+import base64
+import logging
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the backtest job executor for the lifetime of the server"""
+    backtest_executor.start()
+    yield
+    backtest_executor.stop()
 
 # Create FastAPI instance
 app = FastAPI(
     title="Basic Algo Trading App",
     description="A basic trading application API",
-    version="3.0.0"
+    version="3.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -25,6 +58,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 def get_strategy_data(
@@ -33,38 +67,8 @@ def get_strategy_data(
         stock_symbol: str, 
         start_date: str, end_date: str
     ):
-    """Strategy selector function"""
-    
-    if strategy_name.lower() == "ma_crossover":
-        # MA Crossover Strategy
-        return ma_crossover_strategy(
-            short_window=strategy_params.get("short_window", 20),
-            long_window=strategy_params.get("long_window", 50),
-            stock_symbol=stock_symbol,
-            start_date=start_date,
-            end_date=end_date
-        )
-    
-    elif strategy_name.lower() == "bollinger_bands":
-        # Bollinger Bands Strategy  
-        return bollinger_bands_strategy(
-            window=strategy_params.get("window", 20),
-            std_dev=strategy_params.get("std_dev", 2.0),
-            stock_symbol=stock_symbol,
-            start_date=start_date,
-            end_date=end_date
-        )
-    
-    else:
-        # Default to MA Crossover if strategy not recognized
-        print(f"Warning: Strategy '{strategy_name}' not recognized. Using MA Crossover as default.")
-        return ma_crossover_strategy(
-            short_window=strategy_params.get("short_window", 20),
-            long_window=strategy_params.get("long_window", 50),
-            stock_symbol=stock_symbol,
-            start_date=start_date,
-            end_date=end_date
-        )
+    """Strategy selector function (unknown strategy names raise ValueError)"""
+    return get_strategy(strategy_name).run(strategy_params, stock_symbol, start_date, end_date)
 
 # Pydantic model for backtest request
 class BacktestRequest(BaseModel):
@@ -79,42 +83,140 @@ class BacktestRequest(BaseModel):
         "window": 20,
         "std_dev": 2.0
     }
+    persist_trades: bool = True  # Set to False for throwaway runs that should not touch the trades table
+    reuse_results: bool = True  # Return an identical completed or running job instead of starting a new one
+    chunk_bars: Optional[int] = Field(default=None, ge=1)  # Stream the bars in chunks of this size (same results, bounded memory)
+
+# Pydantic model for multi-symbol portfolio backtest request
+class PortfolioBacktestRequest(BaseModel):
+    stock_symbols: List[str]
+    start_date: str = settings.START_DATE
+    end_date: str = settings.END_DATE
+    initial_capital: float = settings.INITIAL_CAPITAL
+    strategy_name: str = settings.STRATEGY_NAME
+    strategy_params: Dict[str, Any] = {
+        "short_window": 20,
+        "long_window": 50,
+        "window": 20,
+        "std_dev": 2.0
+    }
+    persist_trades: bool = True
+    reuse_results: bool = True
+
+# Pydantic models for running several strategies on one symbol
+class StrategyConfig(BaseModel):
+    strategy_name: str
+    strategy_params: Dict[str, Any] = {}
+    label: Optional[str] = None  # Name of this entry in the results, defaults to the strategy name
+
+class MultiStrategyBacktestRequest(BaseModel):
+    stock_symbol: str = settings.STOCK_SYMBOL
+    start_date: str = settings.START_DATE
+    end_date: str = settings.END_DATE
+    initial_capital: float = settings.INITIAL_CAPITAL
+    strategies: List[StrategyConfig] = [
+        StrategyConfig(strategy_name="ma_crossover", strategy_params={"short_window": 20, "long_window": 50}),
+        StrategyConfig(strategy_name="bollinger_bands", strategy_params={"window": 20, "std_dev": 2.0})
+    ]
+    persist_trades: bool = True
+    reuse_results: bool = True
+
+# Pydantic model for parameter sweep request
+class SweepRequest(BaseModel):
+    stock_symbol: str = settings.STOCK_SYMBOL
+    start_date: str = settings.START_DATE
+    end_date: str = settings.END_DATE
+    initial_capital: float = settings.INITIAL_CAPITAL
+    strategy_name: str = settings.STRATEGY_NAME
+    param_grid: Dict[str, List[Any]] = {
+        "short_window": [10, 20, 30],
+        "long_window": [50, 100, 200]
+    }
+    rank_by: str = "total_return_pct"
+    top_n: Optional[int] = None
+    reuse_results: bool = True
+
+# Pydantic model for walk-forward optimization request
+class WalkForwardRequest(BaseModel):
+    stock_symbol: str = settings.STOCK_SYMBOL
+    start_date: str = "2015-01-01"
+    end_date: str = settings.END_DATE
+    initial_capital: float = settings.INITIAL_CAPITAL
+    strategy_name: str = settings.STRATEGY_NAME
+    param_grid: Dict[str, List[Any]] = {
+        "short_window": [10, 20, 30],
+        "long_window": [50, 100, 200]
+    }
+    train_bars: int = 504  # About two years of daily bars
+    test_bars: int = 126  # About six months of daily bars
+    step_bars: Optional[int] = None  # Defaults to test_bars (back-to-back test windows)
+    anchored: bool = False  # Keep every train window starting at the first bar
+    rank_by: str = "total_return_pct"
+    reuse_results: bool = True
+
+# Response field -> trades column of the /trades listing, in response order
+TRADE_RESPONSE_FIELDS = {
+    "trade_id": "trade_id",
+    "strategy_name": "strategy_name",
+    "ticker": "stock_symbol",
+    "quantity": "quantity",
+    "entry_datetime": "entry_timestamp",
+    "entry_price": "entry_price",
+    "exit_datetime": "exit_timestamp",
+    "exit_price": "exit_price",
+    "pnl": "pnl",
+    "trade_duration_days": "days_held"
+}
+
+def encode_trades_cursor(key) -> str:
+    """Opaque cursor for the (entry_timestamp, trade_id) key of the last trade on a page"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def decode_trades_cursor(cursor: str):
+    """(entry_timestamp, trade_id) key from a cursor made by encode_trades_cursor"""
+    try:
+        entry_timestamp, trade_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(entry_timestamp), int(trade_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
 
 @app.get("/trades")
 async def get_all_trades(
     strategy_name: Optional[str] = Query(None, description="Filter trades by strategy name"),
     ticker: Optional[str] = Query(None, description="Filter trades by stock ticker/symbol"),
     backtest_id: Optional[str] = Query(None, description="Filter trades by specific backtest ID"),
-    limit: Optional[int] = Query(None, description="Limit the number of trades returned")
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of trades per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields to return (default all)")
 ):
-    """Get all trades from the database"""
+    """
+    Get trades from the database, newest first, one page at a time
+    
+    The cursor for the next page is sent in the X-Next-Cursor response header,
+    which is absent on the last page.
+    """
     try:
-        # Get trades from database using the existing method
-        trades = db_engine.get_trades(
+        if fields:
+            names = [name.strip() for name in fields.split(",") if name.strip()]
+            unknown = [name for name in names if name not in TRADE_RESPONSE_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(TRADE_RESPONSE_FIELDS)}")
+            columns = {name: TRADE_RESPONSE_FIELDS[name] for name in names}
+        else:
+            columns = TRADE_RESPONSE_FIELDS
+        
+        # Rows come back already in the response shape
+        trades, next_key = db_engine.get_trades_page(
+            columns,
             stock_symbol=ticker,
             strategy_name=strategy_name,
             backtest_id=backtest_id,
-            limit=limit
+            after=decode_trades_cursor(cursor) if cursor else None,
+            limit=min(limit or settings.TRADES_PAGE_SIZE, settings.TRADES_MAX_PAGE_SIZE)
         )
         
-        # Transform the data to match the expected response format
-        formatted_trades = []
-        for trade in trades:
-            formatted_trade = {
-                "trade_id": trade["trade_id"],
-                "strategy_name": trade["strategy_name"],
-                "ticker": trade["stock_symbol"],
-                "quantity": trade["quantity"],
-                "entry_datetime": trade["entry_timestamp"],
-                "entry_price": trade["entry_price"],
-                "exit_datetime": trade["exit_timestamp"],
-                "exit_price": trade["exit_price"],
-                "pnl": trade["pnl"],
-                "trade_duration_days": trade["days_held"]
-            }
-            formatted_trades.append(formatted_trade)
-        
-        return formatted_trades
+        headers = {"X-Next-Cursor": encode_trades_cursor(next_key)} if next_key else None
+        return JSONResponse(trades, headers=headers)
         
     except Exception as e:
         return {
@@ -124,53 +226,403 @@ async def get_all_trades(
     
 def run_backtest_task(backtest_id: str, request_data: dict):
     """Background task function to run backtest"""
+    # Per-stage timings and counters, stored with the job (fetch and trade writes are timed where they happen)
+    timer = StageTimer()
     try:
-        # Update status to RUNNING
-        db_engine.update_backtest_status(backtest_id, "RUNNING")
+        with timer.activate(), record_reads() as reads:
+            # The executor already claimed the job; a job cancelled since then stays cancelled
+            if not db_engine.transition_backtest_status(backtest_id, ["PENDING", "RUNNING"], "RUNNING"):
+                return
+            publish_job_event(backtest_id, "RUNNING", stage="fetching_data", progress=0.1)
+            
+            chunk_bars = request_data.get("chunk_bars") or settings.BACKTEST_CHUNK_BARS
+            if chunk_bars:
+                # Out-of-core run: bars are streamed from the store and the strategy frame is saved chunk by chunk
+                publish_job_event(backtest_id, "RUNNING", stage="simulating", progress=0.1)
+                with timer.stage("simulation"):
+                    result = run_chunked_backtest(
+                        strategy_name=request_data["strategy_name"],
+                        strategy_params=request_data["strategy_params"],
+                        stock_symbol=request_data["stock_symbol"],
+                        start_date=request_data["start_date"],
+                        end_date=request_data["end_date"],
+                        initial_capital=request_data["initial_capital"],
+                        shares_to_buy=settings.SHARES_TO_BUY,
+                        backtest_id=backtest_id,
+                        persist_trades=request_data.get("persist_trades", True),
+                        chunk_bars=chunk_bars,
+                        store_frames=True
+                    )
+                strategy_data = None
+                timer.count("bars_processed", len(result[0]))
+            else:
+                # Generate strategy data using strategy selector
+                with timer.stage("indicators"):
+                    strategy_data = get_strategy_data(
+                        strategy_name=request_data["strategy_name"],
+                        strategy_params=request_data["strategy_params"],
+                        stock_symbol=request_data["stock_symbol"],
+                        start_date=request_data["start_date"],
+                        end_date=request_data["end_date"]
+                    )
+                timer.count("bars_processed", len(strategy_data))
+                
+                # Run the backtest
+                publish_job_event(backtest_id, "RUNNING", stage="simulating", progress=0.5)
+                with timer.stage("simulation"):
+                    result = backtest_strategy(
+                        data=strategy_data,
+                        stock_symbol=request_data["stock_symbol"],
+                        initial_capital=request_data["initial_capital"],
+                        strategy_name=request_data["strategy_name"],
+                        shares_to_buy=settings.SHARES_TO_BUY,
+                        backtest_id=backtest_id,
+                        persist_trades=request_data.get("persist_trades", True)
+                    )
+            
+            # Store comprehensive results as JSON string
+            with timer.stage("serialization"):
+                # The equity curve goes to its own binary column, not into the results JSON
+                results_json = json.dumps({
+                    "performance_metrics": result[1] if len(result) > 1 else None,
+                    "strategy_data_shape": strategy_data.shape if strategy_data is not None else None,
+                    "timeframe": {
+                        "start": result[1]["timeframe_start"],
+                        "end": result[1]["timeframe_end"]
+                    }
+                })
+                frame_bytes = serialize_frame(strategy_data) if strategy_data is not None else b""
+                curve_bytes = serialize_curve(result[0])
+            timer.count("bytes_serialized", len(results_json) + len(frame_bytes) + len(curve_bytes))
+            
+            # Keep the indicator/signal frame with the job so result reads don't recompute it
+            publish_job_event(backtest_id, "RUNNING", stage="saving_results", progress=0.9)
+            with timer.stage("db_writes"):
+                if strategy_data is not None:
+                    db_engine.save_strategy_frame(backtest_id, frame_bytes)
+                db_engine.save_backtest_curve(backtest_id, "portfolio_value", curve_bytes)
+                
+                # Metric columns are filled before the job shows up as COMPLETED
+                db_engine.save_backtest_metrics(backtest_id, {
+                    **result[1],
+                    "strategy_name": get_strategy(request_data["strategy_name"]).name,
+                    "stock_symbol": request_data["stock_symbol"].upper()
+                })
+            
+            # Update status to COMPLETED with results and the run timings in one update
+            completed = db_engine.transition_backtest_status(
+                backtest_id, ["RUNNING"], "COMPLETED", results=results_json,
+                timings={"run": job_timings(timer, job_type="backtest")},
+                data_version=read_data_version(reads, [request_data["stock_symbol"]])
+            )
         
-        # Generate strategy data using strategy selector
-        strategy_data = get_strategy_data(
-            strategy_name=request_data["strategy_name"],
-            strategy_params=request_data["strategy_params"],
-            stock_symbol=request_data["stock_symbol"],
-            start_date=request_data["start_date"],
-            end_date=request_data["end_date"]
+        if completed:
+            publish_job_event(backtest_id, "COMPLETED", progress=1.0)
+        
+    except Exception as e:
+        # Update status to FAILED with error message
+        logger.exception(f"Error in backtest task {backtest_id}")
+        failed = db_engine.transition_backtest_status(
+            backtest_id, ["RUNNING"], "FAILED", error_message=str(e),
+            timings={"run": job_timings(timer, job_type="backtest")}
         )
+        if failed:
+            publish_job_event(backtest_id, "FAILED", error_message=str(e))
+
+def run_portfolio_backtest_task(backtest_id: str, request_data: dict):
+    """Background task function to run a multi-symbol portfolio backtest"""
+    timer = StageTimer()
+    try:
+        with timer.activate(), record_reads() as reads:
+            # The executor already claimed the job; a job cancelled since then stays cancelled
+            if not db_engine.transition_backtest_status(backtest_id, ["PENDING", "RUNNING"], "RUNNING"):
+                return
+            publish_job_event(backtest_id, "RUNNING", stage="simulating", progress=0.1)
+            
+            with timer.stage("simulation"):
+                equity_frame, result = run_portfolio_backtest(
+                    stock_symbols=request_data["stock_symbols"],
+                    start_date=request_data["start_date"],
+                    end_date=request_data["end_date"],
+                    strategy_name=request_data["strategy_name"],
+                    strategy_params=request_data["strategy_params"],
+                    initial_capital=request_data["initial_capital"],
+                    shares_to_buy=settings.SHARES_TO_BUY,
+                    backtest_id=backtest_id,
+                    persist_trades=request_data.get("persist_trades", True)
+                )
+            timer.count("bars_processed", len(equity_frame) * len(result["symbol_metrics"]))
+            
+            with timer.stage("serialization"):
+                results_json = json.dumps({
+                    "performance_metrics": result["performance_metrics"],
+                    "symbol_metrics": result["symbol_metrics"],
+                    "timeframe": {
+                        "start": str(equity_frame.index[0])[:10],
+                        "end": str(equity_frame.index[-1])[:10]
+                    }
+                })
+                frame_bytes = serialize_frame(equity_frame)
+            timer.count("bytes_serialized", len(results_json) + len(frame_bytes))
+            
+            publish_job_event(backtest_id, "RUNNING", stage="saving_results", progress=0.9)
+            with timer.stage("db_writes"):
+                db_engine.save_strategy_frame(backtest_id, frame_bytes)
+                db_engine.save_backtest_metrics(backtest_id, result["performance_metrics"])
+            
+            completed = db_engine.transition_backtest_status(
+                backtest_id, ["RUNNING"], "COMPLETED", results=results_json,
+                timings={"run": job_timings(timer, job_type="portfolio")},
+                data_version=read_data_version(reads, request_data["stock_symbols"])
+            )
+        
+        if completed:
+            publish_job_event(backtest_id, "COMPLETED", progress=1.0)
         
-        # Run the backtest
-        result = backtest_strategy(
-            data=strategy_data,
-            stock_symbol=request_data["stock_symbol"],
-            initial_capital=request_data["initial_capital"],
-            strategy_name=request_data["strategy_name"],
-            shares_to_buy=settings.SHARES_TO_BUY,
-            backtest_id=backtest_id
+    except Exception as e:
+        logger.exception(f"Error in portfolio backtest task {backtest_id}")
+        failed = db_engine.transition_backtest_status(
+            backtest_id, ["RUNNING"], "FAILED", error_message=str(e),
+            timings={"run": job_timings(timer, job_type="portfolio")}
         )
+        if failed:
+            publish_job_event(backtest_id, "FAILED", error_message=str(e))
+
+def run_multi_strategy_task(backtest_id: str, request_data: dict):
+    """Background task function to run several strategies on one symbol with a single fetch"""
+    timer = StageTimer()
+    try:
+        with timer.activate(), record_reads() as reads:
+            # The executor already claimed the job; a job cancelled since then stays cancelled
+            if not db_engine.transition_backtest_status(backtest_id, ["PENDING", "RUNNING"], "RUNNING"):
+                return
+            publish_job_event(backtest_id, "RUNNING", stage="simulating", progress=0.1)
+            
+            with timer.stage("simulation"):
+                equity_frame, strategy_results = run_multi_strategy_backtest(
+                    stock_symbol=request_data["stock_symbol"],
+                    start_date=request_data["start_date"],
+                    end_date=request_data["end_date"],
+                    strategies=request_data["strategies"],
+                    initial_capital=request_data["initial_capital"],
+                    shares_to_buy=settings.SHARES_TO_BUY,
+                    backtest_id=backtest_id,
+                    persist_trades=request_data.get("persist_trades", True)
+                )
+            timer.count("bars_processed", sum(result["bars"] for result in strategy_results))
+            
+            with timer.stage("serialization"):
+                results_json = json.dumps({
+                    "strategies": strategy_results,
+                    "timeframe": {
+                        "start": str(equity_frame.index[0])[:10],
+                        "end": str(equity_frame.index[-1])[:10]
+                    }
+                })
+                frame_bytes = serialize_frame(equity_frame)
+            timer.count("bytes_serialized", len(results_json) + len(frame_bytes))
+            
+            publish_job_event(backtest_id, "RUNNING", stage="saving_results", progress=0.9)
+            with timer.stage("db_writes"):
+                db_engine.save_strategy_frame(backtest_id, frame_bytes)
+                db_engine.save_backtest_metrics(backtest_id, {"stock_symbol": request_data["stock_symbol"].upper()})
+            
+            completed = db_engine.transition_backtest_status(
+                backtest_id, ["RUNNING"], "COMPLETED", results=results_json,
+                timings={"run": job_timings(timer, job_type="multi_strategy")},
+                data_version=read_data_version(reads, [request_data["stock_symbol"]])
+            )
         
-        # Store comprehensive results as JSON string
-        results_json = json.dumps({
-            "performance_metrics": result[1] if len(result) > 1 else None,
-            "portfolio_values": result[0] if len(result) > 0 else None,
-            "strategy_data_shape": strategy_data.shape if strategy_data is not None else None,
-            "timeframe": {
-                "start": str(strategy_data.index[0])[:10] if strategy_data is not None and len(strategy_data) > 0 else None,
-                "end": str(strategy_data.index[-1])[:10] if strategy_data is not None and len(strategy_data) > 0 else None
-            }
-        })
+        if completed:
+            publish_job_event(backtest_id, "COMPLETED", progress=1.0)
+        
+    except Exception as e:
+        logger.exception(f"Error in multi-strategy backtest task {backtest_id}")
+        failed = db_engine.transition_backtest_status(
+            backtest_id, ["RUNNING"], "FAILED", error_message=str(e),
+            timings={"run": job_timings(timer, job_type="multi_strategy")}
+        )
+        if failed:
+            publish_job_event(backtest_id, "FAILED", error_message=str(e))
+
+def run_walk_forward_task(backtest_id: str, request_data: dict):
+    """Background task function to run a walk-forward optimization"""
+    timer = StageTimer()
+    try:
+        with timer.activate(), record_reads() as reads:
+            # The executor already claimed the job; a job cancelled since then stays cancelled
+            if not db_engine.transition_backtest_status(backtest_id, ["PENDING", "RUNNING"], "RUNNING"):
+                return
+            publish_job_event(backtest_id, "RUNNING", stage="optimizing", progress=0.1)
+            
+            with timer.stage("simulation"):
+                equity_frame, result = run_walk_forward(
+                    strategy_name=request_data["strategy_name"],
+                    param_grid=request_data["param_grid"],
+                    stock_symbol=request_data["stock_symbol"],
+                    start_date=request_data["start_date"],
+                    end_date=request_data["end_date"],
+                    train_bars=request_data["train_bars"],
+                    test_bars=request_data["test_bars"],
+                    step_bars=request_data.get("step_bars"),
+                    anchored=request_data.get("anchored", False),
+                    initial_capital=request_data["initial_capital"],
+                    shares_to_buy=settings.SHARES_TO_BUY,
+                    rank_by=request_data.get("rank_by", "total_return_pct")
+                )
+            timer.count("bars_processed", len(equity_frame))
+            
+            with timer.stage("serialization"):
+                results_json = json.dumps({
+                    **result,
+                    "timeframe": {
+                        "start": str(equity_frame.index[0])[:10] if len(equity_frame) > 0 else None,
+                        "end": str(equity_frame.index[-1])[:10] if len(equity_frame) > 0 else None
+                    }
+                })
+                frame_bytes = serialize_frame(equity_frame)
+            timer.count("bytes_serialized", len(results_json) + len(frame_bytes))
+            
+            publish_job_event(backtest_id, "RUNNING", stage="saving_results", progress=0.9)
+            with timer.stage("db_writes"):
+                db_engine.save_strategy_frame(backtest_id, frame_bytes)
+                db_engine.save_backtest_metrics(backtest_id, {
+                    **result["performance_metrics"],
+                    "strategy_name": result["strategy_name"],
+                    "stock_symbol": result["stock_symbol"].upper()
+                })
+            
+            completed = db_engine.transition_backtest_status(
+                backtest_id, ["RUNNING"], "COMPLETED", results=results_json,
+                timings={"run": job_timings(timer, job_type="walk_forward")},
+                data_version=read_data_version(reads, [request_data["stock_symbol"]])
+            )
         
-        # Update status to COMPLETED with results
-        db_engine.update_backtest_status(backtest_id, "COMPLETED", results_json)
+        if completed:
+            publish_job_event(backtest_id, "COMPLETED", progress=1.0)
         
     except Exception as e:
-        # Update status to FAILED with error message
-        print(f"Error in backtest task: {str(e)}")
-        db_engine.update_backtest_status(backtest_id, "FAILED", error_message=str(e))
+        logger.exception(f"Error in walk-forward task {backtest_id}")
+        failed = db_engine.transition_backtest_status(
+            backtest_id, ["RUNNING"], "FAILED", error_message=str(e),
+            timings={"run": job_timings(timer, job_type="walk_forward")}
+        )
+        if failed:
+            publish_job_event(backtest_id, "FAILED", error_message=str(e))
 
-@app.post("/backtest")
-async def backtest(background_tasks: BackgroundTasks, request: BacktestRequest):
-    """Start a new backtest job in the background"""
-    # Generate new backtest ID
+def run_sweep_task(backtest_id: str, request_data: dict):
+    """Background task function to run a parameter sweep"""
+    timer = StageTimer()
+    try:
+        with timer.activate(), record_reads() as reads:
+            # The executor already claimed the job; a job cancelled since then stays cancelled
+            if not db_engine.transition_backtest_status(backtest_id, ["PENDING", "RUNNING"], "RUNNING"):
+                return
+            publish_job_event(backtest_id, "RUNNING", stage="optimizing", progress=0.1)
+            
+            with timer.stage("simulation"):
+                results = run_parameter_sweep(
+                    strategy_name=request_data["strategy_name"],
+                    param_grid=request_data["param_grid"],
+                    stock_symbol=request_data["stock_symbol"],
+                    start_date=request_data["start_date"],
+                    end_date=request_data["end_date"],
+                    initial_capital=request_data["initial_capital"],
+                    shares_to_buy=settings.SHARES_TO_BUY,
+                    rank_by=request_data.get("rank_by", "total_return_pct")
+                )
+            timer.count("bars_processed", sum(row["bars"] for row in results))
+            
+            top_n = request_data.get("top_n")
+            with timer.stage("serialization"):
+                results_json = json.dumps({
+                    "strategy_name": request_data["strategy_name"],
+                    "stock_symbol": request_data["stock_symbol"].upper(),
+                    "rank_by": request_data.get("rank_by", "total_return_pct"),
+                    "total_combinations": len(results),
+                    "results": results[:top_n] if top_n else results
+                })
+            timer.count("bytes_serialized", len(results_json))
+            
+            publish_job_event(backtest_id, "RUNNING", stage="saving_results", progress=0.9)
+            with timer.stage("db_writes"):
+                db_engine.save_backtest_metrics(backtest_id, {
+                    "strategy_name": get_strategy(request_data["strategy_name"]).name,
+                    "stock_symbol": request_data["stock_symbol"].upper()
+                })
+            
+            completed = db_engine.transition_backtest_status(
+                backtest_id, ["RUNNING"], "COMPLETED", results=results_json,
+                timings={"run": job_timings(timer, job_type="sweep")},
+                data_version=read_data_version(reads, [request_data["stock_symbol"]])
+            )
+        
+        if completed:
+            publish_job_event(backtest_id, "COMPLETED", progress=1.0)
+        
+    except Exception as e:
+        logger.exception(f"Error in parameter sweep task {backtest_id}")
+        failed = db_engine.transition_backtest_status(
+            backtest_id, ["RUNNING"], "FAILED", error_message=str(e),
+            timings={"run": job_timings(timer, job_type="sweep")}
+        )
+        if failed:
+            publish_job_event(backtest_id, "FAILED", error_message=str(e))
+
+# Job types the executor knows how to run
+backtest_executor.register("backtest", run_backtest_task)
+backtest_executor.register("portfolio", run_portfolio_backtest_task)
+backtest_executor.register("multi_strategy", run_multi_strategy_task)
+backtest_executor.register("walk_forward", run_walk_forward_task)
+backtest_executor.register("sweep", run_sweep_task)
+
+def queue_backtest_job(job_type: str, request_data: dict, stock_symbols: List[str],
+                       reuse_results: bool, label: str) -> Dict[str, Any]:
+    """
+    Queue a job, or hand back an identical one that is completed or still in flight
+    
+    Jobs are matched on a hash of the canonical request plus the bar store version
+    of the data it reads, so a completed match is returned immediately and a
+    request matching a queued or running job attaches to it.
+    """
     backtest_id = str(uuid.uuid4())
+    params_hash = request_params_hash(job_type, request_data)
+    data_version = request_data_version(stock_symbols, request_data["start_date"], request_data["end_date"])
+    
+    if reuse_results:
+        job = db_engine.find_or_create_backtest_job(backtest_id, json.dumps(request_data), params_hash, data_version)
+    else:
+        db_engine.create_backtest_job(backtest_id, json.dumps(request_data), params_hash, data_version)
+        job = {"backtest_id": backtest_id, "status": "PENDING", "created": True}
+    
+    if not job["created"]:
+        return {
+            "status": "success",
+            "message": f"Identical {label} already {'completed' if job['status'] == 'COMPLETED' else 'queued'}; reusing it.",
+            "backtest_id": job["backtest_id"],
+            "job_status": job["status"],
+            "reused": True
+        }
+    
+    # Wake the executor so the job starts as soon as a worker is free
+    backtest_executor.notify()
+    
+    return {
+        "status": "success",
+        "message": f"{label[0].upper() + label[1:]} queued successfully.",
+        "backtest_id": backtest_id,
+        "job_status": "PENDING",
+        "reused": False
+    }
+
+@app.post("/backtest")
+async def backtest(request: BacktestRequest):
+    """Queue a new backtest job for the executor"""
+    # Reject unknown strategies before they reach the queue
+    try:
+        get_strategy(request.strategy_name)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
     
     # Convert request to dictionary for JSON storage
     request_data = {
@@ -179,29 +631,114 @@ async def backtest(background_tasks: BackgroundTasks, request: BacktestRequest):
         "end_date": request.end_date,
         "initial_capital": request.initial_capital,
         "strategy_name": request.strategy_name,
-        "strategy_params": request.strategy_params
+        "strategy_params": request.strategy_params,
+        "persist_trades": request.persist_trades,
+        "chunk_bars": request.chunk_bars
     }
     
-    # Store request parameters as JSON string
-    request_params_json = json.dumps(request_data)
+    # Create the job with PENDING status, unless an identical one can be reused
+    return queue_backtest_job("backtest", request_data, [request.stock_symbol],
+                              request.reuse_results, "backtest")
+
+@app.post("/backtest/portfolio")
+async def backtest_portfolio(request: PortfolioBacktestRequest):
+    """Queue a multi-symbol portfolio backtest job for the executor"""
+    try:
+        get_strategy(request.strategy_name)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
     
-    # Create backtest job in database with PENDING status
-    db_engine.create_backtest_job(backtest_id, request_params_json)
+    request_data = {
+        "job_type": "portfolio",
+        "stock_symbols": request.stock_symbols,
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "initial_capital": request.initial_capital,
+        "strategy_name": request.strategy_name,
+        "strategy_params": request.strategy_params,
+        "persist_trades": request.persist_trades
+    }
     
-    # Add background task
-    background_tasks.add_task(run_backtest_task, backtest_id, request_data)
+    return queue_backtest_job("portfolio", request_data, request.stock_symbols,
+                              request.reuse_results, "portfolio backtest")
+
+@app.post("/backtest/compare")
+async def backtest_compare(request: MultiStrategyBacktestRequest):
+    """Queue a job that runs several strategies against one symbol, fetching prices once"""
+    try:
+        for entry in request.strategies:
+            get_strategy(entry.strategy_name)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
     
-    return {
-        "status": "success",
-        "message": "Backtest started successfully.",
-        "backtest_id": backtest_id
+    request_data = {
+        "job_type": "multi_strategy",
+        "stock_symbol": request.stock_symbol,
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "initial_capital": request.initial_capital,
+        "strategies": [entry.model_dump() for entry in request.strategies],
+        "persist_trades": request.persist_trades
+    }
+    
+    return queue_backtest_job("multi_strategy", request_data, [request.stock_symbol],
+                              request.reuse_results, "multi-strategy backtest")
+
+@app.post("/backtest/sweep")
+async def backtest_sweep(request: SweepRequest):
+    """Queue a parameter sweep job: run a parameter grid for one strategy and rank the metrics"""
+    try:
+        build_combinations(request.strategy_name.lower(), request.param_grid)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    
+    request_data = {
+        "job_type": "sweep",
+        "stock_symbol": request.stock_symbol,
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "initial_capital": request.initial_capital,
+        "strategy_name": request.strategy_name.lower(),
+        "param_grid": request.param_grid,
+        "rank_by": request.rank_by,
+        "top_n": request.top_n
     }
+    
+    return queue_backtest_job("sweep", request_data, [request.stock_symbol],
+                              request.reuse_results, "parameter sweep")
+
+@app.post("/backtest/walk_forward")
+async def backtest_walk_forward(request: WalkForwardRequest):
+    """Queue a walk-forward optimization job: optimize on rolling train windows, test out of sample"""
+    try:
+        build_combinations(request.strategy_name.lower(), request.param_grid)
+        build_folds(0, request.train_bars, request.test_bars, request.step_bars)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    
+    request_data = {
+        "job_type": "walk_forward",
+        "stock_symbol": request.stock_symbol,
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "initial_capital": request.initial_capital,
+        "strategy_name": request.strategy_name.lower(),
+        "param_grid": request.param_grid,
+        "train_bars": request.train_bars,
+        "test_bars": request.test_bars,
+        "step_bars": request.step_bars,
+        "anchored": request.anchored,
+        "rank_by": request.rank_by
+    }
+    
+    return queue_backtest_job("walk_forward", request_data, [request.stock_symbol],
+                              request.reuse_results, "walk-forward optimization")
 
 @app.get("/backtest/{backtest_id}/status")
 async def get_backtest_status(backtest_id: str):
     """Get the current status of a backtest job"""
     try:
-        job = db_engine.get_backtest_job(backtest_id)
+        job = db_engine.get_backtest_job(backtest_id, include_results=False)
         if not job:
             return {
                 "status": "error",
@@ -212,6 +749,7 @@ async def get_backtest_status(backtest_id: str):
             "backtest_id": job["backtest_id"],
             "job_status": job["status"],
             "error_message": job["error_message"],
+            "queue_position": backtest_executor.queue_position(backtest_id) if job["status"] == "PENDING" else None,
             "created_at": job["created_at"], 
             "updated_at": job["updated_at"]
         }
@@ -224,115 +762,456 @@ async def get_backtest_status(backtest_id: str):
             "message": str(e)
         }
 
-@app.get("/backtest/{backtest_id}")
-async def get_backtest_results(backtest_id: str):
-    """Get the full results of a completed backtest"""
+@app.get("/backtest/{backtest_id}/events")
+async def stream_backtest_events(backtest_id: str):
+    """
+    Push status changes and progress of a backtest job as Server-Sent Events
+    
+    The first event is the job's current state; a PENDING job gets a new event
+    whenever its queue position changes. The stream ends after the job reaches
+    COMPLETED, FAILED or CANCELLED.
+    """
+    job = db_engine.get_backtest_job(backtest_id, include_results=False)
+    if not job:
+        return {
+            "status": "error",
+            "message": f"No backtest found with ID {backtest_id}"
+        }
+    
+    async def event_stream():
+        # Subscribed only once the response streams (so a client that never reads can't
+        # leak the queue), and before reading the snapshot so no transition falls in between
+        queue = job_event_bus.subscribe(backtest_id)
+        try:
+            current = db_engine.get_backtest_job(backtest_id, include_results=False)
+            event = {
+                "backtest_id": backtest_id,
+                "job_status": current["status"],
+                "stage": None,
+                "progress": 1.0 if current["status"] == "COMPLETED" else None,
+                "error_message": current["error_message"],
+                "queue_position": backtest_executor.queue_position(backtest_id) if current["status"] == "PENDING" else None
+            }
+            yield f"data: {json.dumps(event)}\n\n"
+            while event["job_status"] not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            job_event_bus.unsubscribe(backtest_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/backtest/{backtest_id}")
+async def cancel_backtest(backtest_id: str):
+    """Cancel a queued or running backtest job"""
     try:
-        job = db_engine.get_backtest_job(backtest_id)
+        job = db_engine.get_backtest_job(backtest_id, include_results=False)
         if not job:
             return {
                 "status": "error",
                 "message": f"No backtest found with ID {backtest_id}"
             }
         
-        # If backtest is not completed, return status info
-        if job["status"] != "COMPLETED":
+        if not backtest_executor.cancel(backtest_id):
+            job = db_engine.get_backtest_job(backtest_id, include_results=False)
             return {
-                "backtest_id": job["backtest_id"],
-                "job_status": job["status"],
-                "error_message": job["error_message"],
-                "created_at": job["created_at"],
-                "updated_at": job["updated_at"]
+                "status": "error",
+                "message": f"Backtest {backtest_id} already finished with status {job['status']}"
             }
         
-        # Parse the stored results
-        stored_results = json.loads(job["results"]) if job["results"] else {}
-        request_params = json.loads(job["request_params"]) if job["request_params"] else {}
-        
-        # Get performance metrics from stored results
-        performance_metrics = stored_results.get("performance_metrics", {})
-        portfolio_values = stored_results.get("portfolio_values", [])
+        return {
+            "status": "success",
+            "message": f"Backtest {backtest_id} cancelled",
+            "backtest_id": backtest_id
+        }
         
-        # Regenerate strategy data to get chart data with indicators
-        strategy_data = get_strategy_data(
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to cancel backtest: {str(e)}"
+        }
+
+def iter_strategy_frames(backtest_id: str, request_params: dict) -> Iterator[pd.DataFrame]:
+    """
+    Strategy frame stored with a job, in the pieces it was stored in
+
+    Chunked jobs store their frame chunk by chunk and are read back one chunk at
+    a time; other jobs yield their whole frame, regenerated for jobs that
+    predate stored frames.
+    """
+    with timed_stage("db_read"):
+        stored_frame = db_engine.get_strategy_frame(backtest_id)
+    if stored_frame is not None:
+        with timed_stage("deserialization"):
+            yield deserialize_frame(stored_frame)
+        return
+    
+    # Chunked jobs store their frame in pieces, written in the same run as the equity curve
+    chunk = 0
+    while True:
+        with timed_stage("db_read"):
+            stored_chunk = db_engine.get_strategy_frame_chunk(backtest_id, chunk)
+        if stored_chunk is None:
+            break
+        with timed_stage("deserialization"):
+            yield deserialize_frame(stored_chunk)
+        chunk += 1
+    if chunk:
+        return
+    
+    # Jobs completed before frames were stored: regenerate strategy data
+    with timed_stage("indicators"):
+        yield get_strategy_data(
             strategy_name=request_params.get("strategy_name", "ma_crossover"),
             strategy_params=request_params.get("strategy_params", {}),
             stock_symbol=request_params.get("stock_symbol", "AAPL"),
             start_date=request_params.get("start_date", "2020-01-01"),
             end_date=request_params.get("end_date", "2024-12-31")
         )
-        
-        # Create equity curve data
-        equity_curve = []
-        if portfolio_values and len(portfolio_values) > 0:
-            # Get date range from strategy data
-            dates = strategy_data.index.tolist()
-            for i, value in enumerate(portfolio_values):
-                if i < len(dates):
-                    equity_curve.append({
-                        "date": dates[i].strftime("%Y-%m-%d"),
-                        "value": round(value, 2)
-                    })
-        
-        # Create chart data with OHLCV, indicators, and signals
-        chart_data = []
-        strategy_name = request_params.get("strategy_name", "ma_crossover").lower()
-        
-        for index, row in strategy_data.iterrows():
-            # Base chart data (always included)
-            chart_point = {
-                "Date": index.strftime("%Y-%m-%dT%H:%M:%S%z") if hasattr(index, 'strftime') else str(index),
-                "Open": round(float(row['Open']), 2),
-                "High": round(float(row['High']), 2),
-                "Low": round(float(row['Low']), 2), 
-                "Close": round(float(row['Close']), 2),
-                "Volume": int(row['Volume']),
-                "Position": float(row.get('Position', 0))  # Signal for frontend markers
-            }
+
+def load_strategy_frame(backtest_id: str, request_params: dict) -> pd.DataFrame:
+    """Whole strategy frame stored with a job (see iter_strategy_frames)"""
+    frames = list(iter_strategy_frames(backtest_id, request_params))
+    return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+def load_equity_curve(backtest_id: str, stored_results: dict) -> Optional[np.ndarray]:
+    """
+    Portfolio value per bar of a job, read only when a response needs it
+
+    Single backtests keep it in backtest_curves and portfolio/walk-forward jobs in
+    their equity frame; jobs that predate both have it in the results JSON.
+    """
+    with timed_stage("db_read"):
+        curve = db_engine.get_backtest_curve(backtest_id, "portfolio_value")
+    if curve is not None:
+        with timed_stage("deserialization"):
+            return deserialize_curve(curve)
+    if "portfolio_values" in stored_results:
+        return np.asarray(stored_results["portfolio_values"] or [], dtype=np.float64)
+    with timed_stage("db_read"):
+        stored_frame = db_engine.get_strategy_frame(backtest_id)
+    if stored_frame is not None:
+        with timed_stage("deserialization"):
+            frame = deserialize_frame(stored_frame)
+        if "Portfolio_Value" in frame:
+            return frame["Portfolio_Value"].to_numpy()
+    return None
+
+@app.get("/backtest/{backtest_id}")
+async def get_backtest_results(
+    backtest_id: str,
+    chart_format: str = Query("records", description="'records' (one object per bar) or 'columnar' (one array per field)"),
+    max_points: Optional[int] = Query(None, ge=3, le=20000, description="Downsample each series to about this many points"),
+    start_date: Optional[str] = Query(None, description="Only return bars from this date/time on"),
+    end_date: Optional[str] = Query(None, description="Only return bars up to this date/time")
+):
+    """
+    Get the full results of a completed backtest
+    
+    Series can be limited to a time window and downsampled for charting: equity
+    curves with LTTB, price bars into min/max-preserving candles. Bars with a
+    trade signal are always kept. Metrics always cover the whole backtest.
+    """
+    try:
+        timer = StageTimer()
+        with timer.activate():
+            with timer.stage("db_read"):
+                job = db_engine.get_backtest_job(backtest_id)
+            if not job:
+                return {
+                    "status": "error",
+                    "message": f"No backtest found with ID {backtest_id}"
+                }
+            
+            # If backtest is not completed, return status info
+            if job["status"] != "COMPLETED":
+                return {
+                    "backtest_id": job["backtest_id"],
+                    "job_status": job["status"],
+                    "error_message": job["error_message"],
+                    "created_at": job["created_at"],
+                    "updated_at": job["updated_at"]
+                }
+            
+            # Parse the stored results
+            with timer.stage("deserialization"):
+                stored_results = json.loads(job["results"]) if job["results"] else {}
+                request_params = json.loads(job["request_params"]) if job["request_params"] else {}
+            
+            # Get performance metrics from stored results
+            performance_metrics = stored_results.get("performance_metrics", {})
+            
+            # Multi-strategy jobs report metrics and an equity curve per strategy
+            if request_params.get("job_type") == "multi_strategy":
+                with timer.stage("db_read"):
+                    stored_frame = db_engine.get_strategy_frame(backtest_id)
+                with timer.stage("deserialization"):
+                    equity_frame = deserialize_frame(stored_frame)
+                strategies = []
+                with timer.stage("chart_build"):
+                    lo, hi = window_positions(equity_frame.index, start_date, end_date)
+                    equity_frame = equity_frame.iloc[lo:hi]
+                    for result in stored_results.get("strategies", []):
+                        values = equity_frame[result["label"]].dropna()
+                        equity_curve = equity_columns(values.index, values.to_numpy(), max_points)
+                        metrics = result["performance_metrics"]
+                        strategies.append({
+                            "label": result["label"],
+                            "strategy_name": result["strategy_name"],
+                            "strategy_params": result["strategy_params"],
+                            "performance_report": {
+                                "final_portfolio_value": metrics.get("final_portfolio_value", 0),
+                                "total_profit_loss_pct": metrics.get("total_return_pct", 0),
+                                "total_trades": metrics.get("total_trades", 0),
+                                "win_rate_pct": metrics.get("win_rate_pct", 0),
+                                "initial_capital": metrics.get("initial_capital", 0),
+                                "total_pnl": metrics.get("total_pnl", 0),
+                                **{name: metrics.get(name) for name in RISK_METRIC_NAMES}
+                            },
+                            "equity_curve": equity_curve if chart_format == "columnar" else columns_to_records(equity_curve)
+                        })
+                timer.count("bars_returned", len(equity_frame))
+                response = {
+                    "backtest_id": backtest_id,
+                    "stock_symbol": request_params.get("stock_symbol", ""),
+                    "strategies": strategies
+                }
+            
+            # Sweep jobs report the ranked parameter/metric table
+            elif request_params.get("job_type") == "sweep":
+                response = {
+                    "backtest_id": backtest_id,
+                    "strategy_name": stored_results.get("strategy_name", ""),
+                    "stock_symbol": stored_results.get("stock_symbol", ""),
+                    "rank_by": stored_results.get("rank_by", ""),
+                    "total_combinations": stored_results.get("total_combinations", 0),
+                    "results": stored_results.get("results", [])
+                }
+            
+            # Walk-forward jobs report the folds and the stitched out-of-sample equity curve
+            elif request_params.get("job_type") == "walk_forward":
+                with timer.stage("db_read"):
+                    stored_frame = db_engine.get_strategy_frame(backtest_id)
+                with timer.stage("deserialization"):
+                    equity_frame = deserialize_frame(stored_frame)
+                with timer.stage("chart_build"):
+                    lo, hi = window_positions(equity_frame.index, start_date, end_date)
+                    equity_frame = equity_frame.iloc[lo:hi]
+                    equity_curve = equity_columns(equity_frame.index, equity_frame["Portfolio_Value"].to_numpy(), max_points)
+                    if chart_format != "columnar":
+                        equity_curve = columns_to_records(equity_curve)
+                timer.count("bars_returned", len(equity_curve["value"] if chart_format == "columnar" else equity_curve))
+                response = {
+                    "backtest_id": backtest_id,
+                    "strategy_name": stored_results.get("strategy_name", ""),
+                    "stock_symbol": stored_results.get("stock_symbol", ""),
+                    "rank_by": stored_results.get("rank_by", ""),
+                    "performance_report": {
+                        "final_portfolio_value": performance_metrics.get("final_portfolio_value", 0),
+                        "total_profit_loss_pct": performance_metrics.get("total_return_pct", 0),
+                        "total_trades": performance_metrics.get("total_trades", 0),
+                        "win_rate_pct": performance_metrics.get("win_rate_pct", 0),
+                        "initial_capital": performance_metrics.get("initial_capital", 0),
+                        "total_pnl": performance_metrics.get("total_pnl", 0),
+                        **{name: performance_metrics.get(name) for name in RISK_METRIC_NAMES}
+                    },
+                    "folds": stored_results.get("folds", []),
+                    "equity_curve": equity_curve
+                }
             
-            # Add strategy-specific indicators
-            if strategy_name == "ma_crossover":
-                # MA Crossover indicators
-                short_window = request_params.get("strategy_params", {}).get("short_window", 20)
-                long_window = request_params.get("strategy_params", {}).get("long_window", 50)
-                chart_point[f"EMA{short_window}"] = round(float(row[f'EMA{short_window}']), 2) if f'EMA{short_window}' in row else None
-                chart_point[f"EMA{long_window}"] = round(float(row[f'EMA{long_window}']), 2) if f'EMA{long_window}' in row else None
+            # Portfolio jobs report aggregate and per-symbol metrics instead of a price chart
+            elif request_params.get("job_type") == "portfolio":
+                with timer.stage("db_read"):
+                    stored_frame = db_engine.get_strategy_frame(backtest_id)
+                with timer.stage("deserialization"):
+                    equity_frame = deserialize_frame(stored_frame)
+                with timer.stage("chart_build"):
+                    lo, hi = window_positions(equity_frame.index, start_date, end_date)
+                    equity_frame = equity_frame.iloc[lo:hi]
+                    # Older jobs also kept the curve in the results JSON; the frame holds the same values
+                    equity_curve = equity_columns(equity_frame.index, equity_frame["Portfolio_Value"].to_numpy(), max_points)
+                    if chart_format != "columnar":
+                        equity_curve = columns_to_records(equity_curve)
+                timer.count("bars_returned", len(equity_curve["value"] if chart_format == "columnar" else equity_curve))
+                response = {
+                    "backtest_id": backtest_id,
+                    "performance_report": {
+                        "final_portfolio_value": performance_metrics.get("final_portfolio_value", 0),
+                        "total_profit_loss_pct": performance_metrics.get("total_return_pct", 0),
+                        "total_trades": performance_metrics.get("total_trades", 0),
+                        "win_rate_pct": performance_metrics.get("win_rate_pct", 0),
+                        "initial_capital": performance_metrics.get("initial_capital", 0),
+                        "total_pnl": performance_metrics.get("total_pnl", 0),
+                        **{name: performance_metrics.get(name) for name in RISK_METRIC_NAMES},
+                        "strategy_name": performance_metrics.get("strategy_name", ""),
+                        "stock_symbols": performance_metrics.get("stock_symbols", [])
+                    },
+                    "symbol_metrics": stored_results.get("symbol_metrics", []),
+                    "equity_curve": equity_curve
+                }
+            else:
+                # Load the strategy frame saved with the job to get chart data with indicators
+                strategy_data = load_strategy_frame(backtest_id, request_params)
+                portfolio_values = load_equity_curve(backtest_id, stored_results)
                 
-            elif strategy_name == "bollinger_bands":
-                # Bollinger Bands indicators
-                window = request_params.get("strategy_params", {}).get("window", 20)
-                chart_point[f"SMA_{window}"] = round(float(row[f'SMA_{window}']), 2) if f'SMA_{window}' in row else None
-                chart_point["Upper_Band"] = round(float(row['Upper_Band']), 2) if 'Upper_Band' in row else None
-                chart_point["Lower_Band"] = round(float(row['Lower_Band']), 2) if 'Lower_Band' in row else None
-                chart_point["Percent_B"] = round(float(row['Percent_B']), 4) if 'Percent_B' in row else None
+                # Create equity curve and chart data (OHLCV, indicators, signals) from whole columns
+                with timer.stage("chart_build"):
+                    strategy_name = request_params.get("strategy_name", "ma_crossover").lower()
+                    if portfolio_values is None:
+                        portfolio_values = np.empty(0)
+                    
+                    # The equity curve is per strategy bar, so both are cut to the same window
+                    lo, hi = window_positions(strategy_data.index, start_date, end_date)
+                    strategy_data = strategy_data.iloc[lo:hi]
+                    portfolio_values = portfolio_values[lo:hi]
+                    
+                    equity_curve = equity_columns(strategy_data.index, portfolio_values, max_points,
+                                                  keep=signal_positions(strategy_data))
+                    if max_points:
+                        strategy_data = downsample_ohlc(strategy_data, max_points)
+                    chart_data = chart_columns(strategy_data, strategy_name, request_params.get("strategy_params", {}))
+                    
+                    if chart_format != "columnar":
+                        equity_curve = columns_to_records(equity_curve)
+                        chart_data = columns_to_records(chart_data)
+                timer.count("bars_returned", len(strategy_data))
+                
+                # Build the comprehensive response
+                response = {
+                    "backtest_id": backtest_id,
+                    "performance_report": {
+                        "final_portfolio_value": performance_metrics.get("final_portfolio_value", 0),
+                        "total_profit_loss_pct": performance_metrics.get("total_return_pct", 0),
+                        "total_trades": performance_metrics.get("total_trades", 0),
+                        "win_rate_pct": performance_metrics.get("win_rate_pct", 0),
+                        "initial_capital": performance_metrics.get("initial_capital", 0),
+                        "total_pnl": performance_metrics.get("total_pnl", 0),
+                        **{name: performance_metrics.get(name) for name in RISK_METRIC_NAMES},
+                        "strategy_name": performance_metrics.get("strategy_name", ""),
+                        "stock_symbol": performance_metrics.get("stock_symbol", "")
+                    },
+                    "chart_format": "columnar" if chart_format == "columnar" else "records",
+                    "equity_curve": equity_curve,
+                    "chart_data": chart_data
+                }
             
-            chart_data.append(chart_point)
+            # Encode here rather than in the framework so the encoding time and size are measured
+            with timer.stage("json_encoding"):
+                encoded = JSONResponse(response)
+            timer.count("bytes_serialized", len(encoded.body))
         
-        # Build the comprehensive response
-        response = {
-            "backtest_id": backtest_id,
-            "performance_report": {
-                "final_portfolio_value": performance_metrics.get("final_portfolio_value", 0),
-                "total_profit_loss_pct": performance_metrics.get("total_return_pct", 0),
-                "total_trades": performance_metrics.get("total_trades", 0),
-                "win_rate_pct": performance_metrics.get("win_rate_pct", 0),
-                "initial_capital": performance_metrics.get("initial_capital", 0),
-                "total_pnl": performance_metrics.get("total_pnl", 0),
-                "strategy_name": performance_metrics.get("strategy_name", ""),
-                "stock_symbol": performance_metrics.get("stock_symbol", "")
-            },
-            "equity_curve": equity_curve,
-            "chart_data": chart_data
+        results_metrics.record(store_job_timings(backtest_id, "results", timer, chart_format=chart_format, max_points=max_points))
+        return encoded
+        
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to retrieve backtest results: {str(e)}"
         }
+
+@app.get("/backtest/{backtest_id}/chart_data")
+async def stream_chart_data(backtest_id: str):
+    """Stream the chart data of a completed backtest as newline-delimited JSON, one bar per line"""
+    job = db_engine.get_backtest_job(backtest_id, include_results=False)
+    if not job or job["status"] != "COMPLETED":
+        return {
+            "status": "error",
+            "message": f"No completed backtest found with ID {backtest_id}"
+        }
+    
+    request_params = json.loads(job["request_params"]) if job["request_params"] else {}
+    if request_params.get("job_type") in ("portfolio", "multi_strategy", "walk_forward", "sweep"):
+        return {
+            "status": "error",
+            "message": "Portfolio, multi-strategy, walk-forward and sweep jobs have no price chart data"
+        }
+    
+    def chart_lines():
+        # A plain generator, so the response iterates it in the threadpool: the stored
+        # frame is read and converted one chunk at a time without blocking the event loop
+        for strategy_data in iter_strategy_frames(backtest_id, request_params):
+            yield from iter_chart_ndjson(
+                strategy_data,
+                request_params.get("strategy_name", "ma_crossover").lower(),
+                request_params.get("strategy_params", {})
+            )
+    
+    return StreamingResponse(chart_lines(), media_type="application/x-ndjson")
+
+@app.get("/backtest/{backtest_id}/monte_carlo")
+def backtest_monte_carlo(
+    backtest_id: str,
+    source: str = Query("trades", description="'trades' (closed trade P&Ls) or 'returns' (per-bar portfolio returns)"),
+    method: str = Query("bootstrap", description="'bootstrap', 'block_bootstrap' or 'shuffle'"),
+    n_paths: int = Query(10000, ge=1, le=100000),
+    block_size: int = Query(20, ge=1, description="Steps per block for block_bootstrap"),
+    seed: Optional[int] = None,
+    bins: int = Query(50, ge=1, le=500, description="Histogram bins per metric")
+):
+    """Distributions of final equity, max drawdown and win rate over resampled trade or return paths"""
+    try:
+        job = db_engine.get_backtest_job(backtest_id)
+        if not job or job["status"] != "COMPLETED":
+            return {
+                "status": "error",
+                "message": f"No completed backtest found with ID {backtest_id}"
+            }
         
-        return response
+        stored_results = json.loads(job["results"]) if job["results"] else {}
+        request_params = json.loads(job["request_params"]) if job["request_params"] else {}
+        if request_params.get("job_type") == "multi_strategy":
+            return {
+                "status": "error",
+                "message": "Multi-strategy backtests mix several strategies; run Monte Carlo on a single backtest"
+            }
+        if request_params.get("job_type") == "sweep":
+            return {
+                "status": "error",
+                "message": "Parameter sweeps have no trades or equity curve; run Monte Carlo on a single backtest"
+            }
+        initial_capital = stored_results.get("performance_metrics", {}).get(
+            "initial_capital", request_params.get("initial_capital", settings.INITIAL_CAPITAL)
+        )
+        
+        if source == "trades":
+            # Closed trades in the order they were opened
+            trades = sorted(
+                (trade for trade in db_engine.get_trades(backtest_id=backtest_id) if trade["exit_price"] is not None),
+                key=lambda trade: (trade["entry_timestamp"], trade["trade_id"])
+            )
+            steps = np.array([trade["pnl"] for trade in trades], dtype=np.float64)
+        else:
+            portfolio_values = load_equity_curve(backtest_id, stored_results)
+            if portfolio_values is None:
+                raise ValueError("No equity curve stored for this backtest")
+            steps = portfolio_values[1:] / portfolio_values[:-1] - 1.0
+        
+        result = run_monte_carlo(
+            steps, source, initial_capital,
+            method=method, n_paths=n_paths, block_size=block_size, seed=seed, bins=bins
+        )
+        return {"status": "success", "backtest_id": backtest_id, **result}
         
     except Exception as e:
         return {
             "status": "error",
-            "message": f"Failed to retrieve backtest results: {str(e)}"
+            "message": f"Failed to run Monte Carlo analysis: {str(e)}"
         }
 
+@app.get("/metrics")
+async def metrics():
+    """Queue depth, job durations, per-stage timings and counters in Prometheus text format"""
+    return Response(render_prometheus_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.delete("/trades")
 async def delete_all_trades():
     """Delete all trade data from the database"""
@@ -352,6 +1231,51 @@ async def delete_all_trades():
             "message": f"Failed to delete trades: {str(e)}"
         }
 
+@app.get("/backtests")
+async def rank_backtests(
+    order_by: str = Query("sharpe_ratio", description="Metric column to rank by"),
+    ascending: bool = Query(False, description="Lowest first (e.g. for max_drawdown_pct)"),
+    limit: int = Query(50, ge=1, le=1000),
+    strategy_name: Optional[str] = None,
+    stock_symbol: Optional[str] = None,
+    min_sharpe_ratio: Optional[float] = None,
+    min_sortino_ratio: Optional[float] = None,
+    min_cagr_pct: Optional[float] = None,
+    min_profit_factor: Optional[float] = None,
+    min_total_trades: Optional[int] = None,
+    max_drawdown_pct: Optional[float] = Query(None, description="Deepest drawdown allowed, in percent")
+):
+    """Rank completed backtests by a stored metric column, filtered in SQL"""
+    try:
+        equals = {"strategy_name": strategy_name.lower() if strategy_name else None, "stock_symbol": stock_symbol.upper() if stock_symbol else None}
+        minimums = {
+            "sharpe_ratio": min_sharpe_ratio,
+            "sortino_ratio": min_sortino_ratio,
+            "cagr_pct": min_cagr_pct,
+            "profit_factor": min_profit_factor,
+            "total_trades": min_total_trades
+        }
+        jobs = db_engine.rank_backtest_jobs(
+            order_by=order_by,
+            descending=not ascending,
+            limit=limit,
+            equals={column: value for column, value in equals.items() if value is not None},
+            minimums={column: value for column, value in minimums.items() if value is not None},
+            maximums={"max_drawdown_pct": max_drawdown_pct} if max_drawdown_pct is not None else {}
+        )
+        return {
+            "status": "success",
+            "order_by": order_by,
+            "count": len(jobs),
+            "backtests": jobs
+        }
+    
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Failed to rank backtests: {str(e)}"
+        }
+
 @app.delete("/backtests")
 async def delete_all_backtests():
     """Delete all backtest data from the database"""
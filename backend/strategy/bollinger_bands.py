@@ -1,5 +1,9 @@
+from typing import Any, Dict, Optional
+import pandas as pd
 from data_feed.data_feed import fetch_stock_data
 from config import settings
+from strategy.indicators import RollingMean, RollingStd
+from strategy.indicator_cache import load_indicators, price_series_key
 
 def bollinger_bands_strategy(
         window: int = 20,
@@ -21,13 +25,40 @@ def bollinger_bands_strategy(
     )
     data = result[0]  # DataFrame
     
+    # The rolling mean and std are read through the indicator cache
+    rolling = load_indicators(
+        data['Close'], [("sma", window), ("std", window)],
+        price_series_key(stock_symbol, settings.INTERVAL, start_date, end_date, data)
+    )
+    data = bollinger_bands_signals(
+        data, window, std_dev,
+        sma=rolling[("sma", window)],
+        std=rolling[("std", window)]
+    )
+    
+    # Display summary information
+    print(f"Bollinger Bands Strategy: {data.shape} rows, {data['Buy_Signal'].sum()} buy signals, {data['Sell_Signal'].sum()} sell signals")
+    
+    return data
+
+def bollinger_bands_signals(
+        data: pd.DataFrame,
+        window: int = 20,
+        std_dev: float = 2.0,
+        sma: Optional[pd.Series] = None,
+        std: Optional[pd.Series] = None
+    ) -> pd.DataFrame:
+    """
+    Add the Bollinger Bands indicator and signal columns to a price frame
+    A rolling mean and std already computed for the same closes can be passed in to skip recomputing them
+    """
     # Calculate Bollinger Bands components
     
     # 1. Calculate Simple Moving Average (Middle Band)
-    data[f'SMA_{window}'] = data['Close'].rolling(window=window).mean()
+    data[f'SMA_{window}'] = sma if sma is not None else data['Close'].rolling(window=window).mean()
     
     # 2. Calculate Standard Deviation
-    data[f'STD_{window}'] = data['Close'].rolling(window=window).std()
+    data[f'STD_{window}'] = std if std is not None else data['Close'].rolling(window=window).std()
     
     # 3. Calculate Upper and Lower Bands
     data['Upper_Band'] = data[f'SMA_{window}'] + (data[f'STD_{window}'] * std_dev)
@@ -54,9 +85,65 @@ def bollinger_bands_strategy(
     data['Position'] = data['Signal'].diff()
     
     # Clean up data - remove NaN values
-    data = data.dropna()
+    return data.dropna()
+
+
+class BollingerBandsStream:
+    """
+    Bollinger Bands strategy evaluated one bar at a time
     
-    # Display summary information
-    print(f"Bollinger Bands Strategy: {data.shape} rows, {data['Buy_Signal'].sum()} buy signals, {data['Sell_Signal'].sum()} sell signals")
+    Each update costs O(1), so a series can be extended or a live feed driven
+    without recomputing the history. Produces the same columns and values as
+    bollinger_bands_strategy for the same sequence of closes.
+    """
+    
+    __slots__ = ("window", "std_dev", "_sma", "_std", "_signal")
+    
+    def __init__(self, window: int = 20, std_dev: float = 2.0):
+        self.window = window
+        self.std_dev = std_dev
+        self._sma = RollingMean(window)
+        self._std = RollingStd(window)
+        self._signal = None
+    
+    def update(self, close: float) -> Dict[str, Any]:
+        """Add the next close and return that bar's band and signal values"""
+        sma = self._sma.update(close)
+        std = self._std.update(close)
+        upper = sma + (std * self.std_dev)
+        lower = sma - (std * self.std_dev)
+        width = upper - lower
+        
+        # %B with the same 0/0 and x/0 results as the vectorized division
+        distance = close - lower
+        if width != 0:
+            percent_b = distance / width
+        elif distance == 0 or distance != distance:
+            percent_b = float("nan")
+        else:
+            percent_b = float("inf") if distance > 0 else float("-inf")
+        
+        buy = close <= lower
+        sell = close >= upper
+        signal = -1 if sell else (1 if buy else 0)
+        position = float("nan") if self._signal is None else float(signal - self._signal)
+        self._signal = signal
+        
+        return {
+            f'SMA_{self.window}': sma,
+            f'STD_{self.window}': std,
+            'Upper_Band': upper,
+            'Lower_Band': lower,
+            'Band_Width': width,
+            'Percent_B': percent_b,
+            'Buy_Signal': buy,
+            'Sell_Signal': sell,
+            'Signal': signal,
+            'Position': position
+        }
     
-    return data
\ No newline at end of file
+    def extend(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Feed new bars through the strategy and return them with the strategy columns"""
+        rows = [self.update(close) for close in data['Close'].to_numpy(dtype=float)]
+        columns = pd.DataFrame(rows, index=data.index)
+        return pd.concat([data, columns], axis=1).dropna()
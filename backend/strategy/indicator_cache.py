@@ -0,0 +1,200 @@
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from config import settings
+from data_feed.bar_store import bar_store
+from backtest.instrumentation import count_event
+
+# An indicator is identified by its kind and window, e.g. ("ema", 20) or ("std", 20)
+IndicatorKey = Tuple[str, int]
+
+
+def compute_indicator(close: pd.Series, kind: str, window: int) -> pd.Series:
+    """Compute one indicator series from closing prices"""
+    if kind == "ema":
+        return close.ewm(span=window, adjust=False).mean()
+    if kind == "sma":
+        return close.rolling(window=window).mean()
+    if kind == "std":
+        return close.rolling(window=window).std()
+    raise ValueError(f"Unknown indicator '{kind}'")
+
+
+def series_nbytes(series: pd.Series) -> int:
+    """Memory held by a cached series (values plus index)"""
+    return int(series.memory_usage(index=True, deep=False))
+
+
+class IndicatorCache:
+    """
+    Process-wide LRU cache of indicator series under a byte budget
+
+    Entries are keyed by the price series they were computed from (symbol,
+    interval, date range and bar store version) plus the indicator and its
+    window. The least recently used entries are evicted once the cached series
+    exceed max_bytes. All methods can be called from several threads.
+
+    Cached series are shared between callers and must not be modified in place.
+    """
+
+    def __init__(self, max_bytes: int = settings.INDICATOR_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[pd.Series, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[pd.Series]:
+        """Cached series for a key, or None (counts a hit or a miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                count_event("indicator_cache_misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        count_event("indicator_cache_hits")
+        return entry[0]
+
+    def put(self, key: Hashable, series: pd.Series):
+        """Store a series, evicting least recently used entries to stay within budget"""
+        nbytes = series_nbytes(series)
+        if nbytes > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        evicted = 0
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (series, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                _, (_, old_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= old_bytes
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            count_event("indicator_cache_evictions", evicted)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], pd.Series]) -> pd.Series:
+        """
+        Cached series for a key, computing and storing it on a miss
+
+        The computation runs outside the lock, so two threads missing on the same
+        key at once may both compute it; the second result simply replaces the first.
+        """
+        series = self.get(key)
+        if series is None:
+            series = compute()
+            self.put(key, series)
+        return series
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count, size and hit/miss/eviction counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+# Create a global indicator cache instance
+indicator_cache = IndicatorCache()
+
+
+def price_series_key(symbol: str, interval: str, start, end, data: pd.DataFrame) -> Optional[Tuple]:
+    """
+    Identify the price series a frame was loaded as, for use in cache keys
+
+    Only frames served by the bar store carry a version; a fresh download may
+    differ from the last one, so other frames get None and are never cached.
+    """
+    version = data.attrs.get("store_version")
+    if version is None:
+        return None
+    return (symbol.upper(), interval, str(start), str(end), version)
+
+
+def _disk_path(series_key: Tuple, kind: str, window: int) -> str:
+    """File an indicator series is saved in, inside the bar store version it was computed from"""
+    symbol, interval, start, end, version = series_key
+    digest = hashlib.sha1(f"{start}|{end}".encode()).hexdigest()[:16]
+    return os.path.join(bar_store.version_dir(symbol, interval, version), "indicators",
+                        f"{kind}_{window}_{digest}.npy")
+
+
+def load_or_compute_indicator(close: pd.Series, kind: str, window: int, series_key: Tuple) -> pd.Series:
+    """
+    Read an indicator series saved by any process, or compute and save it
+
+    Job workers are short-lived processes, so the in-memory cache alone is lost
+    with each job. The values are saved under the bar store version directory,
+    which goes away with the version itself; a rewrite of the series starts a new
+    version and therefore a fresh set of files.
+    """
+    if not settings.INDICATOR_DISK_CACHE:
+        return compute_indicator(close, kind, window)
+
+    path = _disk_path(series_key, kind, window)
+    try:
+        values = np.load(path)
+    except (OSError, ValueError):
+        values = None
+    if values is not None and len(values) == len(close):
+        count_event("indicator_disk_hits")
+        return pd.Series(values, index=close.index, name=close.name)
+
+    series = compute_indicator(close, kind, window)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a unique name and renamed, so readers never see a partial file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, series.to_numpy(dtype=np.float64))
+        os.replace(tmp_path, path)
+        count_event("indicator_disk_writes")
+    except OSError:
+        # The version may have been removed by a newer write; the series is still valid
+        pass
+    return series
+
+
+def load_indicators(close: pd.Series, keys: Iterable[IndicatorKey],
+                    series_key: Optional[Tuple] = None) -> Dict[IndicatorKey, pd.Series]:
+    """
+    Compute each distinct indicator once, reading through the in-memory cache
+    and the bar store's indicator files when the price series is identified by
+    series_key
+    """
+    indicators = {}
+    for kind, window in sorted(set(keys)):
+        if series_key is None:
+            indicators[(kind, window)] = compute_indicator(close, kind, window)
+        elif settings.INDICATOR_CACHE_MAX_BYTES <= 0:
+            indicators[(kind, window)] = load_or_compute_indicator(close, kind, window, series_key)
+        else:
+            indicators[(kind, window)] = indicator_cache.get_or_compute(
+                series_key + (kind, window),
+                lambda kind=kind, window=window: load_or_compute_indicator(close, kind, window, series_key)
+            )
+    return indicators
@@ -0,0 +1,173 @@
+import math
+from collections import deque
+
+NAN = float("nan")
+
+
+class EMA:
+    """
+    Exponential moving average updated one value at a time
+
+    Follows the recurrence of Series.ewm(span=span, adjust=False).mean(),
+    including the way missing values decay the weight of the previous average.
+    """
+
+    __slots__ = ("span", "alpha", "value", "_old_weight")
+
+    def __init__(self, span: int):
+        if span < 1:
+            raise ValueError("EMA span must be at least 1")
+        self.span = span
+        # Same derivation as pandas: span -> center of mass -> alpha
+        self.alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+        self.value = NAN
+        self._old_weight = 1.0
+
+    def update(self, x: float) -> float:
+        """Add the next value and return the updated average"""
+        if self.value != self.value:
+            # No observation yet
+            if x == x:
+                self.value = x
+            return self.value
+
+        self._old_weight *= 1.0 - self.alpha
+        if x == x:
+            if self.value != x:
+                self.value = (self._old_weight * self.value + self.alpha * x) / (self._old_weight + self.alpha)
+            self._old_weight = 1.0
+        return self.value
+
+
+class RollingMean:
+    """
+    Mean of the last `window` values updated in constant time
+
+    Keeps a compensated (Kahan) running sum like Series.rolling(window).mean(),
+    so the output matches pandas bar for bar. NaN until the window is full.
+    """
+
+    __slots__ = ("window", "_values", "_nobs", "_sum", "_add_compensation", "_remove_compensation",
+                 "_neg_count", "_same_count", "_prev_value")
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError("Rolling window must be at least 1")
+        self.window = window
+        self._values = deque()
+        self._nobs = 0
+        self._sum = 0.0
+        self._add_compensation = 0.0
+        self._remove_compensation = 0.0
+        self._neg_count = 0
+        self._same_count = 0
+        self._prev_value = NAN
+
+    def _add(self, x: float):
+        if x != x:
+            return
+        self._nobs += 1
+        y = x - self._add_compensation
+        t = self._sum + y
+        self._add_compensation = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, x) < 0:
+            self._neg_count += 1
+        self._same_count = self._same_count + 1 if x == self._prev_value else 1
+        self._prev_value = x
+
+    def _remove(self, x: float):
+        if x != x:
+            return
+        self._nobs -= 1
+        y = -x - self._remove_compensation
+        t = self._sum + y
+        self._remove_compensation = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, x) < 0:
+            self._neg_count -= 1
+
+    def update(self, x: float) -> float:
+        """Add the next value and return the mean of the current window"""
+        if len(self._values) == self.window:
+            self._remove(self._values.popleft())
+        self._values.append(x)
+        self._add(x)
+
+        if self._nobs < self.window:
+            return NAN
+        result = self._sum / self._nobs
+        if self._same_count >= self._nobs:
+            result = self._prev_value
+        elif self._neg_count == 0 and result < 0:
+            result = 0.0
+        elif self._neg_count == self._nobs and result > 0:
+            result = 0.0
+        return result
+
+
+class RollingStd:
+    """
+    Sample standard deviation of the last `window` values updated in constant time
+
+    Uses Welford's add/remove updates for the mean and the sum of squared
+    deviations, as Series.rolling(window).std() does. NaN until the window is full.
+    """
+
+    __slots__ = ("window", "ddof", "_values", "_nobs", "_mean", "_ssqdm", "_add_compensation",
+                 "_remove_compensation", "_same_count", "_prev_value")
+
+    def __init__(self, window: int, ddof: int = 1):
+        if window < 1:
+            raise ValueError("Rolling window must be at least 1")
+        self.window = window
+        self.ddof = ddof
+        self._values = deque()
+        self._nobs = 0
+        self._mean = 0.0
+        self._ssqdm = 0.0
+        self._add_compensation = 0.0
+        self._remove_compensation = 0.0
+        self._same_count = 0
+        self._prev_value = NAN
+
+    def _add(self, x: float):
+        if x != x:
+            return
+        self._same_count = self._same_count + 1 if x == self._prev_value else 1
+        self._prev_value = x
+        self._nobs += 1
+        prev_mean = self._mean - self._add_compensation
+        y = x - self._add_compensation
+        t = y - self._mean
+        self._add_compensation = t + self._mean - y
+        self._mean += t / self._nobs
+        self._ssqdm += (x - prev_mean) * (x - self._mean)
+
+    def _remove(self, x: float):
+        if x != x:
+            return
+        self._nobs -= 1
+        if self._nobs:
+            prev_mean = self._mean - self._remove_compensation
+            y = x - self._remove_compensation
+            t = y - self._mean
+            self._remove_compensation = t + self._mean - y
+            self._mean -= t / self._nobs
+            self._ssqdm -= (x - prev_mean) * (x - self._mean)
+        else:
+            self._mean = 0.0
+            self._ssqdm = 0.0
+
+    def update(self, x: float) -> float:
+        """Add the next value and return the standard deviation of the current window"""
+        if len(self._values) == self.window:
+            self._remove(self._values.popleft())
+        self._values.append(x)
+        self._add(x)
+
+        if self._nobs < self.window or self._nobs <= self.ddof:
+            return NAN
+        if self._nobs == 1 or self._same_count >= self._nobs:
+            return 0.0
+        return math.sqrt(max(self._ssqdm / (self._nobs - self.ddof), 0.0))
@@ -1,5 +1,9 @@
+from typing import Any, Dict, Optional
+import pandas as pd
 from data_feed.data_feed import fetch_stock_data
 from config import settings
+from strategy.indicators import EMA
+from strategy.indicator_cache import load_indicators, price_series_key
 
 def ma_crossover_strategy(
         short_window: int = 20, 
@@ -23,9 +27,35 @@ def ma_crossover_strategy(
     )
     data = result[0]  # DataFrame
     
+    # EMAs are read through the indicator cache, so repeated runs on the same bars reuse them
+    emas = load_indicators(
+        data['Close'], [("ema", short_window), ("ema", long_window)],
+        price_series_key(stock_symbol, settings.INTERVAL, start_date, end_date, data)
+    )
+    data = ma_crossover_signals(
+        data, short_window, long_window,
+        ema_short=emas[("ema", short_window)],
+        ema_long=emas[("ema", long_window)]
+    )
+    
+    print(f"MA Crossover Strategy: {data.shape} rows, EMA{short_window}/EMA{long_window}")
+    
+    return data
+
+def ma_crossover_signals(
+        data: pd.DataFrame,
+        short_window: int = 20,
+        long_window: int = 50,
+        ema_short: Optional[pd.Series] = None,
+        ema_long: Optional[pd.Series] = None
+    ) -> pd.DataFrame:
+    """
+    Add the MA crossover indicator and signal columns to a price frame
+    EMAs already computed for the same closes can be passed in to skip recomputing them
+    """
     # Calculate EMAs for all entries
-    data[f'EMA{short_window}'] = data['Close'].ewm(span=short_window, adjust=False).mean()
-    data[f'EMA{long_window}'] = data['Close'].ewm(span=long_window, adjust=False).mean()
+    data[f'EMA{short_window}'] = ema_short if ema_short is not None else data['Close'].ewm(span=short_window, adjust=False).mean()
+    data[f'EMA{long_window}'] = ema_long if ema_long is not None else data['Close'].ewm(span=long_window, adjust=False).mean()
 
     # Generate trading signals based on moving average crossover
     # Signal: 1 when EMA20 > EMA50 (bullish), 0 when EMA20 < EMA50 (bearish)
@@ -39,8 +69,48 @@ def ma_crossover_strategy(
     data['Sell_Signal'] = (data['Position'] == -1)
     
     # Remove NaN values to make JSON compliant
-    data = data.dropna()
+    return data.dropna()
+
+
+class MACrossoverStream:
+    """
+    MA Crossover strategy evaluated one bar at a time
     
-    print(f"MA Crossover Strategy: {data.shape} rows, EMA{short_window}/EMA{long_window}")
+    Each update costs O(1), so a series can be extended or a live feed driven
+    without recomputing the history. Produces the same columns and values as
+    ma_crossover_strategy for the same sequence of closes.
+    """
+    
+    __slots__ = ("short_window", "long_window", "_ema_short", "_ema_long", "_signal")
+    
+    def __init__(self, short_window: int = 20, long_window: int = 50):
+        self.short_window = short_window
+        self.long_window = long_window
+        self._ema_short = EMA(short_window)
+        self._ema_long = EMA(long_window)
+        self._signal = None
+    
+    def update(self, close: float) -> Dict[str, Any]:
+        """Add the next close and return that bar's indicator and signal values"""
+        ema_short = self._ema_short.update(close)
+        ema_long = self._ema_long.update(close)
+        signal = int(ema_short > ema_long)
+        
+        # Position: 1 for buy signal, -1 for sell signal, NaN on the first bar
+        position = float("nan") if self._signal is None else float(signal - self._signal)
+        self._signal = signal
+        
+        return {
+            f'EMA{self.short_window}': ema_short,
+            f'EMA{self.long_window}': ema_long,
+            'Signal': signal,
+            'Position': position,
+            'Buy_Signal': position == 1,
+            'Sell_Signal': position == -1
+        }
     
-    return data
\ No newline at end of file
+    def extend(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Feed new bars through the strategy and return them with the strategy columns"""
+        rows = [self.update(close) for close in data['Close'].to_numpy(dtype=float)]
+        columns = pd.DataFrame(rows, index=data.index)
+        return pd.concat([data, columns], axis=1).dropna()
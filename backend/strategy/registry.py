@@ -0,0 +1,139 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from strategy.indicator_cache import IndicatorKey, load_indicators
+from strategy.ma_crossover import ma_crossover_strategy, ma_crossover_signals, MACrossoverStream
+from strategy.bollinger_bands import bollinger_bands_strategy, bollinger_bands_signals, BollingerBandsStream
+
+class StrategySpec:
+    """
+    Everything the backtester needs to know about one strategy
+
+    Args:
+        name: Strategy name used in requests
+        defaults: Parameters and their default values
+        indicators: params -> indicator keys the strategy reads
+        signals: (price frame, params, indicators) -> strategy frame
+        run: (params, symbol, start, end) -> strategy frame, fetching its own data
+        stream: params -> bar-by-bar strategy object
+        chart_indicators: params -> (column, decimals) pairs sent with chart data
+    """
+
+    def __init__(self,
+                 name: str,
+                 defaults: Dict[str, Any],
+                 indicators: Callable[[Dict[str, Any]], List[IndicatorKey]],
+                 signals: Callable[[pd.DataFrame, Dict[str, Any], Dict[IndicatorKey, pd.Series]], pd.DataFrame],
+                 run: Callable[[Dict[str, Any], str, str, str], pd.DataFrame],
+                 stream: Callable[[Dict[str, Any]], Any],
+                 chart_indicators: Callable[[Dict[str, Any]], List[Tuple[str, int]]]):
+        self.name = name
+        self.defaults = defaults
+        self._indicators = indicators
+        self._signals = signals
+        self._run = run
+        self._stream = stream
+        self._chart_indicators = chart_indicators
+
+    def params(self, strategy_params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Strategy parameters with defaults filled in (unrelated keys are dropped)"""
+        strategy_params = strategy_params or {}
+        return {key: strategy_params.get(key, default) for key, default in self.defaults.items()}
+
+    def indicators(self, strategy_params: Optional[Dict[str, Any]]) -> List[IndicatorKey]:
+        """Indicator keys this strategy needs for the given parameters"""
+        return self._indicators(self.params(strategy_params))
+
+    def signals(self, data: pd.DataFrame, strategy_params: Optional[Dict[str, Any]],
+                indicators: Optional[Dict[IndicatorKey, pd.Series]] = None) -> pd.DataFrame:
+        """Strategy frame for already loaded prices, reusing precomputed indicators"""
+        params = self.params(strategy_params)
+        if indicators is None:
+            indicators = compute_indicators(data['Close'], self._indicators(params))
+        return self._signals(data.copy(), params, indicators)
+
+    def run(self, strategy_params: Optional[Dict[str, Any]], stock_symbol: str,
+            start_date: str, end_date: str) -> pd.DataFrame:
+        """Fetch prices and build the strategy frame"""
+        return self._run(self.params(strategy_params), stock_symbol, start_date, end_date)
+
+    def stream(self, strategy_params: Optional[Dict[str, Any]]):
+        """New bar-by-bar strategy object"""
+        return self._stream(self.params(strategy_params))
+
+    def chart_indicators(self, strategy_params: Optional[Dict[str, Any]]) -> List[Tuple[str, int]]:
+        """Indicator columns shown on the chart, with their rounding"""
+        return self._chart_indicators(self.params(strategy_params))
+
+
+# All strategies the API can run, by name
+STRATEGIES: Dict[str, StrategySpec] = {}
+
+
+def register_strategy(spec: StrategySpec):
+    """Make a strategy available to backtests, sweeps, replays and comparisons"""
+    STRATEGIES[spec.name] = spec
+
+
+def get_strategy(strategy_name: str) -> StrategySpec:
+    """Look up a strategy by name; unknown names raise ValueError"""
+    spec = STRATEGIES.get(strategy_name.lower())
+    if spec is None:
+        raise ValueError(f"Unknown strategy '{strategy_name}'. Available strategies: {', '.join(STRATEGIES)}")
+    return spec
+
+
+def compute_indicators(close: pd.Series, keys: Iterable[IndicatorKey],
+                       series_key: Optional[Tuple] = None) -> Dict[IndicatorKey, pd.Series]:
+    """Compute each distinct indicator once (cached across calls when series_key is given)"""
+    return load_indicators(close, keys, series_key)
+
+
+def build_strategy_frames(data: pd.DataFrame,
+                          strategies: List[Tuple[str, Dict[str, Any]]],
+                          series_key: Optional[Tuple] = None) -> List[pd.DataFrame]:
+    """
+    Strategy frames of several strategies on the same prices
+
+    The union of the indicators all strategies need is computed once, so two
+    strategies that share an EMA or rolling window only compute it once.
+    """
+    specs = [(get_strategy(name), params) for name, params in strategies]
+    keys = [key for spec, params in specs for key in spec.indicators(params)]
+    indicators = compute_indicators(data['Close'], keys, series_key)
+    return [spec.signals(data, params, indicators) for spec, params in specs]
+
+
+register_strategy(StrategySpec(
+    name="ma_crossover",
+    defaults={"short_window": 20, "long_window": 50},
+    indicators=lambda p: [("ema", int(p["short_window"])), ("ema", int(p["long_window"]))],
+    signals=lambda data, p, ind: ma_crossover_signals(
+        data, p["short_window"], p["long_window"],
+        ema_short=ind[("ema", int(p["short_window"]))],
+        ema_long=ind[("ema", int(p["long_window"]))]
+    ),
+    run=lambda p, symbol, start, end: ma_crossover_strategy(
+        short_window=p["short_window"], long_window=p["long_window"],
+        stock_symbol=symbol, start_date=start, end_date=end
+    ),
+    stream=lambda p: MACrossoverStream(short_window=p["short_window"], long_window=p["long_window"]),
+    chart_indicators=lambda p: [(f"EMA{p['short_window']}", 2), (f"EMA{p['long_window']}", 2)]
+))
+
+register_strategy(StrategySpec(
+    name="bollinger_bands",
+    defaults={"window": 20, "std_dev": 2.0},
+    indicators=lambda p: [("sma", int(p["window"])), ("std", int(p["window"]))],
+    signals=lambda data, p, ind: bollinger_bands_signals(
+        data, p["window"], p["std_dev"],
+        sma=ind[("sma", int(p["window"]))],
+        std=ind[("std", int(p["window"]))]
+    ),
+    run=lambda p, symbol, start, end: bollinger_bands_strategy(
+        window=p["window"], std_dev=p["std_dev"],
+        stock_symbol=symbol, start_date=start, end_date=end
+    ),
+    stream=lambda p: BollingerBandsStream(window=p["window"], std_dev=p["std_dev"]),
+    chart_indicators=lambda p: [(f"SMA_{p['window']}", 2), ("Upper_Band", 2), ("Lower_Band", 2), ("Percent_B", 4)]
+))
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings are read when config is first imported, so point the database and the
+# bar store at a scratch directory before any test module imports the backend
+_scratch = tempfile.mkdtemp(prefix="backtest-tests-")
+os.environ.setdefault("DB_PATH", os.path.join(_scratch, "trade_data.db"))
+os.environ.setdefault("DATA_STORE_DIR", os.path.join(_scratch, "store"))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A database engine on an empty database of its own"""
+    from database.db_engine import DatabaseEngine
+    engine = DatabaseEngine(db_path=str(tmp_path / "trade_data.db"))
+    yield engine
+    engine.close()
@@ -0,0 +1,116 @@
+"""
+The bar store only downloads what it doesn't already cover, merges each new
+download into the stored series and keeps the previous version on disk for
+readers that opened it before a write.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from data_feed.bar_store import BarStore, merge_ranges, subtract_ranges
+from data_feed.synthetic import generate_bars
+
+T = pd.Timestamp
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(root=str(tmp_path))
+
+
+def test_merge_ranges_joins_overlapping_and_touching_ranges():
+    ranges = [
+        (T("2020-03-01"), T("2020-04-01")),
+        (T("2020-01-01"), T("2020-02-01")),
+        (T("2020-02-01"), T("2020-02-15")),
+        (T("2020-03-15"), T("2020-03-20")),
+        (T("2020-05-01"), T("2020-05-01")),
+    ]
+    assert merge_ranges(ranges) == [
+        (T("2020-01-01"), T("2020-02-15")),
+        (T("2020-03-01"), T("2020-04-01")),
+    ]
+
+
+def test_subtract_ranges_returns_the_gaps():
+    covered = [(T("2020-02-01"), T("2020-03-01")), (T("2020-04-01"), T("2020-05-01"))]
+    assert subtract_ranges(T("2020-01-01"), T("2020-06-01"), covered) == [
+        (T("2020-01-01"), T("2020-02-01")),
+        (T("2020-03-01"), T("2020-04-01")),
+        (T("2020-05-01"), T("2020-06-01")),
+    ]
+    assert subtract_ranges(T("2020-02-10"), T("2020-02-20"), covered) == []
+
+
+def test_missing_ranges_before_and_after_writes(store):
+    start, end = "2020-01-01", "2021-01-01"
+    assert store.missing_ranges("TEST", "1d", start, end) == [(T(start), T(end))]
+
+    bars = generate_bars(60, start="2020-03-02", seed=1)
+    store.write("TEST", "1d", bars, [(T("2020-03-01"), T("2020-06-01"))])
+    assert store.missing_ranges("TEST", "1d", start, end) == [
+        (T("2020-01-01"), T("2020-03-01")),
+        (T("2020-06-01"), T("2021-01-01")),
+    ]
+    # Timezone-aware bounds are compared as wall-clock dates
+    assert store.missing_ranges("TEST", "1d", T("2020-03-10", tz="America/New_York"),
+                                T("2020-04-10", tz="America/New_York")) == []
+
+
+def test_coverage_merges_across_writes(store):
+    store.write("TEST", "1d", generate_bars(20, start="2020-01-01", seed=1),
+                [(T("2020-01-01"), T("2020-02-01"))])
+    store.write("TEST", "1d", generate_bars(20, start="2020-03-02", seed=2),
+                [(T("2020-03-01"), T("2020-04-01"))])
+    assert store.coverage("TEST", "1d") == [
+        (T("2020-01-01"), T("2020-02-01")),
+        (T("2020-03-01"), T("2020-04-01")),
+    ]
+
+    # Filling the gap joins everything into one range
+    store.write("TEST", "1d", generate_bars(20, start="2020-02-03", seed=3),
+                [(T("2020-02-01"), T("2020-03-01"))])
+    assert store.coverage("TEST", "1d") == [(T("2020-01-01"), T("2020-04-01"))]
+
+
+def test_empty_download_still_records_coverage(store):
+    store.write("TEST", "1d", pd.DataFrame(), [(T("2020-01-01"), T("2020-01-05"))])
+    assert store.read_meta("TEST", "1d")["rows"] == 0
+    assert store.load("TEST", "1d").empty
+    assert store.missing_ranges("TEST", "1d", "2020-01-01", "2020-01-05") == []
+
+
+def test_later_writes_replace_overlapping_rows(store):
+    first = generate_bars(30, start="2020-01-01", seed=1)
+    second = generate_bars(30, start="2020-01-20", seed=2)
+    store.write("TEST", "1d", first, [(T("2020-01-01"), T("2020-02-12"))])
+    store.write("TEST", "1d", second, [(T("2020-01-20"), T("2020-03-02"))])
+
+    loaded = store.load("TEST", "1d")
+    assert loaded.index.is_monotonic_increasing
+    assert not loaded.index.duplicated().any()
+    assert len(loaded) == len(first.index.union(second.index))
+    pd.testing.assert_frame_equal(loaded.loc[second.index], second, check_freq=False)
+    older = first.index.difference(second.index)
+    pd.testing.assert_frame_equal(loaded.loc[older], first.loc[older], check_freq=False)
+
+
+def test_load_respects_bounds(store):
+    bars = generate_bars(40, start="2020-01-01", seed=1)
+    store.write("TEST", "1d", bars, [(T("2020-01-01"), T("2020-03-01"))])
+    loaded = store.load("TEST", "1d", "2020-01-10", "2020-01-20")
+    expected = bars[(bars.index >= T("2020-01-10", tz=bars.index.tz))
+                    & (bars.index < T("2020-01-20", tz=bars.index.tz))]
+    pd.testing.assert_frame_equal(loaded, expected, check_freq=False)
+
+
+def test_versions_rotate_keeping_the_previous_one(store):
+    for seed in range(3):
+        bars = generate_bars(10, start=f"2020-0{seed + 1}-01", seed=seed)
+        store.write("TEST", "1d", bars, [(bars.index[0].tz_localize(None), bars.index[-1].tz_localize(None))])
+
+    assert store.read_meta("TEST", "1d")["version"] == 3
+    assert os.path.isdir(store.version_dir("TEST", "1d", 3))
+    assert os.path.isdir(store.version_dir("TEST", "1d", 2))
+    assert not os.path.exists(store.version_dir("TEST", "1d", 1))
@@ -0,0 +1,88 @@
+"""
+Bulk import turns vendor tables into yfinance-shaped frames: columns matched by
+name, timestamps parsed exactly (UTC offsets included) and incomplete rows dropped.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_feed.bulk_import import _parse_iso_with_offset, _parse_timestamps, normalize_frame, read_file
+from data_feed.synthetic import generate_bars
+
+
+def test_parse_iso_with_offset_matches_pandas():
+    values = pd.Series([
+        "2021-03-12 09:30:00-05:00",
+        "2021-03-15 09:30:00-04:00",  # after the DST change
+        "2021-03-15T16:00:00+00:00",
+        "2021-03-16 01:15:00+05:30",
+        "2021-03-16 23:59:59-09:30",
+    ])
+    expected = pd.DatetimeIndex(pd.to_datetime(values, utc=True, format="ISO8601"))
+    pd.testing.assert_index_equal(_parse_iso_with_offset(values), expected)
+
+
+def test_offset_strings_take_the_fast_path_and_others_fall_back():
+    with_offset = pd.Series(["2021-01-04 09:30:00-05:00", "2021-01-04 09:31:00-05:00"])
+    parsed = _parse_timestamps(with_offset)
+    assert str(parsed.tz) == "UTC"
+    assert parsed[0] == pd.Timestamp("2021-01-04 14:30", tz="UTC")
+
+    naive = _parse_timestamps(pd.Series(["2021-01-04", "2021-01-05"]))
+    assert naive.tz is None and naive[1] == pd.Timestamp("2021-01-05")
+
+    zulu = _parse_timestamps(pd.Series(["2021-01-04T14:30:00Z", "2021-01-04T14:31:00Z"]))
+    assert zulu[0] == pd.Timestamp("2021-01-04 14:30", tz="UTC")
+
+
+@pytest.mark.parametrize("scale", [1, 1000])
+def test_epoch_numbers_are_read_as_utc(scale):
+    seconds = pd.Series([1609772400, 1609858800])
+    parsed = _parse_timestamps(seconds * scale)
+    assert parsed[0] == pd.Timestamp("2021-01-04 15:00", tz="UTC")
+
+
+def test_normalize_frame_maps_vendor_columns():
+    table = pd.DataFrame({
+        "Timestamp": ["2021-01-04", "2021-01-05", "2021-01-06"],
+        "ticker": [" aapl", "AAPL", "aapl "],
+        "o": [1.0, 2.0, 3.0],
+        "H": ["1.5", "2.5", "3.5"],
+        "low": [0.5, 1.5, 2.5],
+        "Last": [1.2, None, 3.2],
+        "extra": ["x", "y", "z"],
+    })
+    data = normalize_frame(table)
+
+    assert list(data.columns) == ["Open", "High", "Low", "Close", "Volume", "Symbol"]
+    assert data.index.name == "Date"
+    # The row without a close is dropped
+    assert list(data.index) == [pd.Timestamp("2021-01-04"), pd.Timestamp("2021-01-06")]
+    assert list(data["High"]) == [1.5, 3.5]
+    assert list(data["Volume"]) == [0, 0]
+    assert set(data["Symbol"]) == {"AAPL"}
+
+
+def test_normalize_frame_uses_first_column_without_a_timestamp_name():
+    table = pd.DataFrame({"when": ["2021-01-04"], "open": [1], "high": [1], "low": [1], "close": [1]})
+    assert normalize_frame(table).index[0] == pd.Timestamp("2021-01-04")
+
+
+def test_normalize_frame_rejects_tables_without_prices():
+    with pytest.raises(ValueError, match="missing columns Low, Close"):
+        normalize_frame(pd.DataFrame({"date": ["2021-01-04"], "open": [1], "high": [1]}))
+
+
+def test_exported_csv_reads_back_unchanged(tmp_path):
+    bars = generate_bars(50, start="2021-03-01", seed=5)
+    path = tmp_path / "BRK_B_2021-03-01_2021-05-10_1d.csv"
+    bars.to_csv(path)
+
+    result = read_file(str(path))
+    assert result["error"] is None
+    [(symbol, interval, frame, exported_range)] = result["pieces"]
+    assert (symbol, interval) == ("BRK_B", "1d")
+    assert exported_range == (pd.Timestamp("2021-03-01"), pd.Timestamp("2021-05-10"))
+    np.testing.assert_array_equal(frame.index.asi8, bars.index.tz_convert("UTC").asi8)
+    pd.testing.assert_frame_equal(frame.reset_index(drop=True), bars[frame.columns].reset_index(drop=True),
+                                  check_dtype=False)
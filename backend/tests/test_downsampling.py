@@ -0,0 +1,95 @@
+"""
+Downsampled charts keep the shape of the data: LTTB keeps the points a
+reference implementation keeps, and aggregated candles keep price extremes,
+total volume and every trade signal bar.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.downsampling import downsample_curve, downsample_ohlc, lttb_indices, window_positions
+from data_feed.synthetic import generate_bars
+
+
+def reference_lttb(x, y, n_out):
+    """Textbook LTTB, one point at a time"""
+    n = len(y)
+    every = (n - 2) / (n_out - 2)
+    selected = [0]
+    a = 0
+    for i in range(n_out - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n)
+        if i == n_out - 3:
+            next_x, next_y = x[n - 1], y[n - 1]
+        else:
+            next_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+            next_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - next_x) * (y[j] - y[a]) - (x[a] - x[j]) * (next_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return np.array(selected)
+
+
+@pytest.mark.parametrize("n, n_out", [(1000, 100), (1000, 3), (101, 11), (5000, 250)])
+def test_lttb_matches_reference(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.integers(1, 4, n)).astype(float)
+    y = np.cumsum(rng.normal(size=n))
+    np.testing.assert_array_equal(lttb_indices(x, y, n_out), reference_lttb(list(x), list(y), n_out))
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    y = np.zeros(1000)
+    y[337] = 50.0
+    y[712] = -50.0
+    selected = lttb_indices(np.arange(1000.0), y, 20)
+    assert len(selected) == 20
+    assert selected[0] == 0 and selected[-1] == 999
+    assert np.all(np.diff(selected) > 0)
+    assert {337, 712} <= set(selected)
+
+
+def test_lttb_returns_everything_when_asked_for_as_many_points():
+    np.testing.assert_array_equal(lttb_indices(np.arange(10.0), np.ones(10), 10), np.arange(10))
+
+
+def test_downsample_curve_always_includes_kept_positions():
+    index = pd.date_range("2020-01-01", periods=2000, freq="B")
+    values = np.cumsum(np.random.default_rng(1).normal(size=2000))
+    keep = np.array([5, 999, 1500])
+    selected = downsample_curve(index, values, 200, keep=keep)
+    assert len(selected) <= 200
+    assert set(keep) <= set(selected)
+    assert np.all(np.diff(selected) > 0)
+
+
+def test_downsample_ohlc_keeps_extremes_volume_and_signals():
+    frame = generate_bars(3000, seed=3)
+    frame["Position"] = 0.0
+    signals = [10, 11, 500, 2999]
+    frame.iloc[signals, frame.columns.get_loc("Position")] = [1.0, -1.0, 1.0, -1.0]
+
+    sampled = downsample_ohlc(frame, 300)
+    assert len(sampled) <= 300 + 2 * len(signals)
+    assert sampled["High"].max() == frame["High"].max()
+    assert sampled["Low"].min() == frame["Low"].min()
+    assert sampled["Volume"].sum() == pytest.approx(frame["Volume"].sum())
+    assert sampled.index[0] == frame.index[0]
+
+    marked = sampled[sampled["Position"] != 0]
+    pd.testing.assert_index_equal(marked.index, frame.index[signals])
+    np.testing.assert_array_equal(marked["Close"].to_numpy(), frame["Close"].iloc[signals].to_numpy())
+
+
+def test_window_positions_date_only_end_includes_the_day():
+    index = pd.date_range("2020-01-01", periods=48, freq="h")
+    assert window_positions(index, "2020-01-01", "2020-01-01") == (0, 24)
+    assert window_positions(index, "2020-01-02", None) == (24, 48)
+    assert window_positions(index, None, "2020-01-01 05:00") == (0, 6)
@@ -0,0 +1,72 @@
+"""
+Job metrics are read from the database once and then kept up to date as
+workers exit, so a /metrics scrape doesn't reread every job's timings.
+"""
+import pytest
+
+import backtest.instrumentation as instrumentation
+from backtest.instrumentation import JobMetrics, render_prometheus_metrics
+
+
+def finish_job(db, backtest_id, seconds, status="COMPLETED", job_type="backtest"):
+    db.create_backtest_job(backtest_id, "{}")
+    run = {"job_type": job_type, "total_seconds": seconds,
+           "stages": {"fetch": seconds / 2, "simulate": seconds / 2}, "counters": {"bars_processed": 100}}
+    db.transition_backtest_status(backtest_id, ["PENDING"], status, timings={"run": run})
+
+
+@pytest.fixture
+def job_metrics(db, monkeypatch):
+    metrics = JobMetrics()
+    monkeypatch.setattr(instrumentation, "db_engine", db)
+    monkeypatch.setattr(instrumentation, "job_metrics", metrics)
+    return metrics
+
+
+def test_stored_timings_are_loaded_once(db, job_metrics, monkeypatch):
+    finish_job(db, "job-1", 0.2)
+    finish_job(db, "job-2", 3.0, status="FAILED")
+    text = render_prometheus_metrics()
+
+    assert 'backtest_job_duration_seconds_count{job_type="backtest",status="COMPLETED"} 1' in text
+    assert 'backtest_job_duration_seconds_bucket{job_type="backtest",status="FAILED",le="5.0"} 1' in text
+    assert 'backtest_stage_seconds_total{stage="fetch"} 1.6' in text
+    assert "backtest_bars_processed_total 200" in text
+
+    def rescan():
+        raise AssertionError("timings of all jobs reread")
+
+    monkeypatch.setattr(db, "get_backtest_job_timings", rescan)
+    assert render_prometheus_metrics() == text
+
+
+def test_finished_jobs_are_added_as_they_exit(db, job_metrics):
+    finish_job(db, "job-1", 0.2)
+    job_metrics.load()
+    finish_job(db, "job-2", 0.4, job_type="sweep")
+    job_metrics.record_finished("job-2")
+    # A job that finished without storing run timings (e.g. its worker crashed)
+    db.create_backtest_job("job-3", "{}")
+    job_metrics.record_finished("job-3")
+
+    text = render_prometheus_metrics()
+    assert 'backtest_job_duration_seconds_count{job_type="backtest",status="COMPLETED"} 1' in text
+    assert 'backtest_job_duration_seconds_count{job_type="sweep",status="COMPLETED"} 1' in text
+    assert "backtest_bars_processed_total 200" in text
+
+
+def test_jobs_finishing_before_the_first_load_are_counted_once(db, job_metrics):
+    finish_job(db, "job-1", 0.2)
+    job_metrics.record_finished("job-1")
+    text = render_prometheus_metrics()
+    assert 'backtest_job_duration_seconds_count{job_type="backtest",status="COMPLETED"} 1' in text
+
+
+def test_jobs_still_running_at_the_first_load_are_counted_once(db, job_metrics):
+    job_metrics.record_started("job-1")
+    # The job stores its outcome before its worker exits and is reaped
+    finish_job(db, "job-1", 0.2)
+    job_metrics.load()
+    job_metrics.record_finished("job-1")
+    text = render_prometheus_metrics()
+    assert 'backtest_job_duration_seconds_count{job_type="backtest",status="COMPLETED"} 1' in text
@@ -0,0 +1,87 @@
+"""
+The executor queue is the backtest_jobs table: waiting jobs are told their
+position as jobs ahead of them leave, and cancel works on queued and running jobs.
+"""
+import time
+
+import pytest
+
+import backtest.job_executor as job_executor
+from backtest.job_executor import BacktestExecutor
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Job events the executor publishes, as (backtest_id, job_status, queue_position)"""
+    published = []
+
+    def publish_job_event(backtest_id, job_status, queue_position=None, **kwargs):
+        published.append((backtest_id, job_status, queue_position))
+
+    monkeypatch.setattr(job_executor, "publish_job_event", publish_job_event)
+    return published
+
+
+@pytest.fixture
+def executor(db, monkeypatch):
+    monkeypatch.setattr(job_executor, "db_engine", db)
+    return BacktestExecutor(max_workers=1)
+
+
+def queue_jobs(db, *backtest_ids):
+    for backtest_id in backtest_ids:
+        db.create_backtest_job(backtest_id, '{"job_type": "backtest"}')
+
+
+def test_queue_position_follows_insertion_order(db, executor):
+    queue_jobs(db, "job-1", "job-2", "job-3")
+    assert [executor.queue_position(b) for b in ("job-1", "job-2", "job-3")] == [1, 2, 3]
+    assert db.get_pending_job_ids() == ["job-1", "job-2", "job-3"]
+
+    db.transition_backtest_status("job-1", ["PENDING"], "RUNNING")
+    assert executor.queue_position("job-1") is None
+    assert [executor.queue_position(b) for b in ("job-2", "job-3")] == [1, 2]
+    assert executor.queue_position("no-such-job") is None
+
+
+def test_cancel_queued_job_moves_the_jobs_behind_it_up(db, executor, events):
+    queue_jobs(db, "job-1", "job-2", "job-3")
+
+    assert executor.cancel("job-2")
+    assert db.get_backtest_job("job-2")["status"] == "CANCELLED"
+    assert events == [("job-2", "CANCELLED", None), ("job-1", "PENDING", 1), ("job-3", "PENDING", 2)]
+    assert executor.queue_position("job-3") == 2
+
+
+def test_cancel_running_job_terminates_its_worker(db, executor, events):
+    queue_jobs(db, "job-1")
+    db.transition_backtest_status("job-1", ["PENDING"], "RUNNING")
+    process = job_executor._mp_context.Process(target=time.sleep, args=(60,))
+    process.start()
+    executor._running["job-1"] = process
+
+    assert executor.cancel("job-1")
+    assert not process.is_alive()
+    assert "job-1" not in executor._running
+    assert db.get_backtest_job("job-1")["status"] == "CANCELLED"
+    assert events == [("job-1", "CANCELLED", None)]
+
+
+def test_cancel_finished_job_does_nothing(db, executor, events):
+    queue_jobs(db, "job-1")
+    db.transition_backtest_status("job-1", ["PENDING"], "COMPLETED")
+
+    assert not executor.cancel("job-1")
+    assert db.get_backtest_job("job-1")["status"] == "COMPLETED"
+    assert events == []
+
+
+def test_unknown_job_type_fails_without_starting_a_worker(db, executor, events):
+    db.create_backtest_job("job-1", '{"job_type": "nope"}')
+    queue_jobs(db, "job-2")
+
+    assert executor._start_next_job()
+    job = db.get_backtest_job("job-1")
+    assert (job["status"], job["error_message"]) == ("FAILED", "Unknown job type 'nope'")
+    assert executor._running == {}
+    assert executor.queue_position("job-2") == 1
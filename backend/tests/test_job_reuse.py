@@ -0,0 +1,72 @@
+"""
+Identical requests share one job: a queued or running job is attached to
+whatever data version it reads, a completed one is reused only while the data
+it read is still the current version.
+"""
+from backtest.request_hash import request_params_hash
+
+REQUEST = {
+    "stock_symbol": "aapl",
+    "start_date": "2020-01-01",
+    "end_date": "2021-01-01",
+    "initial_capital": 10000.0,
+    "strategy_name": "ma_crossover",
+    "strategy_params": {"short_window": 20, "long_window": 50},
+    "persist_trades": True,
+}
+
+
+def test_hash_ignores_formatting_and_defaulted_params():
+    same = dict(REQUEST, stock_symbol="AAPL", initial_capital=10000,
+                strategy_params={"long_window": 50, "short_window": 20, "unused": 1})
+    assert request_params_hash("backtest", same) == request_params_hash("backtest", REQUEST)
+
+
+def test_hash_changes_with_results_affecting_fields():
+    base = request_params_hash("backtest", REQUEST)
+    assert request_params_hash("backtest", dict(REQUEST, end_date="2021-06-01")) != base
+    assert request_params_hash("backtest", dict(REQUEST, persist_trades=False)) != base
+    assert request_params_hash("portfolio", dict(REQUEST, stock_symbols=["AAPL"])) != base
+
+
+def test_new_request_creates_a_pending_job(db):
+    job = db.find_or_create_backtest_job("job-1", "{}", "hash", "AAPL:1")
+    assert job == {"backtest_id": "job-1", "status": "PENDING", "created": True}
+    assert db.get_backtest_job("job-1")["status"] == "PENDING"
+
+
+def test_identical_request_attaches_to_the_job_in_flight(db):
+    db.find_or_create_backtest_job("job-1", "{}", "hash", None)
+    assert db.find_or_create_backtest_job("job-2", "{}", "hash", "AAPL:1") == \
+        {"backtest_id": "job-1", "status": "PENDING", "created": False}
+
+    db.transition_backtest_status("job-1", ["PENDING"], "RUNNING")
+    assert db.find_or_create_backtest_job("job-3", "{}", "hash", None) == \
+        {"backtest_id": "job-1", "status": "RUNNING", "created": False}
+    assert db.get_backtest_job("job-2") is None
+
+
+def test_completed_job_is_reused_only_for_the_data_version_it_read(db):
+    db.find_or_create_backtest_job("job-1", "{}", "hash", None)
+    db.transition_backtest_status("job-1", ["PENDING"], "COMPLETED", data_version="AAPL:1")
+
+    assert db.find_or_create_backtest_job("job-2", "{}", "hash", "AAPL:1") == \
+        {"backtest_id": "job-1", "status": "COMPLETED", "created": False}
+    # Newer bars, or bars that are not fully stored yet, need a new run
+    assert db.find_or_create_backtest_job("job-3", "{}", "hash", "AAPL:2")["created"]
+    db.transition_backtest_status("job-3", ["PENDING"], "CANCELLED")
+    assert db.find_or_create_backtest_job("job-4", "{}", "hash", None)["created"]
+
+
+def test_failed_and_cancelled_jobs_are_not_reused(db):
+    db.find_or_create_backtest_job("job-1", "{}", "hash", None)
+    db.transition_backtest_status("job-1", ["PENDING"], "FAILED", error_message="boom")
+    assert db.find_or_create_backtest_job("job-2", "{}", "hash", None)["created"]
+
+    db.transition_backtest_status("job-2", ["PENDING"], "CANCELLED")
+    assert db.find_or_create_backtest_job("job-3", "{}", "hash", None)["created"]
+
+
+def test_different_hash_gets_its_own_job(db):
+    db.find_or_create_backtest_job("job-1", "{}", "hash-a", None)
+    assert db.find_or_create_backtest_job("job-2", "{}", "hash-b", None)["created"]
@@ -0,0 +1,95 @@
+"""
+Monte Carlo paths are evaluated as whole matrices; their statistics must match
+walking each path one step at a time.
+"""
+import numpy as np
+import pytest
+
+from backtest.monte_carlo import path_statistics, resample_indices, run_monte_carlo
+
+CAPITAL = 1000.0
+
+
+def walk_path(steps, source, initial_capital):
+    """Final equity, max drawdown (%) and win rate (%) of one path, step by step"""
+    equity = peak = initial_capital
+    max_drawdown = 0.0
+    for step in steps:
+        equity = equity + step if source == "trades" else equity * (1 + step)
+        peak = max(peak, equity)
+        max_drawdown = max(max_drawdown, (1 - equity / peak) * 100)
+    decided = [step for step in steps if step != 0]
+    win_rate = sum(step > 0 for step in decided) / len(decided) * 100 if decided else 0.0
+    return equity, max_drawdown, win_rate
+
+
+def test_trade_path_statistics():
+    stats = path_statistics(np.array([[100.0, -50.0, -100.0, 200.0], [-100.0, 0.0, 0.0, 50.0]]), "trades", CAPITAL)
+    np.testing.assert_allclose(stats["final_equity"], [1150.0, 950.0])
+    # The second path draws down from the initial capital
+    np.testing.assert_allclose(stats["max_drawdown_pct"], [(1 - 950 / 1100) * 100, 10.0])
+    np.testing.assert_allclose(stats["win_rate_pct"], [50.0, 50.0])
+
+
+def test_return_path_statistics():
+    returns = np.array([0.1, -0.2, 0.05])
+    stats = path_statistics(np.log1p(returns)[None, :], "returns", CAPITAL)
+    np.testing.assert_allclose(stats["final_equity"], [CAPITAL * 1.1 * 0.8 * 1.05])
+    np.testing.assert_allclose(stats["max_drawdown_pct"], [20.0])
+
+
+@pytest.mark.parametrize("source", ["trades", "returns"])
+@pytest.mark.parametrize("method", ["bootstrap", "block_bootstrap", "shuffle"])
+def test_simulated_paths_match_step_by_step_walk(source, method):
+    rng = np.random.default_rng(0)
+    steps = rng.normal(5.0, 40.0, 60) if source == "trades" else rng.normal(0.0005, 0.02, 60)
+    result = run_monte_carlo(steps, source, CAPITAL, method=method, n_paths=200, block_size=7, seed=42)
+
+    # run_monte_carlo draws all 200 paths in one chunk from a generator seeded the same way
+    indices = resample_indices(np.random.default_rng(42), method, 200, len(steps), 7)
+    walked = np.array([walk_path(steps[row], source, CAPITAL) for row in indices])
+    for column, name in enumerate(["final_equity", "max_drawdown_pct", "win_rate_pct"]):
+        summary = result["distributions"][name]
+        assert summary["mean"] == pytest.approx(walked[:, column].mean())
+        assert summary["min"] == pytest.approx(walked[:, column].min())
+        assert summary["max"] == pytest.approx(walked[:, column].max())
+        assert sum(summary["histogram"]["counts"]) == 200
+
+    original = walk_path(steps, source, CAPITAL)
+    assert result["original"]["final_equity"] == pytest.approx(original[0])
+    assert result["original"]["max_drawdown_pct"] == pytest.approx(original[1])
+    assert result["probability_of_loss"] == pytest.approx(np.mean(walked[:, 0] < CAPITAL))
+
+
+def test_shuffled_trades_keep_final_equity():
+    pnl = np.array([120.0, -80.0, 45.0, -10.0, 300.0])
+    result = run_monte_carlo(pnl, "trades", CAPITAL, method="shuffle", n_paths=500, seed=1)
+    final_equity = result["distributions"]["final_equity"]
+    assert final_equity["min"] == pytest.approx(CAPITAL + pnl.sum())
+    assert final_equity["max"] == pytest.approx(CAPITAL + pnl.sum())
+
+
+def test_block_bootstrap_draws_contiguous_blocks():
+    indices = resample_indices(np.random.default_rng(3), "block_bootstrap", 50, 23, 5)
+    assert indices.shape == (50, 23)
+    assert indices.min() >= 0 and indices.max() < 23
+    blocks = indices[:, :20].reshape(50, 4, 5)
+    assert np.all(np.diff(blocks, axis=2) == 1)
+
+
+def test_same_seed_gives_same_distribution():
+    steps = np.random.default_rng(5).normal(size=100)
+    first = run_monte_carlo(steps, "trades", CAPITAL, n_paths=3000, seed=9)
+    assert run_monte_carlo(steps, "trades", CAPITAL, n_paths=3000, seed=9) == first
+
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({"source": "prices"}, "Unknown source"),
+    ({"method": "jackknife"}, "Unknown method"),
+    ({"n_paths": 0}, "n_paths"),
+    ({"steps": []}, "no closed trades"),
+])
+def test_invalid_requests_are_rejected(kwargs, message):
+    arguments = {"steps": [1.0, -1.0], "source": "trades", "initial_capital": CAPITAL, **kwargs}
+    with pytest.raises(ValueError, match=message):
+        run_monte_carlo(**arguments)
@@ -0,0 +1,121 @@
+"""
+The fast paths must give the same results as the implementations they replace:
+the vectorized engine as the bar-by-bar loop, the streaming strategies as the
+pandas ones, and chunked backtests over the bar store as in-memory backtests.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import settings
+from data_feed.bar_store import bar_store
+from data_feed.synthetic import generate_bars
+import backtest.backtesting_engine as backtesting_engine
+import backtest.chunked as chunked
+from backtest.backtesting_engine import backtest_strategy, resume_long_flat, simulate_long_flat
+from backtest.chunked import run_chunked_backtest
+from strategy.registry import get_strategy
+
+# Short windows give many signals on a few hundred bars
+STRATEGY_PARAMS = [
+    ("ma_crossover", {"short_window": 5, "long_window": 20}),
+    ("bollinger_bands", {"window": 10, "std_dev": 1.5}),
+]
+
+# Enough capital for every buy, and little enough that some buys are skipped
+CAPITALS = [100000.0, 3000.0]
+
+
+@pytest.fixture
+def bars():
+    return generate_bars(600, start="2020-01-01", seed=7)
+
+
+@pytest.fixture
+def trade_log(monkeypatch):
+    """Trades the backtests would write to the database, captured instead"""
+    trades = []
+
+    def insert_trades(batch):
+        trades.extend(dict(trade) for trade in batch)
+
+    monkeypatch.setattr(backtesting_engine.db_engine, "insert_trades", insert_trades)
+    monkeypatch.setattr(chunked.db_engine, "insert_trades", insert_trades)
+    return trades
+
+
+def _run(trade_log, run):
+    trade_log.clear()
+    values, metrics = run()
+    return list(values), metrics, sorted(trade_log, key=lambda trade: trade["entry_bar"])
+
+
+@pytest.mark.parametrize("strategy_name,params", STRATEGY_PARAMS)
+@pytest.mark.parametrize("initial_capital", CAPITALS)
+def test_vectorized_engine_matches_loop(bars, trade_log, strategy_name, params, initial_capital):
+    frame = get_strategy(strategy_name).signals(bars, params)
+
+    results = {
+        engine: _run(trade_log, lambda engine=engine: backtest_strategy(
+            frame, strategy_name, "TEST", initial_capital, 50, "parity", engine=engine
+        ))
+        for engine in ("loop", "vectorized")
+    }
+
+    assert results["vectorized"] == results["loop"]
+    assert results["loop"][1]["total_trades"] > 0
+
+
+@pytest.mark.parametrize("initial_capital", CAPITALS)
+def test_resumed_simulation_matches_one_pass(bars, initial_capital):
+    frame = get_strategy("ma_crossover").signals(bars, {"short_window": 5, "long_window": 20})
+    close = frame["Close"].to_numpy(dtype=np.float64)
+    position = frame["Position"].to_numpy()
+    expected = simulate_long_flat(close, position, initial_capital, 50)
+
+    # Split anywhere, including while a position is open, and carry the state over
+    for split in range(0, len(close) + 1, 13):
+        head = resume_long_flat(close[:split], position[:split], initial_capital, 50, holding=False)
+        holding = len(head[1]) > 0 and head[2][-1] == -1
+        tail = resume_long_flat(close[split:], position[split:], head[3], 50, holding=holding)
+
+        np.testing.assert_array_equal(np.concatenate((head[0], tail[0])), expected[0])
+        entries = np.concatenate((head[1], tail[1][tail[1] >= 0] + split))
+        exits = np.concatenate((head[2][head[2] >= 0], tail[2][tail[2] >= 0] + split))
+        np.testing.assert_array_equal(entries, expected[1])
+        np.testing.assert_array_equal(exits, expected[2][expected[2] >= 0])
+
+
+@pytest.mark.parametrize("strategy_name,params", STRATEGY_PARAMS)
+def test_stream_matches_pandas(bars, strategy_name, params):
+    spec = get_strategy(strategy_name)
+    expected = spec.signals(bars, params)
+
+    # Fed in uneven pieces, so the indicator state has to carry across calls
+    stream = spec.stream(params)
+    streamed = pd.concat([stream.extend(bars.iloc[lo:hi]) for lo, hi in ((0, 1), (1, 37), (37, 600))])
+
+    pd.testing.assert_frame_equal(streamed[expected.columns], expected,
+                                  check_dtype=False, check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("strategy_name,params", STRATEGY_PARAMS)
+@pytest.mark.parametrize("initial_capital", CAPITALS)
+def test_chunked_backtest_matches_in_memory(bars, trade_log, strategy_name, params, initial_capital):
+    symbol = f"PARITY_{strategy_name.upper()}"
+    bar_store.write(symbol, settings.INTERVAL, bars, [(pd.Timestamp("2019-01-01"), pd.Timestamp("2023-01-01"))])
+    start_date, end_date = "2020-02-01", "2022-01-01"
+
+    data = bar_store.load(symbol, settings.INTERVAL, start_date, end_date)
+    frame = get_strategy(strategy_name).signals(data, params)
+    expected = _run(trade_log, lambda: backtest_strategy(frame, strategy_name, symbol, initial_capital, 50, "parity"))
+    assert expected[1]["total_trades"] > 0
+
+    for chunk_bars in (1, 7, 250, 100000):
+        values, metrics, trades = _run(trade_log, lambda: run_chunked_backtest(
+            strategy_name, params, symbol, start_date, end_date, initial_capital, 50, "parity",
+            chunk_bars=chunk_bars
+        ))
+        assert values == expected[0], chunk_bars
+        assert metrics == expected[1], chunk_bars
+        assert trades == expected[2], chunk_bars
@@ -0,0 +1,83 @@
+"""
+Risk metrics are computed on whole arrays; check them against hand-worked
+curves and a plain pandas computation, and that they rank in SQL.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.risk_metrics import RISK_METRIC_NAMES, calculate_risk_metrics
+
+CAPITAL = 1000.0
+
+
+def test_drawdown_and_trade_metrics_of_a_small_curve():
+    dates = pd.date_range("2020-01-01", periods=6, freq="D")
+    values = [1100.0, 1050.0, 1200.0, 1150.0, 1140.0, 1210.0]
+    metrics = calculate_risk_metrics(values, dates, CAPITAL,
+                                     entry_bars=np.array([0, 2, 4]),
+                                     exit_bars=np.array([1, 3, -1]),
+                                     pnl=np.array([100.0, -40.0, 999.0]))
+
+    assert metrics["max_drawdown_pct"] == pytest.approx((1 - 1140 / 1200) * 100, abs=1e-4)
+    assert metrics["max_drawdown_duration_bars"] == 2
+    assert metrics["max_drawdown_duration_days"] == 2.0
+    # Held on bars 0, 2, 4 and 5 (the last trade is still open)
+    assert metrics["exposure_pct"] == pytest.approx(4 / 6 * 100, abs=0.01)
+    # The open trade's P&L is left out
+    assert metrics["profit_factor"] == 2.5
+    assert metrics["avg_trade_duration_bars"] == 1.0
+    assert metrics["avg_trade_duration_days"] == 1.0
+
+
+def test_return_ratios_match_pandas():
+    dates = pd.bdate_range("2018-01-01", periods=750)
+    values = CAPITAL * np.exp(np.cumsum(np.random.default_rng(2).normal(0.0004, 0.012, 750)))
+    metrics = calculate_risk_metrics(values, dates, CAPITAL)
+
+    returns = pd.Series(np.concatenate(([CAPITAL], values))).pct_change().dropna()
+    years = (dates[-1] - dates[0]).days / 365.25
+    per_year = len(values) / years
+    assert metrics["sharpe_ratio"] == pytest.approx(returns.mean() / returns.std() * math.sqrt(per_year), abs=1e-4)
+    downside = math.sqrt((returns.clip(upper=0) ** 2).mean())
+    assert metrics["sortino_ratio"] == pytest.approx(returns.mean() / downside * math.sqrt(per_year), abs=1e-4)
+    assert metrics["cagr_pct"] == pytest.approx(((values[-1] / CAPITAL) ** (1 / years) - 1) * 100, abs=1e-4)
+
+    equity = pd.Series(np.concatenate(([CAPITAL], values)))
+    drawdown = 1 - equity / equity.cummax()
+    assert metrics["max_drawdown_pct"] == pytest.approx(drawdown.max() * 100, abs=1e-4)
+
+
+def test_undefined_ratios_are_none():
+    dates = pd.date_range("2020-01-01", periods=5, freq="D")
+    flat = calculate_risk_metrics([CAPITAL] * 5, dates, CAPITAL, np.array([0]), np.array([2]), np.array([25.0]))
+    assert flat["sharpe_ratio"] is None and flat["sortino_ratio"] is None
+    assert flat["max_drawdown_pct"] == 0.0
+    # No losing trade, so no profit factor
+    assert flat["profit_factor"] is None
+
+    rising = calculate_risk_metrics([1010.0, 1020.0, 1030.0], dates[:3], CAPITAL)
+    assert rising["sortino_ratio"] is None
+    assert rising["exposure_pct"] is None
+
+
+def test_empty_curve_has_no_metrics():
+    assert calculate_risk_metrics([], pd.DatetimeIndex([]), CAPITAL) == {name: None for name in RISK_METRIC_NAMES}
+
+
+def test_metrics_are_ranked_in_sql(db):
+    for i, sharpe in enumerate([0.5, None, 1.7, 1.1]):
+        backtest_id = f"job-{i}"
+        db.create_backtest_job(backtest_id, "{}")
+        db.transition_backtest_status(backtest_id, ["PENDING"], "COMPLETED")
+        db.save_backtest_metrics(backtest_id, {"sharpe_ratio": sharpe, "max_drawdown_pct": 10.0 * i,
+                                               "strategy_name": "ma_crossover", "not_a_column": 1})
+
+    ranked = db.rank_backtest_jobs("sharpe_ratio")
+    assert [row["backtest_id"] for row in ranked] == ["job-2", "job-3", "job-0"]
+    filtered = db.rank_backtest_jobs("sharpe_ratio", maximums={"max_drawdown_pct": 25.0})
+    assert [row["backtest_id"] for row in filtered] == ["job-2", "job-0"]
+    with pytest.raises(ValueError):
+        db.rank_backtest_jobs("results")
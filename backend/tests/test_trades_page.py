@@ -0,0 +1,77 @@
+"""
+Trades are paged newest first by (entry_timestamp, trade_id): following the
+cursor returns every matching trade exactly once, ties on the timestamp included.
+"""
+import pytest
+
+from main import TRADE_RESPONSE_FIELDS, decode_trades_cursor, encode_trades_cursor
+
+
+@pytest.fixture
+def trades(db):
+    # Two trades per day, so pages also split between trades with the same timestamp
+    batch = [
+        {
+            "strategy_name": "ma_crossover" if i % 3 else "bollinger_bands",
+            "stock_symbol": "AAPL",
+            "trade_type": "buy",
+            "quantity": 10,
+            "entry_price": 100.0 + i,
+            "entry_timestamp": f"2020-01-{i // 2 + 1:02d} 00:00:00",
+            "backtest_id": "job-1",
+        }
+        for i in range(25)
+    ]
+    db.insert_trades(batch)
+    return batch
+
+
+def read_all_pages(db, limit, **filters):
+    pages, after = [], None
+    while True:
+        page, next_key = db.get_trades_page(TRADE_RESPONSE_FIELDS, after=after, limit=limit, **filters)
+        pages.append(page)
+        if next_key is None:
+            return pages
+        # Go through the cursor the endpoint hands out
+        after = decode_trades_cursor(encode_trades_cursor(next_key))
+
+
+@pytest.mark.parametrize("limit", [1, 4, 25, 100])
+def test_pages_return_every_trade_once_newest_first(db, trades, limit):
+    pages = read_all_pages(db, limit)
+    rows = [row for page in pages for row in page]
+
+    assert all(len(page) <= limit for page in pages)
+    assert len(pages) == max(1, -(-len(trades) // limit))
+    keys = [(row["entry_datetime"], row["trade_id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+    assert sorted(row["trade_id"] for row in rows) == list(range(1, len(trades) + 1))
+
+
+def test_filters_apply_on_every_page(db, trades):
+    rows = [row for page in read_all_pages(db, 3, strategy_name="bollinger_bands") for row in page]
+    assert len(rows) == sum(trade["strategy_name"] == "bollinger_bands" for trade in trades)
+    assert {row["strategy_name"] for row in rows} == {"bollinger_bands"}
+
+
+def test_projection_returns_only_requested_fields(db, trades):
+    page, next_key = db.get_trades_page({"pnl": "pnl", "ticker": "stock_symbol"}, limit=5)
+    assert [set(row) for row in page] == [{"pnl", "ticker"}] * 5
+    assert next_key is not None
+
+
+def test_cursor_round_trip():
+    key = ("2020-01-05 00:00:00", 42)
+    assert decode_trades_cursor(encode_trades_cursor(key)) == key
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_trades_cursor(["only-one"])])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_trades_cursor(cursor)
+
+
+def test_unknown_column_is_rejected(db):
+    with pytest.raises(ValueError):
+        db.get_trades_page({"x": "trade_id; DROP TABLE trades"})